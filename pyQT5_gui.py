@@ -8,18 +8,39 @@ from PyQt5 import QtWidgets, QtCore, QtGui
 import sys
 import serial.tools.list_ports
 from rot2proG_serial_v4 import Rot2proG
-import threading
+from pyQT5_worker import RotorWorker
 
 class GuiApp(QtWidgets.QWidget):
+
+	# Requests to the device worker, delivered as queued signals to its thread
+	request_connect = QtCore.pyqtSignal(str, int)
+	request_disconnect = QtCore.pyqtSignal()
+	request_interval = QtCore.pyqtSignal(float)
+	request_set = QtCore.pyqtSignal(float, float)
+
 	def __init__(self, rot2prog):
 		super().__init__()
-		self.rot2prog = rot2prog
 		self.update_interval = 2  # Default update interval in seconds
 		self.initUI()
-		self.timer = QtCore.QTimer()
-		self.timer.timeout.connect(self.update_status)
 		self.connected = False
 
+		# All device I/O runs in the worker thread; the GUI only exchanges queued signals with it
+		self.io_thread = QtCore.QThread()
+		self.worker = RotorWorker(Rot2proG, self.update_interval)
+		self.worker.rot2prog = rot2prog
+		self.worker.moveToThread(self.io_thread)
+		self.io_thread.started.connect(self.worker.start)
+		self.request_connect.connect(self.worker.open)
+		self.request_disconnect.connect(self.worker.close)
+		self.request_interval.connect(self.worker.set_interval)
+		self.request_set.connect(self.worker.set_position)
+		self.worker.connected.connect(self.on_connected)
+		self.worker.connect_failed.connect(self.on_connect_failed)
+		self.worker.disconnected.connect(self.on_disconnected)
+		self.worker.status.connect(self.update_status)
+		self.worker.message.connect(self.append_message)
+		self.io_thread.start()
+
 	def initUI(self):
 		self.setWindowTitle('Positioner Control 1')
 		self.setFixedSize(500, 900)  # Increased height to 850
@@ -184,39 +205,43 @@ class GuiApp(QtWidgets.QWidget):
 		if self.connected:
 			self.disconnect()
 		else:
-			threading.Thread(target=self.connect).start()
+			self.connect()
 
 	def connect(self):
 		com_port = self.com_port_input.currentText()
 		baud_rate = self.baud_rate_input.currentText()
 		self.append_message(f"Connecting to {com_port} at {baud_rate} baud")
 		try:
-			self.rot2prog = Rot2proG(com_port, debugging=True)
-			self.rot2prog.ser.baudrate = int(baud_rate)
-			self.timer.start(self.update_interval * 1000)
-			self.connect_button.setText('Disconnect')
-			self.connected = True
-			self.append_message("Connected successfully")
-			self.update_status()  # Run status command after connecting
-		except Exception as e:
-			self.append_message(f"Failed to connect: {e}")
+			baud_rate = int(baud_rate)
+		except ValueError:
+			self.append_message(f"Failed to connect: invalid baud rate {baud_rate}")
+			return
+		self.connect_button.setEnabled(False)
+		self.request_connect.emit(com_port, baud_rate)
+
+	def on_connected(self):
+		self.connect_button.setText('Disconnect')
+		self.connect_button.setEnabled(True)
+		self.connected = True
+		self.append_message("Connected successfully")
+
+	def on_connect_failed(self, error):
+		self.connect_button.setEnabled(True)
+		self.append_message(f"Failed to connect: {error}")
 
 	def disconnect(self):
 		self.append_message("Disconnecting")
-		self.timer.stop()
-		self.rot2prog.__del__()
+		self.request_disconnect.emit()
+
+	def on_disconnected(self):
 		self.connect_button.setText('Connect')
 		self.connected = False
 		self.append_message("Disconnected successfully")
 
-	def update_status(self):
-		try:
-			status = self.rot2prog.status()
-			self.azimuth_label.setText(f'Azimuth: {status[0]}')
-			self.elevation_label.setText(f'Elevation: {status[1]}')
-			self.resolution_label.setText(f'Resolution: {status[2]} pulses/degree')
-		except Exception as e:
-			self.append_message(f"Failed to update status: {e}")
+	def update_status(self, azimuth, elevation, pulse):
+		self.azimuth_label.setText(f'Azimuth: {azimuth}')
+		self.elevation_label.setText(f'Elevation: {elevation}')
+		self.resolution_label.setText(f'Resolution: {pulse} pulses/degree')
 
 	def set_update_interval(self):
 		if not self.connected:
@@ -226,7 +251,7 @@ class GuiApp(QtWidgets.QWidget):
 			interval = float(self.update_interval_input.text())
 			if 0 < interval <= 60:
 				self.update_interval = interval
-				self.timer.setInterval(int(self.update_interval * 1000))
+				self.request_interval.emit(self.update_interval)
 				self.append_message(f"Update interval set to {self.update_interval} seconds")
 			else:
 				self.append_message("Update interval must be between 0 and 60 seconds")
@@ -241,7 +266,7 @@ class GuiApp(QtWidgets.QWidget):
 			azimuth = float(self.azimuth_input.text())
 			elevation = float(self.elevation_input.text())
 			if -180 <= azimuth <= 360 and 0 <= elevation <= 180:
-				self.rot2prog.set(azimuth, elevation)
+				self.request_set.emit(azimuth, elevation)
 				self.append_message(f"Set values: Azimuth = {azimuth}, Elevation = {elevation}")
 			else:
 				self.append_message("Azimuth must be between -180 and 360 degrees, Elevation must be between 0 and 180 degrees")
@@ -257,7 +282,7 @@ class GuiApp(QtWidgets.QWidget):
 			if step > 0:
 				current_elevation = float(self.elevation_label.text().split(': ')[1])
 				new_elevation = current_elevation + step
-				self.rot2prog.set(float(self.azimuth_label.text().split(': ')[1]), new_elevation)
+				self.request_set.emit(float(self.azimuth_label.text().split(': ')[1]), new_elevation)
 				self.append_message(f"Moved up by {step} degrees")
 			else:
 				self.append_message("Step must be a positive value")
@@ -273,7 +298,7 @@ class GuiApp(QtWidgets.QWidget):
 			if step > 0:
 				current_elevation = float(self.elevation_label.text().split(': ')[1])
 				new_elevation = current_elevation - step
-				self.rot2prog.set(float(self.azimuth_label.text().split(': ')[1]), new_elevation)
+				self.request_set.emit(float(self.azimuth_label.text().split(': ')[1]), new_elevation)
 				self.append_message(f"Moved down by {step} degrees")
 			else:
 				self.append_message("Step must be a positive value")
@@ -289,7 +314,7 @@ class GuiApp(QtWidgets.QWidget):
 			if step > 0:
 				current_azimuth = float(self.azimuth_label.text().split(': ')[1])
 				new_azimuth = current_azimuth - step
-				self.rot2prog.set(new_azimuth, float(self.elevation_label.text().split(': ')[1]))
+				self.request_set.emit(new_azimuth, float(self.elevation_label.text().split(': ')[1]))
 				self.append_message(f"Moved left by {step} degrees")
 			else:
 				self.append_message("Step must be a positive value")
@@ -305,7 +330,7 @@ class GuiApp(QtWidgets.QWidget):
 			if step > 0:
 				current_azimuth = float(self.azimuth_label.text().split(': ')[1])
 				new_azimuth = current_azimuth + step
-				self.rot2prog.set(new_azimuth, float(self.elevation_label.text().split(': ')[1]))
+				self.request_set.emit(new_azimuth, float(self.elevation_label.text().split(': ')[1]))
 				self.append_message(f"Moved right by {step} degrees")
 			else:
 				self.append_message("Step must be a positive value")
@@ -318,8 +343,10 @@ class GuiApp(QtWidgets.QWidget):
 
 
 	def closeEvent(self, event):
-		if self.connected:
-			self.disconnect()
+		# Close the device and stop the worker thread before the window goes away
+		QtCore.QMetaObject.invokeMethod(self.worker, "close", QtCore.Qt.BlockingQueuedConnection)
+		self.io_thread.quit()
+		self.io_thread.wait()
 		event.accept()
 
 def run_gui():
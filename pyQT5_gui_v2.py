@@ -8,18 +8,40 @@ from PyQt5 import QtWidgets, QtCore, QtGui
 import sys
 import serial.tools.list_ports
 from rot2proG_serial_v4 import Rot2proG
-import threading
+from pyQT5_worker import RotorWorker
 
 class GuiApp(QtWidgets.QWidget):
+
+	# Requests to the device worker, delivered as queued signals to its thread
+	request_connect = QtCore.pyqtSignal(str, int)
+	request_disconnect = QtCore.pyqtSignal()
+	request_interval = QtCore.pyqtSignal(float)
+	request_set = QtCore.pyqtSignal(float, float)
+	request_stop = QtCore.pyqtSignal()
+
 	def __init__(self, rot2prog):
 		super().__init__()
-		self.rot2prog = rot2prog
 		self.update_interval = 2  # Default update interval in seconds
 		self.initUI()
-		self.timer = QtCore.QTimer()
-		self.timer.timeout.connect(self.update_status)
 		self.connected = False
-		self.mutex = QtCore.QMutex()  # Mutex for thread safety
+
+		# All device I/O runs in the worker thread; the GUI only exchanges queued signals with it
+		self.io_thread = QtCore.QThread()
+		self.worker = RotorWorker(Rot2proG, self.update_interval)
+		self.worker.rot2prog = rot2prog
+		self.worker.moveToThread(self.io_thread)
+		self.io_thread.started.connect(self.worker.start)
+		self.request_connect.connect(self.worker.open)
+		self.request_disconnect.connect(self.worker.close)
+		self.request_interval.connect(self.worker.set_interval)
+		self.request_set.connect(self.worker.set_position)
+		self.request_stop.connect(self.worker.stop)
+		self.worker.connected.connect(self.on_connected)
+		self.worker.connect_failed.connect(self.on_connect_failed)
+		self.worker.disconnected.connect(self.on_disconnected)
+		self.worker.status.connect(self.update_status)
+		self.worker.message.connect(self.append_message)
+		self.io_thread.start()
 
 	def initUI(self):
 		self.setWindowTitle('Positioner Control 1')
@@ -207,52 +229,46 @@ class GuiApp(QtWidgets.QWidget):
 		if self.connected:
 			self.disconnect()
 		else:
-			threading.Thread(target=self.connect).start()
+			self.connect()
 
 	def connect(self):
-		# Connect to the device
+		# Ask the worker to connect to the device
 		com_port = self.com_port_input.currentText()
 		baud_rate = self.baud_rate_input.currentText()
 		self.append_message(f"Connecting to {com_port} at {baud_rate} baud")
 		try:
-			self.mutex.lock()
-			self.rot2prog = Rot2proG(com_port, debugging=True)
-			self.rot2prog.ser.baudrate = int(baud_rate)
-			self.timer.start(self.update_interval * 1000)
-			self.connect_button.setText('Disconnect')
-			self.connected = True
-			self.append_message("Connected successfully")
-			self.update_status()  # Run status command after connecting
-		except Exception as e:
-			self.append_message(f"Failed to connect: {e}")
-		finally:
-			self.mutex.unlock()
+			baud_rate = int(baud_rate)
+		except ValueError:
+			self.append_message(f"Failed to connect: invalid baud rate {baud_rate}")
+			return
+		self.connect_button.setEnabled(False)
+		self.request_connect.emit(com_port, baud_rate)
+
+	def on_connected(self):
+		self.connect_button.setText('Disconnect')
+		self.connect_button.setEnabled(True)
+		self.connected = True
+		self.append_message("Connected successfully")
+
+	def on_connect_failed(self, error):
+		self.connect_button.setEnabled(True)
+		self.append_message(f"Failed to connect: {error}")
 
 	def disconnect(self):
-		# Disconnect from the device
+		# Ask the worker to disconnect from the device
 		self.append_message("Disconnecting")
-		self.mutex.lock()
-		try:
-			self.timer.stop()
-			self.rot2prog.__del__()
-			self.connect_button.setText('Connect')
-			self.connected = False
-			self.append_message("Disconnected successfully")
-		finally:
-			self.mutex.unlock()
-
-	def update_status(self):
-		# Update status labels
-		self.mutex.lock()
-		try:
-			status = self.rot2prog.status()
-			self.azimuth_label.setText(f'Azimuth: {status[0]}')
-			self.elevation_label.setText(f'Elevation: {status[1]}')
-			self.resolution_label.setText(f'Resolution: {status[2]} pulses/degree')
-		except Exception as e:
-			self.append_message(f"Failed to update status: {e}")
-		finally:
-			self.mutex.unlock()
+		self.request_disconnect.emit()
+
+	def on_disconnected(self):
+		self.connect_button.setText('Connect')
+		self.connected = False
+		self.append_message("Disconnected successfully")
+
+	def update_status(self, azimuth, elevation, pulse):
+		# Update status labels with a reading from the worker
+		self.azimuth_label.setText(f'Azimuth: {azimuth}')
+		self.elevation_label.setText(f'Elevation: {elevation}')
+		self.resolution_label.setText(f'Resolution: {pulse} pulses/degree')
 
 	def set_update_interval(self):
 		# Set the update interval for status updates
@@ -263,7 +279,7 @@ class GuiApp(QtWidgets.QWidget):
 			interval = float(self.update_interval_input.text())
 			if 0 < interval <= 60:
 				self.update_interval = interval
-				self.timer.setInterval(int(self.update_interval * 1000))
+				self.request_interval.emit(self.update_interval)
 				self.append_message(f"Update interval set to {self.update_interval} seconds")
 			else:
 				self.append_message("Update interval must be between 0 and 60 seconds")
@@ -275,7 +291,6 @@ class GuiApp(QtWidgets.QWidget):
 		if not self.connected:
 			self.append_message("Error: Not connected")
 			return
-		self.mutex.lock()
 		try:
 			azimuth = float(self.azimuth_input.text())
 			elevation = float(self.elevation_input.text())
@@ -285,19 +300,16 @@ class GuiApp(QtWidgets.QWidget):
 			if not (-21 <= elevation <= 180):
 				self.append_message(f"Error: Elevation value {elevation} out of limits. Must be between -21 and 180.")
 				return
-			self.rot2prog.set(azimuth, elevation)
+			self.request_set.emit(azimuth, elevation)
 			self.append_message(f"Set values: Azimuth = {azimuth}, Elevation = {elevation}")
 		except ValueError:
 			self.append_message("Invalid azimuth or elevation value")
-		finally:
-			self.mutex.unlock()
 
 	def move_up(self):
 		# Move up by step value
 		if not self.connected:
 			self.append_message("Error: Not connected")
 			return
-		self.mutex.lock()
 		try:
 			step = float(self.step_input.text())
 			if step > 0:
@@ -306,21 +318,18 @@ class GuiApp(QtWidgets.QWidget):
 				if new_elevation > 180:
 					self.append_message(f"Error: Elevation value {new_elevation} out of limits. Must be between -21 and 180.")
 					return
-				self.rot2prog.set(float(self.azimuth_label.text().split(': ')[1]), new_elevation)
+				self.request_set.emit(float(self.azimuth_label.text().split(': ')[1]), new_elevation)
 				self.append_message(f"Moved up by {step} degrees")
 			else:
 				self.append_message("Step must be a positive value")
 		except ValueError:
 			self.append_message("Invalid step value")
-		finally:
-			self.mutex.unlock()
 
 	def move_down(self):
 		# Move down by step value
 		if not self.connected:
 			self.append_message("Error: Not connected")
 			return
-		self.mutex.lock()
 		try:
 			step = float(self.step_input.text())
 			if step > 0:
@@ -329,21 +338,18 @@ class GuiApp(QtWidgets.QWidget):
 				if new_elevation < -21:
 					self.append_message(f"Error: Elevation value {new_elevation} out of limits. Must be between -21 and 180.")
 					return
-				self.rot2prog.set(float(self.azimuth_label.text().split(': ')[1]), new_elevation)
+				self.request_set.emit(float(self.azimuth_label.text().split(': ')[1]), new_elevation)
 				self.append_message(f"Moved down by {step} degrees")
 			else:
 				self.append_message("Step must be a positive value")
 		except ValueError:
 			self.append_message("Invalid step value")
-		finally:
-			self.mutex.unlock()
 
 	def move_left(self):
 		# Move left by step value
 		if not self.connected:
 			self.append_message("Error: Not connected")
 			return
-		self.mutex.lock()
 		try:
 			step = float(self.step_input.text())
 			if step > 0:
@@ -352,21 +358,18 @@ class GuiApp(QtWidgets.QWidget):
 				if new_azimuth < -180:
 					self.append_message(f"Error: Azimuth value {new_azimuth} out of limits. Must be between -180 and 540.")
 					return
-				self.rot2prog.set(new_azimuth, float(self.elevation_label.text().split(': ')[1]))
+				self.request_set.emit(new_azimuth, float(self.elevation_label.text().split(': ')[1]))
 				self.append_message(f"Moved left by {step} degrees")
 			else:
 				self.append_message("Step must be a positive value")
 		except ValueError:
 			self.append_message("Invalid step value")
-		finally:
-			self.mutex.unlock()
 
 	def move_right(self):
 		# Move right by step value
 		if not self.connected:
 			self.append_message("Error: Not connected")
 			return
-		self.mutex.lock()
 		try:
 			step = float(self.step_input.text())
 			if step > 0:
@@ -375,24 +378,18 @@ class GuiApp(QtWidgets.QWidget):
 				if new_azimuth > 540:
 					self.append_message(f"Error: Azimuth value {new_azimuth} out of limits. Must be between -180 and 540.")
 					return
-				self.rot2prog.set(new_azimuth, float(self.elevation_label.text().split(': ')[1]))
+				self.request_set.emit(new_azimuth, float(self.elevation_label.text().split(': ')[1]))
 				self.append_message(f"Moved right by {step} degrees")
 			else:
 				self.append_message("Step must be a positive value")
 		except ValueError:
 			self.append_message("Invalid step value")
-		finally:
-			self.mutex.unlock()
 
 	def stop(self):
 		# Emergency stop
 		if self.connected:
-			self.mutex.lock()
-			try:
-				self.append_message("Emergency stop activated")
-				self.rot2prog.stop()
-			finally:
-				self.mutex.unlock()
+			self.append_message("Emergency stop activated")
+			self.request_stop.emit()
 		else:
 			self.append_message("Error: Not connected")
 
@@ -402,9 +399,10 @@ class GuiApp(QtWidgets.QWidget):
 		self.messages_text.verticalScrollBar().setValue(self.messages_text.verticalScrollBar().maximum())
 
 	def closeEvent(self, event):
-		# Handle window close event
-		if self.connected:
-			self.disconnect()
+		# Close the device and stop the worker thread before the window goes away
+		QtCore.QMetaObject.invokeMethod(self.worker, "close", QtCore.Qt.BlockingQueuedConnection)
+		self.io_thread.quit()
+		self.io_thread.wait()
 		event.accept()
 
 def run_gui():
@@ -0,0 +1,107 @@
+'''
+File: 	pyQT5_worker.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Device worker for the PyQt5 GUIs. The worker lives in its own QThread and performs
+	all the I/O with the rot2proG controller (connecting, polling the status, SET and STOP
+	commands). The GUI talks to it only through queued signals, so a slow or timing out
+	link never blocks the Qt event loop. The status is polled with an adaptive schedule:
+	fast while the rotor moves towards a target, slower and slower while it is parked.
+'''
+
+from PyQt5 import QtCore
+from rot2proG_schedule import AdaptiveSchedule
+
+class RotorWorker(QtCore.QObject):
+
+	connected = QtCore.pyqtSignal()
+	connect_failed = QtCore.pyqtSignal(str)
+	disconnected = QtCore.pyqtSignal()
+	status = QtCore.pyqtSignal(float, float, int)  # Azimuth, elevation and pulse
+	message = QtCore.pyqtSignal(str)
+
+	'''
+	rot_class is the Rot2proG class used to open the controller, e.g. that of
+	rot2proG_serial_v4. interval is the time between two status polls in seconds while
+	the rotor is parked, before the back off. budget is an optional
+	rot2proG_schedule.BusBudget shared with the other consumers of the bus.
+	'''
+	def __init__(self, rot_class, interval=2.0, budget=None):
+		super().__init__()
+		self.rot_class = rot_class
+		self.rot2prog = None
+		self.schedule = AdaptiveSchedule(interval, max_interval=max(8.0, interval), budget=budget)
+		self.timer = None
+
+	'''
+	Creates the poll timer. Must run in the worker thread, so it is connected to the
+	started signal of the thread.
+	'''
+	@QtCore.pyqtSlot()
+	def start(self):
+		self.timer = QtCore.QTimer(self)
+		self.timer.setSingleShot(True)
+		self.timer.timeout.connect(self.poll)
+
+	@QtCore.pyqtSlot(str, int)
+	def open(self, com_port, baud_rate):
+		self.close()
+		try:
+			self.rot2prog = self.rot_class(com_port, debugging=True, baudrate=baud_rate)
+		except Exception as e:
+			self.rot2prog = None
+			self.connect_failed.emit(str(e))
+			return
+		self.connected.emit()
+		self.poll()  # Run status command after connecting
+
+	@QtCore.pyqtSlot()
+	def close(self):
+		if self.timer is not None:
+			self.timer.stop()
+		if self.rot2prog is not None:
+			self.rot2prog.__del__()
+			self.rot2prog = None
+			self.disconnected.emit()
+
+	@QtCore.pyqtSlot()
+	def poll(self):
+		if self.rot2prog is None:
+			return
+		try:
+			az, el, pulse = self.rot2prog.status()
+		except Exception as e:
+			self.message.emit(f"Failed to update status: {e}")
+			self.timer.start(int(self.schedule.error() * 1000))
+			return
+		self.timer.start(int(self.schedule.update(az, el, pulse) * 1000))
+		self.status.emit(az, el, pulse)
+
+	@QtCore.pyqtSlot(float)
+	def set_interval(self, interval):
+		self.schedule.interval = interval
+		self.schedule.max_interval = max(8.0, interval)
+
+	@QtCore.pyqtSlot(float, float)
+	def set_position(self, azimuth, elevation):
+		if self.rot2prog is None:
+			return
+		try:
+			self.rot2prog.set(azimuth, elevation)
+		except Exception as e:
+			self.message.emit(f"Failed to set position: {e}")
+			return
+		# Poll fast until the rotor gets there
+		self.schedule.set_target(azimuth, elevation)
+		self.timer.start(int(self.schedule.delay(self.schedule.fast_interval) * 1000))
+
+	@QtCore.pyqtSlot()
+	def stop(self):
+		if self.rot2prog is None:
+			return
+		try:
+			az, el, pulse = self.rot2prog.stop()
+			self.schedule.clear_target()
+		except Exception as e:
+			self.message.emit(f"Failed to stop: {e}")
+			return
+		self.status.emit(az, el, pulse)
@@ -0,0 +1,299 @@
+'''
+File: 	rot2proG_async.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	asyncio control interface for the SPID Elektronik rot2proG antenna rotor controller.
+	The STATUS, STOP and SET commands have the same semantics and limits as the Rot2proG
+	classes, but are coroutines, so a single event loop can drive many controllers over
+	the LAN (TCP port 23) and serial links without a thread per device.
+'''
+
+import asyncio
+import threading
+import time
+import serial
+from rot2proG_codec import STATUS_FRAME, STOP_FRAME, encode_set
+from rot2proG_framing import FrameReader
+from rot2proG_io import COMMAND_NAMES, Rot2proGTimeout
+import rot2proG_metrics
+
+'''
+asyncio protocol that reassembles the replies of one controller with a FrameReader and
+hands them to the command waiting for them. Replies nobody is waiting for (e.g. late
+replies to a timed out command) are discarded.
+'''
+class Rot2proGProtocol(asyncio.Protocol):
+
+	def __init__(self):
+		self.transport = None
+		self.reader = FrameReader(None)
+		self.waiter = None
+		self.closed = asyncio.get_running_loop().create_future()
+
+	def connection_made(self, transport):
+		self.transport = transport
+
+	def data_received(self, data):
+		self.reader.feed(data)
+		frame = self.reader.pop_frame()
+		while frame is not None:
+			if self.waiter is not None and not self.waiter.done():
+				self.waiter.set_result(frame)
+			frame = self.reader.pop_frame()
+
+	def connection_lost(self, exc):
+		if self.waiter is not None and not self.waiter.done():
+			self.waiter.set_exception(ConnectionError("Connection closed by the rotor controller"))
+		if not self.closed.done():
+			self.closed.set_result(None)
+
+'''
+Minimal asyncio transport for a pyserial port. The port is put in non-blocking mode and
+watched with loop.add_reader(), so it needs a platform where serial ports are selectable
+file descriptors (Linux, macOS).
+'''
+class SerialTransport(asyncio.Transport):
+
+	def __init__(self, loop, ser, protocol):
+		super().__init__()
+		self.loop = loop
+		self.ser = ser
+		self.protocol = protocol
+		self.ser.timeout = 0
+		self.loop.add_reader(self.ser.fileno(), self.read_ready)
+		self.protocol.connection_made(self)
+
+	def read_ready(self):
+		try:
+			data = self.ser.read(self.ser.in_waiting or 1)
+		except serial.SerialException as e:
+			self.close(e)
+			return
+		if data:
+			self.protocol.data_received(data)
+
+	def write(self, data):
+		self.ser.write(data)
+
+	def is_closing(self):
+		return not self.ser.is_open
+
+	def close(self, exc=None):
+		if self.ser.is_open:
+			self.loop.remove_reader(self.ser.fileno())
+			self.ser.close()
+			self.protocol.connection_lost(exc)
+
+'''
+Timer callback that fails a reply future which has not been resolved in time.
+'''
+def expire(waiter):
+	if not waiter.done():
+		waiter.set_exception(TimeoutError())
+
+class AsyncRot2proG:
+
+	pulse = 0
+	debug = False
+	max_az = float(540)  # Maximum azimuth. Defaults to 540.
+	min_az = float(-180)  # Minimum azimuth. Defaults to -180.
+	max_el = float(180)  # Maximum elevation. Defaults to 180.
+	min_el = float(-21)  # Minimum elevation. Defaults to -21.
+	timeout = 1.0  # Timeout budget of a single attempt in seconds. Defaults to 1.
+	retries = 2  # Number of times a command is retried after a timeout. Defaults to 2.
+	min_interval = 0.05  # Minimum spacing between two command frames in seconds. Defaults to 0.05.
+
+	'''
+	Use the open_tcp() and open_serial() coroutines to create a connected instance.
+	'''
+	def __init__(self, transport, protocol, name, debugging=False, timeout=None, retries=None):
+		self.transport = transport
+		self.protocol = protocol
+		self.name = name
+		self.debug = debugging
+		if timeout is not None:
+			self.timeout = float(timeout)
+		if retries is not None:
+			self.retries = int(retries)
+		self.lock = asyncio.Lock()
+		self.latency = None  # Latency of the last successful transaction in seconds
+		self.timeouts = 0  # Number of attempts that timed out
+		self.last_write = None  # time.monotonic() at which the last command frame was written
+		self.metrics = rot2proG_metrics.recorder(name)
+
+	'''
+	Connects to a controller over the LAN and reads its pulse value.
+	'''
+	@classmethod
+	async def open_tcp(cls, host, port=23, **kwargs):
+		loop = asyncio.get_running_loop()
+		transport, protocol = await loop.create_connection(Rot2proGProtocol, host, port)
+		rot = cls(transport, protocol, f"{host}:{port}", **kwargs)
+		await rot.status()
+		return rot
+
+	'''
+	Opens a serial (RS232 or USB virtual COM port) controller and reads its pulse value.
+	'''
+	@classmethod
+	async def open_serial(cls, dev_path, baudrate=460800, **kwargs):
+		loop = asyncio.get_running_loop()
+		ser = serial.Serial(port=dev_path, baudrate=baudrate, bytesize=8, parity='N', stopbits=1, timeout=0)
+		protocol = Rot2proGProtocol()
+		transport = SerialTransport(loop, ser, protocol)
+		rot = cls(transport, protocol, ser.name, **kwargs)
+		await rot.status()
+		return rot
+
+	async def close(self):
+		self.transport.close()
+		await self.protocol.closed
+
+	'''
+	Writes a command frame, waiting only as long as needed to keep min_interval seconds
+	between consecutive frames. Must be called with the lock held. Returns the
+	time.monotonic() at which the frame was handed to the transport.
+	'''
+	async def paced_write(self, frame, command):
+		if self.last_write is not None:
+			wait = self.last_write + self.min_interval - time.monotonic()
+			if wait > 0:
+				await asyncio.sleep(wait)
+		self.last_write = time.monotonic()
+		self.transport.write(frame)
+		written = time.monotonic()
+		self.metrics.record(command, "write", written - self.last_write)
+		return written
+
+	'''
+	Sends a STATUS or STOP frame and waits for the reply, retrying after a timeout.
+	Returns the decoded (az, el, ph, pv) reply.
+	'''
+	async def transact(self, frame, timeout=None, retries=None):
+		if timeout is None:
+			timeout = self.timeout
+		if retries is None:
+			retries = self.retries
+
+		command = COMMAND_NAMES[frame[11]]
+		loop = asyncio.get_running_loop()
+		async with self.lock:
+			for attempt in range(retries + 1):
+				self.protocol.reader.clear()
+				waiter = self.protocol.waiter = loop.create_future()
+				written = await self.paced_write(frame, command)
+				# A timer instead of asyncio.wait_for() avoids creating a task per command
+				timer = loop.call_later(timeout, expire, waiter)
+				try:
+					reply = await waiter
+				except TimeoutError:
+					self.timeouts += 1
+					continue
+				finally:
+					timer.cancel()
+					self.protocol.waiter = None
+				now = time.monotonic()
+				self.latency = now - self.last_write
+				self.metrics.record(command, "read", now - written)
+				self.metrics.record(command, "total", self.latency)
+				return reply
+
+		raise Rot2proGTimeout(command, timeout, retries + 1)
+
+	'''
+	Send a STATUS command to the controller and return the azimuth, elevation and pulse
+	as a list, like Rot2proG.status().
+	'''
+	async def status(self, timeout=None, retries=None):
+		az, el, ph, pv = await self.transact(STATUS_FRAME, timeout, retries)
+		self.pulse = ph
+
+		if(self.debug):
+			print(f"{self.name}: STATUS Azimuth: {az} Elevation: {el} Pulse: {ph}")
+
+		return [az, el, ph]
+
+	'''
+	Send a STOP command to the controller and return the azimuth, elevation and pulse
+	where it stopped as a list, like Rot2proG.stop().
+	'''
+	async def stop(self, timeout=None, retries=None):
+		az, el, ph, pv = await self.transact(STOP_FRAME, timeout, retries)
+		self.pulse = ph
+
+		if(self.debug):
+			print(f"{self.name}: STOP Azimuth: {az} Elevation: {el} Pulse: {ph}")
+
+		return [az, el, ph]
+
+	'''
+	Send a SET command to the controller. Values outside the azimuth and elevation limits
+	are refused with an error message, like Rot2proG.set(). There is no reply.
+	'''
+	async def set(self, azi, eli):
+		if not (self.min_az <= float(azi) <= self.max_az):
+			print(f"Error: Azimuth value {azi} out of limits. Must be between {self.min_az} and {self.max_az}.")
+			return
+		if not (self.min_el <= float(eli) <= self.max_el):
+			print(f"Error: Elevation value {eli} out of limits. Must be between {self.min_el} and {self.max_el}.")
+			return
+
+		packet = encode_set(azi, eli, self.pulse)
+		async with self.lock:
+			written = await self.paced_write(packet, "SET")
+		self.metrics.record("SET", "total", written - self.last_write)
+
+		if(self.debug):
+			print(f"{self.name}: SET Azimuth: {azi} Elevation: {eli}")
+
+'''
+Compares the STATUS throughput of one event loop driving n controllers with the
+threaded rot2proG_socket.Rot2proG approach (one thread per controller), against
+controllers emulated by rot2proG_simulator. delay is the reply latency of the emulated
+controllers in seconds.
+'''
+def benchmark(n_devices=32, n_commands=200, delay=0.005):
+	from rot2proG_socket import Rot2proG
+	from rot2proG_simulator import Simulator, SimulatedRotor
+
+	sim = Simulator()
+	ports = [sim.add_tcp(SimulatedRotor(reply_delay=delay)) for i in range(n_devices)]
+
+	async def run_async():
+		rots = [await AsyncRot2proG.open_tcp("127.0.0.1", port) for port in ports]
+		for rot in rots:
+			rot.min_interval = 0
+		start = time.perf_counter()
+
+		async def poll(rot):
+			for i in range(n_commands):
+				await rot.status()
+
+		await asyncio.gather(*(poll(rot) for rot in rots))
+		elapsed = time.perf_counter() - start
+		for rot in rots:
+			await rot.close()
+		return elapsed
+
+	elapsed = asyncio.run(run_async())
+	print(f"asyncio:  {n_devices} devices, {n_devices * n_commands / elapsed:.0f} STATUS/s")
+
+	rots = [Rot2proG("127.0.0.1", port) for port in ports]
+	for rot in rots:
+		rot.link.min_interval = 0
+
+	def poll(rot):
+		for i in range(n_commands):
+			rot.status()
+
+	threads = [threading.Thread(target=poll, args=(rot,)) for rot in rots]
+	start = time.perf_counter()
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	elapsed = time.perf_counter() - start
+	print(f"threaded: {n_devices} devices, {n_devices * n_commands / elapsed:.0f} STATUS/s")
+	sim.close()
+
+if __name__ == "__main__":
+	benchmark()
@@ -0,0 +1,110 @@
+'''
+File: 	rot2proG_batch.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	NumPy based batch versions of the SPID ROT2 codec. Captured STATUS/STOP replies are
+	decoded as whole arrays for post-pass analysis, and precomputed trajectories are
+	encoded into contiguous SET frames, instead of one frame at a time.
+'''
+
+import collections
+import time
+import numpy as np
+from rot2proG_codec import HEADER, END, CMD_SET, COMMAND_LEN, REPLY_LEN, encode_reply
+
+'''
+Decoded replies. az and el are float64 arrays in degrees, ph and pv are uint8 arrays and
+valid is a boolean mask which is True for frames with the 0x57 header, the 0x20
+terminator and PH == PV.
+'''
+Replies = collections.namedtuple('Replies', ['az', 'el', 'ph', 'pv', 'valid'])
+
+_DIGIT_WEIGHTS = np.array([1000, 100, 10, 1], dtype=np.int32)
+_DIGIT_DIVISORS = np.array([1000, 100, 10, 1], dtype=np.int64)
+
+'''
+Decodes a contiguous buffer (bytes, bytearray, memoryview or uint8 array) of N 12 byte
+replies in one shot. Trailing bytes that do not make up a complete frame are ignored.
+Invalid frames are flagged in the valid mask rather than raising, so a single corrupted
+reply does not abort the decoding of a whole capture.
+'''
+def decode_replies(buf):
+	raw = np.frombuffer(buf, dtype=np.uint8)
+	n = raw.size // REPLY_LEN
+	frames = raw[:n * REPLY_LEN].reshape(n, REPLY_LEN)
+
+	az = (frames[:, 1:5] @ _DIGIT_WEIGHTS) / 10.0 - 360.0
+	el = (frames[:, 6:10] @ _DIGIT_WEIGHTS) / 10.0 - 360.0
+	ph = frames[:, 5]
+	pv = frames[:, 10]
+	valid = (frames[:, 0] == HEADER) & (frames[:, REPLY_LEN - 1] == END) & (ph == pv)
+
+	return Replies(az, el, ph, pv, valid)
+
+'''
+Reads a capture of raw replies from disk and decodes it with decode_replies().
+'''
+def load_replies(path):
+	return decode_replies(np.fromfile(path, dtype=np.uint8))
+
+'''
+Encodes whole az/el trajectories into SET frames. azi and eli are array-like targets in
+degrees and pulse is the controller pulse value (see Rot2proG.pulse). Points outside the
+min/max azimuth and elevation limits, or whose pulse count does not fit in four digits,
+are masked out in the same way Rot2proG.set refuses them.
+
+Returns a (frames, valid) tuple where frames is a bytearray holding the 13 byte SET frames
+of the valid points back to back, in trajectory order, and valid is the boolean mask of
+the input points that were encoded.
+'''
+def encode_sets(azi, eli, pulse, min_az=-180.0, max_az=540.0, min_el=-21.0, max_el=180.0):
+	azi = np.asarray(azi, dtype=np.float64)
+	eli = np.asarray(eli, dtype=np.float64)
+	azi, eli = np.broadcast_arrays(azi.ravel(), eli.ravel())
+
+	H = np.trunc(pulse * (360 + azi))
+	V = np.trunc(pulse * (360 + eli))
+	valid = (min_az <= azi) & (azi <= max_az) & (min_el <= eli) & (eli <= max_el)
+	valid &= (0 <= H) & (H < 10000) & (0 <= V) & (V < 10000)
+
+	H = H[valid].astype(np.int64)
+	V = V[valid].astype(np.int64)
+	frames = np.empty((H.size, COMMAND_LEN), dtype=np.uint8)
+	frames[:, 0] = HEADER
+	frames[:, 1:5] = H[:, None] // _DIGIT_DIVISORS % 10 + 0x30
+	frames[:, 5] = pulse
+	frames[:, 6:10] = V[:, None] // _DIGIT_DIVISORS % 10 + 0x30
+	frames[:, 10] = pulse
+	frames[:, 11] = CMD_SET
+	frames[:, 12] = END
+
+	return bytearray(frames), valid
+
+'''
+Yields a memoryview of every 13 byte frame in a buffer produced by encode_sets(), so a
+sender can write the frames without copying or re-encoding them.
+'''
+def iter_frames(frames):
+	view = memoryview(frames)
+	for offset in range(0, len(view) - COMMAND_LEN + 1, COMMAND_LEN):
+		yield view[offset:offset + COMMAND_LEN]
+
+'''
+Benchmark for the batch encoder and decoder. Prints the number of frames handled per second.
+'''
+def benchmark(n=2000000):
+	buf = encode_reply(123.4, 45.6, 10) * n
+
+	start = time.perf_counter()
+	replies = decode_replies(buf)
+	elapsed = time.perf_counter() - start
+	print(f"decode_replies: {n} frames in {elapsed:.3f} s ({n / elapsed:.0f} frames/s, {np.count_nonzero(replies.valid)} valid)")
+
+	azi = np.linspace(-180, 540, n)
+	eli = np.linspace(-21, 180, n)
+	start = time.perf_counter()
+	frames, valid = encode_sets(azi, eli, 10)
+	elapsed = time.perf_counter() - start
+	print(f"encode_sets:    {n} frames in {elapsed:.3f} s ({n / elapsed:.0f} frames/s, {np.count_nonzero(valid)} valid)")
+
+if __name__ == "__main__":
+	benchmark()
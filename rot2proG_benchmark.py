@@ -0,0 +1,142 @@
+'''
+File: 	rot2proG_benchmark.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Benchmark suite for the rot2proG transports. For every transport (LAN, serial or USB
+	virtual COM port) and baud rate it measures the STATUS round-trip time percentiles,
+	the sustained SET rate and the STOP latency, against a real controller or the local
+	simulator, and writes the results as JSON so they can be compared between releases.
+
+	python rot2proG_benchmark.py --simulate --baud 9600 115200 460800
+	python rot2proG_benchmark.py --serial COM17 --baud 9600 460800 --tcp 192.168.0.10:23 -o results.json
+'''
+
+import argparse
+import json
+import platform
+import sys
+import time
+import numpy as np
+
+'''
+Runs the benchmark on one connected controller and returns a dict of results. Round-trip
+times are those measured by the link from writing the command to receiving the reply, so
+they do not include the pacing between commands; the SET rate does. SET commands are sent
+to the current position so a real rotor does not move.
+'''
+def run(rot, n_status=200, n_set=200, n_stop=20):
+	status_rtt = np.empty(n_status)
+	for i in range(n_status):
+		rot.status()
+		status_rtt[i] = rot.link.latency
+
+	az, el, pulse = rot.status()
+	start = time.perf_counter()
+	for i in range(n_set):
+		rot.set(az, el)
+	set_elapsed = time.perf_counter() - start
+	# The rate only counts once the last SET has left the link
+	rot.status()
+	set_elapsed_flushed = time.perf_counter() - start
+
+	stop_latency = np.empty(n_stop)
+	for i in range(n_stop):
+		rot.stop()
+		stop_latency[i] = rot.link.latency
+
+	p50, p95, p99 = np.percentile(status_rtt, [50, 95, 99]) * 1000
+	return {
+		"status_samples": n_status,
+		"status_rtt_ms": {"p50": p50, "p95": p95, "p99": p99, "min": status_rtt.min() * 1000, "max": status_rtt.max() * 1000, "mean": status_rtt.mean() * 1000},
+		"set_samples": n_set,
+		"set_rate_hz": n_set / set_elapsed,
+		"set_rate_flushed_hz": n_set / set_elapsed_flushed,
+		"stop_samples": n_stop,
+		"stop_latency_ms": {"p50": float(np.percentile(stop_latency, 50) * 1000), "max": stop_latency.max() * 1000},
+	}
+
+'''
+Time in seconds a STATUS command and its reply take on the wire at the given baud rate
+(10 bits per byte). Used to give simulated serial links a realistic latency.
+'''
+def wire_time(baud):
+	return (13 + 12) * 10 / baud
+
+def configure(rot, min_interval):
+	if min_interval is not None:
+		rot.link.min_interval = min_interval
+	return rot
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="rot2proG transport benchmark")
+	parser.add_argument("--serial", action="append", default=[], help="serial or USB virtual COM port of a controller")
+	parser.add_argument("--tcp", action="append", default=[], help="host[:port] of a controller on the LAN")
+	parser.add_argument("--baud", type=int, nargs="+", default=[460800], help="baud rates to test on serial links")
+	parser.add_argument("--simulate", action="store_true", help="benchmark emulated controllers (TCP and pseudo-terminal)")
+	parser.add_argument("--status", type=int, default=200, help="number of STATUS commands")
+	parser.add_argument("--set", type=int, default=200, help="number of SET commands")
+	parser.add_argument("--stop", type=int, default=20, help="number of STOP commands")
+	parser.add_argument("--min-interval", type=float, default=None, help="override the minimum spacing between commands in seconds")
+	parser.add_argument("-o", "--output", help="write the JSON results to this file instead of stdout")
+	args = parser.parse_args(argv)
+
+	from rot2proG_serial_v5 import Rot2proG as SerialRot2proG
+	from rot2proG_socket import Rot2proG as SocketRot2proG
+	from rot2proG_io import Rot2proGTimeout
+
+	sim = None
+	if args.simulate or not (args.serial or args.tcp):
+		from rot2proG_simulator import Simulator, SimulatedRotor
+		sim = Simulator()
+
+	# (transport, endpoint, baud, factory) for every configuration to benchmark
+	configs = []
+	for endpoint in args.tcp:
+		host, _, port = endpoint.partition(":")
+		configs.append(("tcp", endpoint, None, lambda host=host, port=int(port or 23): SocketRot2proG(host, port)))
+	for dev_path in args.serial:
+		for baud in args.baud:
+			configs.append(("serial", dev_path, baud, lambda dev_path=dev_path, baud=baud: SerialRot2proG(dev_path, baudrate=baud)))
+	if sim is not None:
+		port = sim.add_tcp(SimulatedRotor())
+		configs.append(("sim-tcp", f"127.0.0.1:{port}", None, lambda port=port: SocketRot2proG("127.0.0.1", port)))
+		for baud in args.baud:
+			dev_path = sim.add_pty(SimulatedRotor(reply_delay=wire_time(baud)))
+			configs.append(("sim-serial", dev_path, baud, lambda dev_path=dev_path, baud=baud: SerialRot2proG(dev_path, baudrate=baud)))
+
+	results = []
+	for transport, endpoint, baud, factory in configs:
+		# A controller that does not answer (e.g. at a mismatched baud) skips its configuration
+		rot = None
+		try:
+			rot = configure(factory(), args.min_interval)
+			result = {"transport": transport, "endpoint": endpoint, "baud": baud, "min_interval_s": rot.link.min_interval}
+			result.update(run(rot, args.status, args.set, args.stop))
+		except Rot2proGTimeout as e:
+			print(f"Error: {transport} {endpoint} {baud or ''}: {e}", file=sys.stderr)
+			if rot is not None:
+				rot.link.close()
+			continue
+		result["timeouts"] = rot.link.timeouts
+		results.append(result)
+		rot.link.close()
+		print(f"{transport:10s} {endpoint:22s} {str(baud or ''):>7s}  STATUS p50 {result['status_rtt_ms']['p50']:7.2f} ms  p99 {result['status_rtt_ms']['p99']:7.2f} ms  SET {result['set_rate_hz']:8.1f}/s  STOP {result['stop_latency_ms']['p50']:7.2f} ms", file=sys.stderr)
+
+	if sim is not None:
+		sim.close()
+
+	report = {
+		"benchmark": "rot2proG-transport",
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"results": results,
+	}
+	text = json.dumps(report, indent=2, default=float)
+	if args.output:
+		with open(args.output, "w") as f:
+			f.write(text + "\n")
+	else:
+		print(text)
+
+if __name__ == "__main__":
+	main()
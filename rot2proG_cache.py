@@ -0,0 +1,115 @@
+'''
+File: 	rot2proG_cache.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Caching front end for the status() of a rot2proG controller. When several consumers
+	(the GUI timer, a tracking script, a logger...) share one controller, a reading younger
+	than the TTL is returned from the cache and callers arriving while a STATUS command is
+	in flight wait for that command instead of sending their own.
+'''
+
+import concurrent.futures
+import threading
+import time
+
+class StatusCache:
+
+	'''
+	rot is the controller to wrap (e.g. a Rot2proG instance) and ttl the age in seconds
+	up to which a cached reading is returned.
+
+	The counters are:
+	hits: 		calls answered from the cache
+	misses: 	calls that sent a STATUS command
+	coalesced: 	calls that waited for a STATUS command sent by another caller
+	'''
+	def __init__(self, rot, ttl=0.5):
+		self.rot = rot
+		self.ttl = ttl
+		self.lock = threading.Lock()  # Protects the cache state
+		self.io_lock = threading.Lock()  # Serializes the commands sent to the controller
+		self.value = None
+		self.stamp = None  # time.monotonic() at which the cached reading was received
+		self.inflight = None
+		self.hits = 0
+		self.misses = 0
+		self.coalesced = 0
+
+	'''
+	Attributes that are not part of the cache (pulse, limits, link...) are those of the
+	wrapped controller, so the cache can be used in its place.
+	'''
+	def __getattr__(self, name):
+		return getattr(self.rot, name)
+
+	'''
+	Returns the age in seconds of the cached reading, or None if there is none.
+	'''
+	def age(self):
+		with self.lock:
+			if self.stamp is None:
+				return None
+			return time.monotonic() - self.stamp
+
+	def invalidate(self):
+		with self.lock:
+			self.value = None
+			self.stamp = None
+
+	'''
+	Returns [azimuth, elevation, pulse] like Rot2proG.status(). max_age overrides the TTL
+	for this call (0 forces a new reading, unless one is already in flight).
+	'''
+	def status(self, max_age=None):
+		if max_age is None:
+			max_age = self.ttl
+
+		with self.lock:
+			if self.value is not None and time.monotonic() - self.stamp <= max_age:
+				self.hits += 1
+				return list(self.value)
+			future = self.inflight
+			owner = future is None
+			if owner:
+				future = self.inflight = concurrent.futures.Future()
+				self.misses += 1
+			else:
+				self.coalesced += 1
+
+		if not owner:
+			return list(future.result())
+
+		try:
+			with self.io_lock:
+				value = self.rot.status()
+		except BaseException as e:
+			with self.lock:
+				self.inflight = None
+			future.set_exception(e)
+			raise
+
+		self.store(value)
+		with self.lock:
+			self.inflight = None
+		future.set_result(value)
+		return list(value)
+
+	def store(self, value):
+		with self.lock:
+			self.value = tuple(value)
+			self.stamp = time.monotonic()
+
+	'''
+	Sends a STOP command. Its reply refreshes the cache.
+	'''
+	def stop(self, *args, **kwargs):
+		with self.io_lock:
+			value = self.rot.stop(*args, **kwargs)
+		self.store(value)
+		return value
+
+	'''
+	Sends a SET command to the controller.
+	'''
+	def set(self, *args, **kwargs):
+		with self.io_lock:
+			return self.rot.set(*args, **kwargs)
@@ -0,0 +1,123 @@
+'''
+File: 	rot2proG_codec.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Shared encoder and decoder for the SPID ROT2 protocol frames exchanged with the
+	rot2proG antenna rotor controller. Every transport (serial, USB virtual COM port
+	and LAN) uses the same frame layout, so the STATUS and STOP commands are built
+	once at import time, the SET command is packed from a lookup table of ASCII digit
+	groups and replies are parsed straight out of the receive buffer.
+'''
+
+import struct
+import time
+
+'''
+Frame layout of the SPID ROT2 protocol.
+
+Command (13 bytes):	S H1 H2 H3 H4 PH V1 V2 V3 V4 PV K END
+Reply   (12 bytes):	S H1 H2 H3 H4 PH V1 V2 V3 V4 PV END
+
+In a command the H and V digits are ASCII characters ('0'-'9') holding the pulse count
+pulse * (360 + angle). In a reply they are raw values (0-9) holding the angle + 360 with
+one decimal place, and PH/PV hold the pulses per degree of the controller.
+'''
+HEADER = 0x57
+END = 0x20
+CMD_STOP = 0x0f
+CMD_STATUS = 0x1f
+CMD_SET = 0x2f
+COMMAND_LEN = 13
+REPLY_LEN = 12
+
+STATUS_FRAME = bytes([HEADER, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, CMD_STATUS, END])
+STOP_FRAME = bytes([HEADER, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, CMD_STOP, END])
+
+_SET_STRUCT = struct.Struct('>B4sB4sBBB')
+_REPLY_STRUCT = struct.Struct('>x4BB4BBx')
+
+# ASCII digit group for every pulse count that fits in the four H/V digits
+_DIGITS = tuple(b'%04d' % i for i in range(10000))
+
+'''
+Returns the H and V pulse counts for the given azimuth and elevation, as sent in a SET
+command. Raises a ValueError when a count does not fit in the four digits of the frame.
+'''
+def set_counts(azi, eli, pulse):
+	H = int(pulse * (360 + float(azi)))
+	V = int(pulse * (360 + float(eli)))
+	if not (0 <= H < 10000 and 0 <= V < 10000):
+		raise ValueError(f"Position {azi}, {eli} cannot be encoded with pulse {pulse}")
+	return H, V
+
+'''
+Builds the 13 byte SET command for the given azimuth, elevation and pulse value and
+returns it as an immutable bytes object.
+'''
+def encode_set(azi, eli, pulse):
+	H, V = set_counts(azi, eli, pulse)
+	return _SET_STRUCT.pack(HEADER, _DIGITS[H], pulse, _DIGITS[V], pulse, CMD_SET, END)
+
+'''
+Packs the SET command for the given azimuth, elevation and pulse value into a writable
+buffer (bytearray or memoryview) at the given offset, without allocating a new frame.
+'''
+def encode_set_into(buf, offset, azi, eli, pulse):
+	H, V = set_counts(azi, eli, pulse)
+	_SET_STRUCT.pack_into(buf, offset, HEADER, _DIGITS[H], pulse, _DIGITS[V], pulse, CMD_SET, END)
+
+'''
+Parses a 12 byte STATUS/STOP reply starting at the given offset of a bytes, bytearray or
+memoryview object. The azimuth, elevation, PH and PV are returned as a tuple. The header,
+terminator and PH == PV are not checked here; see is_reply().
+'''
+def decode_reply(buf, offset=0):
+	h1, h2, h3, h4, ph, v1, v2, v3, v4, pv = _REPLY_STRUCT.unpack_from(buf, offset)
+	az = (h1 * 100) + (h2 * 10) + h3 + (h4 / 10) - 360.0
+	el = (v1 * 100) + (v2 * 10) + v3 + (v4 / 10) - 360.0
+	return az, el, ph, pv
+
+'''
+Returns True when the 12 bytes starting at the given offset look like a valid reply, that
+is they start with the header, end with the terminator and report the same PH and PV.
+'''
+def is_reply(buf, offset=0):
+	return buf[offset] == HEADER and buf[offset + REPLY_LEN - 1] == END and buf[offset + 5] == buf[offset + 10]
+
+'''
+Builds the reply a controller sends for the given azimuth, elevation and pulse value.
+Used by the simulator and the benchmarks to produce realistic replies.
+'''
+def encode_reply(azi, eli, pulse):
+	H = int(round((360 + float(azi)) * 10))
+	V = int(round((360 + float(eli)) * 10))
+	return bytes([HEADER, H // 1000, H // 100 % 10, H // 10 % 10, H % 10, pulse,
+		V // 1000, V // 100 % 10, V // 10 % 10, V % 10, pulse, END])
+
+'''
+Microbenchmark for the codec. Prints the number of SET frames encoded and replies decoded
+per second.
+'''
+def benchmark(n=200000):
+	reply = memoryview(encode_reply(123.4, 45.6, 10))
+	buf = bytearray(COMMAND_LEN)
+
+	start = time.perf_counter()
+	for i in range(n):
+		encode_set(123.4, 45.6, 10)
+	elapsed = time.perf_counter() - start
+	print(f"encode_set:      {n / elapsed:12.0f} frames/s")
+
+	start = time.perf_counter()
+	for i in range(n):
+		encode_set_into(buf, 0, 123.4, 45.6, 10)
+	elapsed = time.perf_counter() - start
+	print(f"encode_set_into: {n / elapsed:12.0f} frames/s")
+
+	start = time.perf_counter()
+	for i in range(n):
+		decode_reply(reply)
+	elapsed = time.perf_counter() - start
+	print(f"decode_reply:    {n / elapsed:12.0f} frames/s")
+
+if __name__ == "__main__":
+	benchmark()
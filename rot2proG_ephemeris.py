@@ -0,0 +1,273 @@
+'''
+File: 	rot2proG_ephemeris.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Offline Sun, Moon and fixed source ephemerides for pointing calibration. Positions are
+	computed with the series of Meeus, Astronomical Algorithms (Sun to about 0.01 degree,
+	Moon from the main terms of ELP-2000/82 to about 10 arcseconds, J2000 RA/Dec sources
+	precessed and nutated to the date), vectorized with NumPy over time, and turned into
+	topocentric azimuth/elevation tracks (the lunar parallax of up to a degree included)
+	that rot2proG_tracking.Tracker can follow.
+
+	python rot2proG_ephemeris.py sun --lat 40.0 --lon -3.7 --serial COM17 --minutes 30
+'''
+
+import argparse
+import time
+import numpy as np
+from rot2proG_orbit import Station, gmst, earth_fixed, topocentric
+from rot2proG_tracking import Tracker
+
+TT_UTC = 69.184  # Terrestrial time minus UTC in seconds (37 leap seconds + 32.184)
+AU = 149597870.7  # km
+FAR = 1.0e12  # km, distance used for the sources outside the solar system
+CHUNK = 4096  # Time steps of the lunar series evaluated at once, to bound the temporaries
+
+'''
+Periodic terms of the lunar longitude (1e-6 degree) and distance (1e-3 km): multiples of
+D, M, M', F and the coefficients of the sine and cosine.
+'''
+MOON_LR = np.array([
+	[0, 0, 1, 0, 6288774, -20905355], [2, 0, -1, 0, 1274027, -3699111], [2, 0, 0, 0, 658314, -2955968],
+	[0, 0, 2, 0, 213618, -569925], [0, 1, 0, 0, -185116, 48888], [0, 0, 0, 2, -114332, -3149],
+	[2, 0, -2, 0, 58793, 246158], [2, -1, -1, 0, 57066, -152138], [2, 0, 1, 0, 53322, -170733],
+	[2, -1, 0, 0, 45758, -204586], [0, 1, -1, 0, -40923, -129620], [1, 0, 0, 0, -34720, 108743],
+	[0, 1, 1, 0, -30383, 104755], [2, 0, 0, -2, 15327, 10321], [0, 0, 1, 2, -12528, 0],
+	[0, 0, 1, -2, 10980, 79661], [4, 0, -1, 0, 10675, -34782], [0, 0, 3, 0, 10034, -23210],
+	[4, 0, -2, 0, 8548, -21636], [2, 1, -1, 0, -7888, 24208], [2, 1, 0, 0, -6766, 30824],
+	[1, 0, -1, 0, -5163, -8379], [1, 1, 0, 0, 4987, -16675], [2, -1, 1, 0, 4036, -12831],
+	[2, 0, 2, 0, 3994, -10445], [4, 0, 0, 0, 3861, -11650], [2, 0, -3, 0, 3665, 14403],
+	[0, 1, -2, 0, -2689, -7003], [2, 0, -1, 2, -2602, 0], [2, -1, -2, 0, 2390, 10056],
+	[1, 0, 1, 0, -2348, 6322], [2, -2, 0, 0, 2236, -9884], [0, 1, 2, 0, -2120, 5751],
+	[0, 2, 0, 0, -2069, 0], [2, -2, -1, 0, 2048, -4950], [2, 0, 1, -2, -1773, 4130],
+	[2, 0, 0, 2, -1595, 0], [4, -1, -1, 0, 1215, -3958], [0, 0, 2, 2, -1110, 0],
+	[3, 0, -1, 0, -892, 3258], [2, 1, 1, 0, -810, 2616], [4, -1, -2, 0, 759, -1897],
+	[0, 2, -1, 0, -713, -2117], [2, 2, -1, 0, -700, 2354], [2, 1, -2, 0, 691, 0],
+	[2, -1, 0, -2, 596, 0], [4, 0, 1, 0, 549, -1423], [0, 0, 4, 0, 537, -1117],
+	[4, -1, 0, 0, 520, -1571], [1, 0, -2, 0, -487, -1739], [2, 1, 0, -2, -399, 0],
+	[0, 0, 2, -2, -381, -4421], [1, 1, 1, 0, 351, 0], [3, 0, -2, 0, -340, 0],
+	[4, 0, -3, 0, 330, 0], [2, -1, 2, 0, 327, 0], [0, 2, 1, 0, -323, 1165],
+	[1, 1, -1, 0, 299, 0], [2, 0, 3, 0, 294, 0], [2, 0, -1, -2, 0, 8752],
+], dtype=float)
+
+'''
+Periodic terms of the lunar latitude (1e-6 degree): multiples of D, M, M', F and the
+coefficient of the sine.
+'''
+MOON_B = np.array([
+	[0, 0, 0, 1, 5128122], [0, 0, 1, 1, 280602], [0, 0, 1, -1, 277693], [2, 0, 0, -1, 173237],
+	[2, 0, -1, 1, 55413], [2, 0, -1, -1, 46271], [2, 0, 0, 1, 32573], [0, 0, 2, 1, 17198],
+	[2, 0, 1, -1, 9266], [0, 0, 2, -1, 8822], [2, -1, 0, -1, 8216], [2, 0, -2, -1, 4324],
+	[2, 0, 1, 1, 4200], [2, 1, 0, -1, -3359], [2, -1, -1, 1, 2463], [2, -1, 0, 1, 2211],
+	[2, -1, -1, -1, 2065], [0, 1, -1, -1, -1870], [4, 0, -1, -1, 1828], [0, 1, 0, 1, -1794],
+	[0, 0, 0, 3, -1749], [0, 1, -1, 1, -1565], [1, 0, 0, 1, -1491], [0, 1, 1, 1, -1475],
+	[0, 1, 1, -1, -1410], [0, 1, 0, -1, -1344], [1, 0, 0, -1, -1335], [0, 0, 3, 1, 1107],
+	[4, 0, 0, -1, 1021], [4, 0, -1, 1, 833], [0, 0, 1, -3, 777], [4, 0, -2, 1, 671],
+	[2, 0, 0, -3, 607], [2, 0, 2, -1, 596], [2, -1, 1, -1, 491], [2, 0, -2, 1, -451],
+	[0, 0, 3, -1, 439], [2, 0, 2, 1, 422], [2, 0, -3, -1, 421], [2, 1, -1, 1, -366],
+	[2, 1, 0, 1, -351], [4, 0, 0, 1, 331], [2, -1, 1, 1, 315], [2, -2, 0, -1, 302],
+	[0, 0, 1, 3, -283], [2, 1, 1, -1, -229], [1, 1, 0, -1, 223], [1, 1, 0, 1, 223],
+	[0, 1, -2, -1, -220], [2, 1, -1, -1, -220], [1, 0, 1, 1, -185], [2, -1, -2, -1, 181],
+	[0, 1, 2, 1, -177], [4, 0, -2, -1, 176], [4, -1, -1, -1, 166], [1, 0, 1, -1, -164],
+	[4, 0, 1, -1, 132], [1, 0, -1, -1, -119], [4, -1, 0, -1, 115], [2, -2, 0, 1, 107],
+], dtype=float)
+
+'''
+Julian centuries of terrestrial time since J2000.0 of time.time() values.
+'''
+def centuries(times):
+	return ((np.asarray(times, dtype=float) + TT_UTC) / 86400.0 + 2440587.5 - 2451545.0) / 36525.0
+
+'''
+Mean obliquity of the ecliptic and the nutation in longitude and obliquity, in degrees,
+to about half an arcsecond.
+'''
+def nutation(T):
+	omega = np.radians(125.04452 - 1934.136261 * T)
+	sun = np.radians(280.4665 + 36000.7698 * T)
+	moon = np.radians(218.3165 + 481267.8813 * T)
+	dpsi = (-17.20 * np.sin(omega) - 1.32 * np.sin(2 * sun) - 0.23 * np.sin(2 * moon) + 0.21 * np.sin(2 * omega)) / 3600.0
+	deps = (9.20 * np.cos(omega) + 0.57 * np.cos(2 * sun) + 0.10 * np.cos(2 * moon) - 0.09 * np.cos(2 * omega)) / 3600.0
+	eps0 = 23.0 + 26.0 / 60.0 + (21.448 - 46.8150 * T - 0.00059 * T ** 2 + 0.001813 * T ** 3) / 3600.0
+	return eps0, dpsi, deps
+
+'''
+Returns the right ascension and declination in degrees of ecliptic longitudes and
+latitudes in degrees for the obliquity eps.
+'''
+def ecliptic_to_equatorial(lon, lat, eps):
+	lon, lat, eps = np.radians(lon), np.radians(lat), np.radians(eps)
+	ra = np.arctan2(np.sin(lon) * np.cos(eps) - np.tan(lat) * np.sin(eps), np.cos(lon))
+	dec = np.arcsin(np.sin(lat) * np.cos(eps) + np.cos(lat) * np.sin(eps) * np.sin(lon))
+	return np.mod(np.degrees(ra), 360.0), np.degrees(dec)
+
+'''
+Apparent geocentric right ascension, declination (degrees, true equator and equinox of
+date) and distance in km of the Sun at time.time() values.
+'''
+def sun(times):
+	T = centuries(times)
+	L0 = 280.46646 + 36000.76983 * T + 0.0003032 * T ** 2
+	M = 357.52911 + 35999.05029 * T - 0.0001537 * T ** 2
+	e = 0.016708634 - 0.000042037 * T - 0.0000001267 * T ** 2
+	Mr = np.radians(M)
+	C = (1.914602 - 0.004817 * T - 0.000014 * T ** 2) * np.sin(Mr) + (0.019993 - 0.000101 * T) * np.sin(2 * Mr) + 0.000289 * np.sin(3 * Mr)
+	nu = np.radians(M + C)
+	distance = 1.000001018 * (1 - e * e) / (1 + e * np.cos(nu)) * AU
+	eps0, dpsi, deps = nutation(T)
+	# Aberration of 20.5 arcseconds
+	lon = L0 + C - 0.00569 + dpsi
+	ra, dec = ecliptic_to_equatorial(lon, 0.0, eps0 + deps)
+	return ra, dec, distance
+
+'''
+Apparent geocentric right ascension, declination (degrees, true equator and equinox of
+date) and distance in km of the Moon at time.time() values.
+'''
+def moon(times):
+	T = np.atleast_1d(centuries(times)).ravel()
+	L = 218.3164477 + 481267.88123421 * T - 0.0015786 * T ** 2 + T ** 3 / 538841.0 - T ** 4 / 65194000.0
+	D = 297.8501921 + 445267.1114034 * T - 0.0018819 * T ** 2 + T ** 3 / 545868.0 - T ** 4 / 113065000.0
+	M = 357.5291092 + 35999.0502909 * T - 0.0001536 * T ** 2 + T ** 3 / 24490000.0
+	Mp = 134.9633964 + 477198.8675055 * T + 0.0087414 * T ** 2 + T ** 3 / 69699.0 - T ** 4 / 14712000.0
+	F = 93.2720950 + 483202.0175233 * T - 0.0036539 * T ** 2 - T ** 3 / 3526000.0 + T ** 4 / 863310000.0
+	A1 = np.radians(119.75 + 131.849 * T)
+	A2 = np.radians(53.09 + 479264.290 * T)
+	A3 = np.radians(313.45 + 481266.484 * T)
+	E = 1.0 - 0.002516 * T - 0.0000074 * T ** 2
+	arguments = np.radians(np.stack([D, M, Mp, F]))  # (4, times)
+
+	# Terms involving M are scaled by E for the decreasing eccentricity of the Earth's orbit
+	sum_l = np.empty_like(T)
+	sum_r = np.empty_like(T)
+	sum_b = np.empty_like(T)
+	for start in range(0, T.size, CHUNK):
+		part = slice(start, start + CHUNK)
+		angle = MOON_LR[:, :4] @ arguments[:, part]
+		scale = E[None, part] ** np.abs(MOON_LR[:, 1:2])
+		sum_l[part] = np.sum(MOON_LR[:, 4:5] * scale * np.sin(angle), axis=0)
+		sum_r[part] = np.sum(MOON_LR[:, 5:6] * scale * np.cos(angle), axis=0)
+		angle = MOON_B[:, :4] @ arguments[:, part]
+		scale = E[None, part] ** np.abs(MOON_B[:, 1:2])
+		sum_b[part] = np.sum(MOON_B[:, 4:5] * scale * np.sin(angle), axis=0)
+
+	# Action of Venus, Jupiter and the flattening of the Earth
+	Lr, Mpr, Fr = np.radians(L), np.radians(Mp), np.radians(F)
+	sum_l += 3958 * np.sin(A1) + 1962 * np.sin(Lr - Fr) + 318 * np.sin(A2)
+	sum_b += -2235 * np.sin(Lr) + 382 * np.sin(A3) + 175 * np.sin(A1 - Fr) + 175 * np.sin(A1 + Fr) + 127 * np.sin(Lr - Mpr) - 115 * np.sin(Lr + Mpr)
+
+	eps0, dpsi, deps = nutation(T)
+	lon = L + sum_l / 1.0e6 + dpsi
+	lat = sum_b / 1.0e6
+	distance = 385000.56 + sum_r / 1000.0
+	ra, dec = ecliptic_to_equatorial(lon, lat, eps0 + deps)
+	shape = np.shape(times)
+	return ra.reshape(shape), dec.reshape(shape), distance.reshape(shape)
+
+'''
+Apparent right ascension and declination in degrees (true equator and equinox of date) at
+time.time() values of a fixed source with J2000 coordinates ra and dec in degrees, e.g. a
+radio source. Precession is rigorous; proper motion and aberration (under 21 arcseconds)
+are neglected.
+'''
+def source(ra, dec, times):
+	T = centuries(times)
+	zeta = np.radians((2306.2181 * T + 0.30188 * T ** 2 + 0.017998 * T ** 3) / 3600.0)
+	z = np.radians((2306.2181 * T + 1.09468 * T ** 2 + 0.018203 * T ** 3) / 3600.0)
+	theta = np.radians((2004.3109 * T - 0.42665 * T ** 2 - 0.041833 * T ** 3) / 3600.0)
+	ra0, dec0 = np.radians(ra), np.radians(dec)
+	A = np.cos(dec0) * np.sin(ra0 + zeta)
+	B = np.cos(theta) * np.cos(dec0) * np.cos(ra0 + zeta) - np.sin(theta) * np.sin(dec0)
+	C = np.sin(theta) * np.cos(dec0) * np.cos(ra0 + zeta) + np.cos(theta) * np.sin(dec0)
+	alpha = np.arctan2(A, B) + z
+	delta = np.arcsin(np.clip(C, -1.0, 1.0))
+	eps0, dpsi, deps = nutation(T)
+	eps = np.radians(eps0 + deps)
+	dpsi, deps = np.radians(dpsi), np.radians(deps)
+	dalpha = (np.cos(eps) + np.sin(eps) * np.sin(alpha) * np.tan(delta)) * dpsi - np.cos(alpha) * np.tan(delta) * deps
+	ddelta = np.sin(eps) * np.cos(alpha) * dpsi + np.sin(alpha) * deps
+	return np.mod(np.degrees(alpha + dalpha), 360.0), np.degrees(delta + ddelta)
+
+'''
+Greenwich apparent sidereal time in radians of time.time() values.
+'''
+def gast(times):
+	eps0, dpsi, deps = nutation(centuries(times))
+	return gmst(times) + np.radians(dpsi * np.cos(np.radians(eps0 + deps)))
+
+'''
+Atmospheric refraction in degrees at apparent elevations el in degrees (Bennett, for
+optical wavelengths at standard pressure and temperature).
+'''
+def refraction(el):
+	el = np.maximum(el, -1.0)
+	return 1.0 / np.tan(np.radians(el + 7.31 / (el + 4.4))) / 60.0
+
+'''
+Returns the topocentric azimuth, elevation (degrees) and range (km) of apparent right
+ascensions, declinations in degrees and distances in km at time.time() values, seen from
+a station. With refract the elevations include the optical refraction.
+'''
+def look(ra, dec, distance, times, station, refract=False):
+	ra, dec = np.radians(ra), np.radians(dec)
+	position = np.stack([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)], axis=-1) * np.asarray(distance, dtype=float)[..., None]
+	az, el, distance = topocentric(earth_fixed(position, gast(times)), station)
+	if refract:
+		el = el + refraction(el)
+	return az, el, distance
+
+'''
+Returns the (times, az, el) arrays of a target seen from a station from start to stop
+(time.time() values) every step seconds, ready for Tracker.run(). target is "sun", "moon"
+or the J2000 (ra, dec) in degrees of a fixed source.
+'''
+def track(target, station, start, stop, step=1.0, refract=False):
+	times = np.arange(start, stop + step / 2.0, step)
+	if isinstance(target, str):
+		bodies = {"sun": sun, "moon": moon}
+		if target.lower() not in bodies:
+			raise ValueError(f"Unknown target {target}, must be sun, moon or (ra, dec)")
+		ra, dec, distance = bodies[target.lower()](times)
+	else:
+		ra, dec = source(target[0], target[1], times)
+		distance = np.full(times.shape, FAR)
+	az, el, _ = look(ra, dec, distance, times, station, refract)
+	return times, az, el
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="rot2proG Sun, Moon and radio source tracking")
+	parser.add_argument("target", help="sun, moon or the J2000 RA,Dec of a source in degrees (e.g. 350.85,58.815)")
+	parser.add_argument("--lat", type=float, required=True, help="station latitude in degrees")
+	parser.add_argument("--lon", type=float, required=True, help="station longitude in degrees, east positive")
+	parser.add_argument("--alt", type=float, default=0.0, help="station altitude in meters")
+	parser.add_argument("--minutes", type=float, default=10.0, help="duration of the track")
+	parser.add_argument("--step", type=float, default=1.0, help="seconds between track points")
+	parser.add_argument("--refraction", action="store_true", help="add the optical refraction")
+	parser.add_argument("--serial", help="serial or USB virtual COM port of the controller")
+	parser.add_argument("--tcp", help="host[:port] of a controller on the LAN")
+	args = parser.parse_args(argv)
+
+	target = args.target
+	if "," in target:
+		target = tuple(float(value) for value in target.split(","))
+	station = Station(args.lat, args.lon, args.alt)
+	start = time.time()
+	times, az, el = track(target, station, start, start + args.minutes * 60.0, args.step, args.refraction)
+	print(f"Azimuth: {az[0]:8.3f}  Elevation: {el[0]:7.3f}")
+	if args.serial is None and args.tcp is None:
+		return
+	if args.serial is not None:
+		from rot2proG_serial_v5 import Rot2proG
+		rot = Rot2proG(args.serial)
+	else:
+		from rot2proG_socket import Rot2proG
+		host, _, port = args.tcp.partition(":")
+		rot = Rot2proG(host, int(port or 23))
+	tracker = Tracker(rot)
+	try:
+		log = tracker.run((times, az, el))
+		print(f"Sent {len(log.command_time)} points, dropped {log.dropped}, rejected {log.rejected}")
+	except KeyboardInterrupt:
+		tracker.stop()
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,266 @@
+'''
+File: 	rot2proG_exporter.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Prometheus metrics endpoint for station monitoring. Each controller has a Telemetry
+	snapshot (position, pulse, poll rate, errors) which is updated by the Poller of the
+	controller, and an Exporter serves the snapshots together with the latency histograms
+	and timeout/resync counters of the links in the Prometheus text format over HTTP.
+	Scraping only reads memory, it never sends a command to the MD-01.
+
+	python rot2proG_exporter.py --tcp 192.168.0.10:23 --serial COM17 --port 9464 --rate 2
+'''
+
+import argparse
+import collections
+import http.server
+import math
+import threading
+import time
+from rot2proG_poller import Poller
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+'''
+In-memory snapshot of the telemetry of one controller. record() and record_error() are
+called by the poller after each STATUS poll; render() only reads the snapshot and the
+counters of the link.
+'''
+class Telemetry:
+
+	rate_window = 20  # Number of polls over which the poll rate is measured
+
+	'''
+	rot is the controller (e.g. a Rot2proG instance) whose link counters and latency
+	histograms are exported, device the label of its metrics (by default that of its
+	latency histograms).
+	'''
+	def __init__(self, rot, device=None):
+		self.rot = rot
+		link = getattr(rot, "link", rot)
+		self.device = device or link.metrics.device
+		self.lock = threading.Lock()
+		self.az = None
+		self.el = None
+		self.pulse = None
+		self.stamp = None  # time.time() of the last reading
+		self.polls = 0
+		self.errors = 0
+		self.last_error = None
+		self.last_error_stamp = None  # time.time() of the last error
+		self.poll_times = collections.deque(maxlen=self.rate_window)  # time.monotonic() of the last polls
+
+	def record(self, az, el, pulse, stamp=None):
+		with self.lock:
+			self.az = az
+			self.el = el
+			self.pulse = pulse
+			self.stamp = time.time() if stamp is None else stamp
+			self.polls += 1
+			self.poll_times.append(time.monotonic())
+
+	def record_error(self, error, stamp=None):
+		with self.lock:
+			self.errors += 1
+			self.last_error = error
+			self.last_error_stamp = time.time() if stamp is None else stamp
+			self.poll_times.append(time.monotonic())
+
+	'''
+	Keeps the snapshot up to date from the readings and errors of a rot2proG_poller.Poller.
+	'''
+	def attach(self, poller):
+		return poller.subscribe(lambda position: self.record(position.az, position.el, position.pulse, position.timestamp), self.record_error)
+
+	'''
+	Returns the polls per second over the last rate_window polls, 0 if there are fewer
+	than two.
+	'''
+	def poll_rate(self):
+		with self.lock:
+			times = list(self.poll_times)
+		if len(times) < 2 or times[-1] == times[0]:
+			return 0.0
+		return (len(times) - 1) / (times[-1] - times[0])
+
+	'''
+	Returns the Prometheus samples of this controller as (name, labels, value) tuples,
+	where labels is a dict.
+	'''
+	def samples(self):
+		now = time.time()
+		label = {"device": self.device}
+		result = []
+		with self.lock:
+			if self.stamp is not None:
+				result.append(("rot2proG_azimuth_degrees", label, self.az))
+				result.append(("rot2proG_elevation_degrees", label, self.el))
+				result.append(("rot2proG_pulse", label, self.pulse))
+				result.append(("rot2proG_last_reading_age_seconds", label, now - self.stamp))
+			result.append(("rot2proG_polls_total", label, self.polls))
+			result.append(("rot2proG_poll_errors_total", label, self.errors))
+			if self.last_error_stamp is not None:
+				result.append(("rot2proG_last_error_age_seconds", label, now - self.last_error_stamp))
+		result.append(("rot2proG_poll_rate_hz", label, self.poll_rate()))
+
+		link = getattr(self.rot, "link", self.rot)
+		result.append(("rot2proG_timeouts_total", label, getattr(link, "timeouts", 0)))
+		reader = getattr(link, "reader", None)
+		if reader is not None:
+			result.append(("rot2proG_frames_total", label, reader.frames))
+			result.append(("rot2proG_dropped_bytes_total", label, reader.dropped))
+			result.append(("rot2proG_resyncs_total", label, reader.realigned))
+
+		for (command, phase), histogram in link.metrics.items():
+			labels = {"device": self.device, "command": command, "phase": phase}
+			for bound, count in histogram.cumulative():
+				le = "+Inf" if math.isinf(bound) else repr(bound)
+				result.append(("rot2proG_command_latency_seconds_bucket", dict(labels, le=le), count))
+			result.append(("rot2proG_command_latency_seconds_sum", labels, histogram.sum))
+			result.append(("rot2proG_command_latency_seconds_count", labels, histogram.count))
+		return result
+
+# Type and help text of every metric family, in the order they are rendered
+FAMILIES = (
+	("rot2proG_azimuth_degrees", "gauge", "Last azimuth read from the controller."),
+	("rot2proG_elevation_degrees", "gauge", "Last elevation read from the controller."),
+	("rot2proG_pulse", "gauge", "Pulses per degree reported by the controller."),
+	("rot2proG_last_reading_age_seconds", "gauge", "Time since the last successful poll."),
+	("rot2proG_polls_total", "counter", "Successful STATUS polls."),
+	("rot2proG_poll_errors_total", "counter", "STATUS polls that failed."),
+	("rot2proG_last_error_age_seconds", "gauge", "Time since the last failed poll."),
+	("rot2proG_poll_rate_hz", "gauge", "Recent polls per second."),
+	("rot2proG_timeouts_total", "counter", "Command attempts that timed out."),
+	("rot2proG_frames_total", "counter", "Reply frames received."),
+	("rot2proG_dropped_bytes_total", "counter", "Bytes discarded while resynchronizing on the reply frames."),
+	("rot2proG_resyncs_total", "counter", "Times the reply stream was realigned on a frame header."),
+	("rot2proG_command_latency_seconds", "histogram", "Latency of each phase of the commands sent to the controller."),
+)
+
+def escape(value):
+	return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_value(value):
+	if value is None:
+		return "NaN"
+	value = float(value)
+	if math.isinf(value):
+		return "+Inf" if value > 0 else "-Inf"
+	return repr(value)
+
+'''
+Renders the samples of several Telemetry snapshots in the Prometheus text exposition format.
+'''
+def render(telemetries):
+	families = collections.defaultdict(list)
+	for telemetry in telemetries:
+		for name, labels, value in telemetry.samples():
+			family = name
+			if name.startswith("rot2proG_command_latency_seconds_"):
+				family = "rot2proG_command_latency_seconds"
+			text = ",".join(f'{key}="{escape(val)}"' for key, val in labels.items())
+			families[family].append(f"{name}{{{text}}} {format_value(value)}")
+
+	lines = []
+	for family, kind, help_text in FAMILIES:
+		if family not in families:
+			continue
+		lines.append(f"# HELP {family} {help_text}")
+		lines.append(f"# TYPE {family} {kind}")
+		lines.extend(families.pop(family))
+	return "\n".join(lines) + "\n"
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+
+	def do_GET(self):
+		if self.path.split("?")[0] not in ("/", "/metrics"):
+			self.send_error(404)
+			return
+		body = render(self.server.exporter.telemetries()).encode("utf-8")
+		self.send_response(200)
+		self.send_header("Content-Type", CONTENT_TYPE)
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+'''
+HTTP server exposing the Telemetry snapshots of any number of controllers on /metrics,
+served from a background thread.
+'''
+class Exporter:
+
+	def __init__(self, port=9464, host=""):
+		self.lock = threading.Lock()
+		self.snapshots = []
+		self.server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+		self.server.daemon_threads = True
+		self.server.exporter = self
+		self.port = self.server.server_address[1]
+		self.thread = threading.Thread(target=self.server.serve_forever, name="rot2proG-exporter", daemon=True)
+		self.thread.start()
+
+	'''
+	Exports a controller and returns its Telemetry snapshot, which the poller of the
+	controller must keep up to date.
+	'''
+	def add(self, rot, device=None):
+		telemetry = Telemetry(rot, device)
+		with self.lock:
+			self.snapshots.append(telemetry)
+		return telemetry
+
+	def remove(self, telemetry):
+		with self.lock:
+			self.snapshots.remove(telemetry)
+
+	def telemetries(self):
+		with self.lock:
+			return list(self.snapshots)
+
+	def close(self):
+		self.server.shutdown()
+		self.server.server_close()
+		self.thread.join()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="rot2proG Prometheus exporter")
+	parser.add_argument("--serial", action="append", default=[], help="serial or USB virtual COM port of a controller")
+	parser.add_argument("--tcp", action="append", default=[], help="host[:port] of a controller on the LAN")
+	parser.add_argument("--host", default="", help="address to listen on (all interfaces by default)")
+	parser.add_argument("--port", type=int, default=9464, help="port to listen on")
+	parser.add_argument("--rate", type=float, default=1.0, help="STATUS polls per second and controller")
+	args = parser.parse_args(argv)
+
+	from rot2proG_serial_v5 import Rot2proG as SerialRot2proG
+	from rot2proG_socket import Rot2proG as SocketRot2proG
+
+	rotors = [SerialRot2proG(dev_path) for dev_path in args.serial]
+	for endpoint in args.tcp:
+		host, _, port = endpoint.partition(":")
+		rotors.append(SocketRot2proG(host, int(port or 23)))
+
+	exporter = Exporter(args.port, args.host)
+	print(f"Serving metrics on port {exporter.port}")
+	pollers = []
+	for rot in rotors:
+		poller = Poller(rot, args.rate)
+		exporter.add(rot).attach(poller)
+		pollers.append(poller.start())
+	try:
+		while True:
+			time.sleep(1)
+	except KeyboardInterrupt:
+		for poller in pollers:
+			poller.close()
+		exporter.close()
+
+if __name__ == "__main__":
+	main()
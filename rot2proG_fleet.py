@@ -0,0 +1,159 @@
+'''
+File: 	rot2proG_fleet.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Fleet manager for several SPID MD-01 positioners. The controllers may be connected over
+	serial, USB virtual COM port or LAN links; they are polled concurrently from a thread
+	pool so the time to read the whole fleet is that of the slowest controller rather
+	than the sum of all of them.
+'''
+
+import collections
+import concurrent.futures
+import time
+import numpy as np
+
+'''
+Result of Rot2proGFleet.status_all(). names lists the positioners in order, az, el and
+pulse are arrays with one entry per positioner (NaN / 0 when the positioner could not be
+read), timestamp holds the time.time() at which each reply was received, ok is a boolean
+mask of the positioners that replied and errors maps the names of the others to their
+exception.
+'''
+FleetStatus = collections.namedtuple('FleetStatus', ['names', 'az', 'el', 'pulse', 'timestamp', 'ok', 'errors'])
+
+class Rot2proGFleet:
+
+	'''
+	max_workers is the size of the thread pool; by default there is one thread per
+	positioner, up to 32.
+	'''
+	def __init__(self, max_workers=None):
+		self.rotors = collections.OrderedDict()
+		self.max_workers = max_workers
+		self.workers = 0
+		self.executor = None
+
+	'''
+	Adds an already connected controller (any object with status(), stop() and set(),
+	e.g. a Rot2proG instance) under the given name, e.g. "Positioner 1".
+	'''
+	def add(self, name, rot):
+		if name in self.rotors:
+			raise ValueError(f"Positioner {name} already in the fleet")
+		self.rotors[name] = rot
+		self.resize()
+		return rot
+
+	'''
+	Connects to a positioner on a serial or USB virtual COM port and adds it to the fleet.
+	'''
+	def add_serial(self, name, dev_path, **kwargs):
+		from rot2proG_serial_v5 import Rot2proG
+		return self.add(name, Rot2proG(dev_path, **kwargs))
+
+	'''
+	Connects to a positioner over the LAN and adds it to the fleet.
+	'''
+	def add_tcp(self, name, host, port=23, **kwargs):
+		from rot2proG_socket import Rot2proG
+		return self.add(name, Rot2proG(host, port, **kwargs))
+
+	def remove(self, name):
+		rot = self.rotors.pop(name)
+		self.resize()
+		return rot
+
+	def __len__(self):
+		return len(self.rotors)
+
+	def __getitem__(self, name):
+		return self.rotors[name]
+
+	'''
+	Recreates the thread pool so that every positioner can be polled at the same time.
+	'''
+	def resize(self):
+		workers = self.max_workers or min(32, max(1, len(self.rotors)))
+		if self.executor is not None:
+			if self.workers == workers:
+				return
+			self.executor.shutdown(wait=True)
+		self.workers = workers
+		self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rot2proG-fleet")
+
+	'''
+	Shuts the thread pool down. The fleet stays usable: the pool is recreated by the next
+	command or add().
+	'''
+	def close(self):
+		if self.executor is not None:
+			self.executor.shutdown(wait=True)
+			self.executor = None
+
+	'''
+	Runs fn(rot, *args) for every positioner concurrently and returns a list of
+	(result, exception, time.time()) tuples in fleet order.
+	'''
+	def run_all(self, fn, args_list=None):
+		def call(rot, args):
+			try:
+				result = fn(rot, *args)
+			except Exception as e:
+				return None, e, time.time()
+			return result, None, time.time()
+
+		if args_list is None:
+			args_list = [()] * len(self.rotors)
+		if self.executor is None:
+			self.resize()  # Closed
+		futures = [self.executor.submit(call, rot, args) for rot, args in zip(self.rotors.values(), args_list)]
+		return [future.result() for future in futures]
+
+	'''
+	Polls the STATUS of every positioner concurrently and returns a FleetStatus.
+	'''
+	def status_all(self):
+		return self.collect(self.run_all(lambda rot: rot.status()))
+
+	'''
+	Stops every positioner concurrently and returns a FleetStatus of where they stopped.
+	'''
+	def stop_all(self):
+		return self.collect(self.run_all(lambda rot: rot.stop()))
+
+	'''
+	Sends a SET command to every positioner concurrently. targets is a sequence of
+	(azimuth, elevation) pairs in fleet order, or a dict mapping names to pairs for a
+	subset of the fleet. Returns a dict of the positioners that failed and their exception.
+	'''
+	def set_all(self, targets):
+		if isinstance(targets, dict):
+			args_list = [targets.get(name) for name in self.rotors]
+		else:
+			args_list = list(targets)
+			if len(args_list) != len(self.rotors):
+				raise ValueError(f"Expected {len(self.rotors)} targets, got {len(args_list)}")
+
+		def set_target(rot, target):
+			if target is not None:
+				rot.set(*target)
+
+		results = self.run_all(set_target, [(target,) for target in args_list])
+		return {name: error for name, (result, error, stamp) in zip(self.rotors, results) if error is not None}
+
+	def collect(self, results):
+		n = len(results)
+		az = np.full(n, np.nan)
+		el = np.full(n, np.nan)
+		pulse = np.zeros(n, dtype=np.int32)
+		timestamp = np.empty(n)
+		ok = np.zeros(n, dtype=bool)
+		errors = {}
+		for i, (name, (result, error, stamp)) in enumerate(zip(self.rotors, results)):
+			timestamp[i] = stamp
+			if error is not None:
+				errors[name] = error
+				continue
+			az[i], el[i], pulse[i] = result
+			ok[i] = True
+		return FleetStatus(list(self.rotors), az, el, pulse, timestamp, ok, errors)
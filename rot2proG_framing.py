@@ -0,0 +1,153 @@
+'''
+File: 	rot2proG_framing.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Framed reader for the replies of the rot2proG antenna rotor controller. Stream links
+	such as the LAN (TCP) connection can deliver a reply in several pieces, or carry stray
+	bytes, so replies are reassembled in a preallocated buffer and the reader
+	resynchronizes on the 0x57 header and 0x20 terminator instead of failing.
+'''
+
+import time
+from rot2proG_codec import HEADER, REPLY_LEN, decode_reply, is_reply
+
+class FrameReader:
+
+	'''
+	recv_into is the function used to fill the buffer (see rot2proG_io.Link.recv_into).
+	It is given a writable memoryview and a timeout in seconds (None to block) and returns
+	the number of bytes received, or 0 if the timeout expired first. size is the size of
+	the preallocated receive buffer.
+
+	The counters are:
+	frames: 	number of valid replies returned
+	dropped: 	number of bytes discarded because they were not part of a valid reply
+	realigned: 	number of times the reader had to skip bytes to find the next reply
+	'''
+	def __init__(self, recv_into, size=4096):
+		self.recv_into = recv_into
+		self.buf = bytearray(size)
+		self.view = memoryview(self.buf)
+		self.start = 0
+		self.end = 0
+		self.frames = 0
+		self.dropped = 0
+		self.realigned = 0
+
+	'''
+	Number of received bytes that have not been consumed yet.
+	'''
+	def pending(self):
+		return self.end - self.start
+
+	'''
+	Discards any buffered bytes, e.g. a late reply to an earlier command, before a new
+	command is sent. Discarded bytes are counted as dropped.
+	'''
+	def clear(self):
+		self.dropped += self.end - self.start
+		self.start = 0
+		self.end = 0
+
+	'''
+	Looks for a complete, valid reply in the buffered bytes. Bytes in front of it are
+	dropped. Returns the offset of the reply, or -1 if more bytes are needed.
+	'''
+	def find_frame(self):
+		skipped = 0
+		while True:
+			pos = self.buf.find(HEADER, self.start, self.end)
+			if pos < 0:
+				skipped += self.end - self.start
+				self.start = self.end
+				break
+			skipped += pos - self.start
+			self.start = pos
+			if self.end - pos < REPLY_LEN:
+				break
+			if is_reply(self.buf, pos):
+				break
+			# A 0x57 that does not start a valid reply, skip it and search again
+			self.start = pos + 1
+			skipped += 1
+
+		if skipped:
+			self.dropped += skipped
+			self.realigned += 1
+		if self.end - self.start >= REPLY_LEN:
+			return self.start
+		return -1
+
+	'''
+	Receives the bytes still missing from the pending reply into the free space at the end
+	of the buffer, moving the unconsumed bytes to the front first when the buffer is full.
+	Returns False if the deadline (a time.monotonic() value) passed before anything was
+	received.
+	'''
+	def fill(self, deadline=None):
+		timeout = None
+		if deadline is not None:
+			timeout = deadline - time.monotonic()
+			if timeout <= 0:
+				return False
+
+		if self.start == self.end:
+			self.start = 0
+			self.end = 0
+		elif self.end == len(self.buf):
+			n = self.end - self.start
+			self.buf[:n] = self.view[self.start:self.end]
+			self.start = 0
+			self.end = n
+
+		# Only ask for the rest of the reply so that links which wait for the full
+		# request (e.g. pyserial) return as soon as it has arrived
+		need = REPLY_LEN - (self.end - self.start)
+		n = self.recv_into(self.view[self.end:self.end + need], timeout)
+		self.end += n
+		return n > 0 or deadline is None
+
+	'''
+	Appends bytes received by a push style transport (e.g. an asyncio protocol) to the
+	buffer. If they do not fit, the oldest unconsumed bytes are dropped.
+	'''
+	def feed(self, data):
+		n = len(data)
+		if self.end + n > len(self.buf):
+			if self.end - self.start + n > len(self.buf):
+				self.clear()
+				if n > len(self.buf):
+					self.dropped += n - len(self.buf)
+					data = data[n - len(self.buf):]
+					n = len(self.buf)
+			else:
+				pending = self.end - self.start
+				self.buf[:pending] = self.view[self.start:self.end]
+				self.start = 0
+				self.end = pending
+		self.buf[self.end:self.end + n] = data
+		self.end += n
+
+	'''
+	Returns the next valid reply already in the buffer as an (az, el, ph, pv) tuple, or
+	None if no complete reply has been received yet.
+	'''
+	def pop_frame(self):
+		pos = self.find_frame()
+		if pos < 0:
+			return None
+		self.start = pos + REPLY_LEN
+		self.frames += 1
+		return decode_reply(self.buf, pos)
+
+	'''
+	Returns the next valid reply as an (az, el, ph, pv) tuple, reading from the link as
+	many times as needed to reassemble it. Returns None if the deadline (a
+	time.monotonic() value) passes first.
+	'''
+	def read_frame(self, deadline=None):
+		frame = self.pop_frame()
+		while frame is None:
+			if not self.fill(deadline):
+				return None
+			frame = self.pop_frame()
+		return frame
@@ -0,0 +1,221 @@
+'''
+File: 	rot2proG_io.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Deadline aware I/O layer for the rot2proG antenna rotor controller. Every command is
+	given a timeout budget and retried a configurable number of times, so a lost reply
+	raises a Rot2proGTimeout instead of blocking the caller forever. The latency of the
+	last successful transaction is kept for monitoring. Consecutive commands are paced so
+	that the controller is given a minimum spacing between frames without the caller
+	having to sleep after every command. The write, flush and read phases of every command
+	are timed into the latency histograms of rot2proG_metrics.
+'''
+
+import socket
+import time
+import serial
+from rot2proG_codec import CMD_STATUS, CMD_STOP, CMD_SET
+from rot2proG_framing import FrameReader
+import rot2proG_metrics
+
+COMMAND_NAMES = {CMD_STATUS: "STATUS", CMD_STOP: "STOP", CMD_SET: "SET"}
+
+'''
+Raised when a command could not be completed within its timeout budget after all retries.
+It is a TimeoutError, so existing "except Exception" handlers keep working.
+'''
+class Rot2proGTimeout(TimeoutError):
+
+	def __init__(self, command, timeout, attempts):
+		super().__init__(f"{command} command timed out after {attempts} attempt(s) of {timeout} s")
+		self.command = command
+		self.timeout = timeout
+		self.attempts = attempts
+
+'''
+Base class of the links to a controller. Subclasses implement write() and recv_into()
+for a particular transport.
+'''
+class Link:
+
+	timeout = 1.0  # Timeout budget of a single attempt in seconds. Defaults to 1.
+	retries = 2  # Number of times a command is retried after a timeout. Defaults to 2.
+	min_interval = 0.05  # Minimum spacing between two command frames in seconds. Defaults to 0.05.
+
+	def __init__(self, timeout=None, retries=None):
+		self.metrics = rot2proG_metrics.recorder(self.name())
+		if timeout is not None:
+			self.timeout = float(timeout)
+		if retries is not None:
+			self.retries = int(retries)
+		self.reader = FrameReader(self.recv_into)
+		self.latency = None  # Latency of the last successful transaction in seconds
+		self.timeouts = 0  # Number of attempts that timed out
+		self.last_write = None  # time.monotonic() at which the last command frame was written
+
+	'''
+	Name of the device the link is connected to, used to label its metrics.
+	'''
+	def name(self):
+		return f"{type(self).__name__}-{id(self):x}"
+
+	'''
+	Writes a complete command frame. Raises a TimeoutError if it could not be written
+	within timeout seconds (None to block).
+	'''
+	def write(self, data, timeout):
+		raise NotImplementedError
+
+	'''
+	Waits until the written frame has been transmitted.
+	'''
+	def flush(self):
+		pass
+
+	'''
+	Receives bytes into a memoryview, waiting at most timeout seconds (None to block).
+	Returns the number of bytes received, 0 if the timeout expired first.
+	'''
+	def recv_into(self, view, timeout):
+		raise NotImplementedError
+
+	def close(self):
+		pass
+
+	'''
+	Writes and flushes a command frame, first waiting only as long as needed to keep
+	min_interval seconds between the previous frame and this one. The write and flush
+	phases are recorded under the given command name. Returns the time.monotonic() at
+	which the flush completed.
+	'''
+	def paced_write(self, data, timeout, command):
+		if self.last_write is not None:
+			wait = self.last_write + self.min_interval - time.monotonic()
+			if wait > 0:
+				time.sleep(wait)
+		self.last_write = time.monotonic()
+		self.write(data, timeout)
+		written = time.monotonic()
+		self.flush()
+		flushed = time.monotonic()
+		self.metrics.record(command, "write", written - self.last_write)
+		self.metrics.record(command, "flush", flushed - written)
+		return flushed
+
+	'''
+	Sends a command that has a reply (STATUS or STOP) and returns the decoded
+	(az, el, ph, pv) reply. Each attempt gets timeout seconds; after retries further
+	attempts a Rot2proGTimeout is raised.
+	'''
+	def transact(self, frame, timeout=None, retries=None):
+		if timeout is None:
+			timeout = self.timeout
+		if retries is None:
+			retries = self.retries
+		command = COMMAND_NAMES.get(frame[11], "UNKNOWN")
+
+		for attempt in range(retries + 1):
+			# Drop anything left over from an earlier, timed out attempt
+			self.reader.clear()
+			try:
+				flushed = self.paced_write(frame, timeout, command)
+				reply = self.reader.read_frame(self.last_write + timeout)
+			except TimeoutError:
+				reply = None
+			if reply is not None:
+				now = time.monotonic()
+				self.latency = now - self.last_write
+				self.metrics.record(command, "read", now - flushed)
+				self.metrics.record(command, "total", self.latency)
+				return reply
+			self.timeouts += 1
+
+		raise Rot2proGTimeout(command, timeout, retries + 1)
+
+	'''
+	Sends a command that has no reply (SET), retrying the write if it times out.
+	'''
+	def send(self, frame, timeout=None, retries=None):
+		if timeout is None:
+			timeout = self.timeout
+		if retries is None:
+			retries = self.retries
+		command = COMMAND_NAMES.get(frame[11], "UNKNOWN")
+
+		for attempt in range(retries + 1):
+			try:
+				flushed = self.paced_write(frame, timeout, command)
+			except TimeoutError:
+				self.timeouts += 1
+				continue
+			self.latency = flushed - self.last_write
+			self.metrics.record(command, "total", self.latency)
+			return
+
+		raise Rot2proGTimeout(command, timeout, retries + 1)
+
+'''
+Link over a pyserial port (RS232 or USB virtual COM port).
+'''
+class SerialLink(Link):
+
+	def __init__(self, ser, timeout=None, retries=None):
+		self.ser = ser
+		super().__init__(timeout, retries)
+
+	def name(self):
+		return str(self.ser.name)
+
+	def write(self, data, timeout):
+		if self.ser.write_timeout != timeout:
+			self.ser.write_timeout = timeout
+		try:
+			self.ser.write(data)
+		except serial.SerialTimeoutException:
+			raise TimeoutError("Serial write timed out")
+
+	def flush(self):
+		self.ser.flush()
+
+	def recv_into(self, view, timeout):
+		if self.ser.timeout != timeout:
+			self.ser.timeout = timeout
+		return self.ser.readinto(view)
+
+	def close(self):
+		self.ser.close()
+
+'''
+Link over a TCP socket (LAN). A closed connection raises a ConnectionError.
+'''
+class SocketLink(Link):
+
+	def __init__(self, sock, timeout=None, retries=None):
+		self.sock = sock
+		super().__init__(timeout, retries)
+
+	def name(self):
+		try:
+			host, port = self.sock.getpeername()[:2]
+		except OSError:
+			return super().name()
+		return f"{host}:{port}"
+
+	def write(self, data, timeout):
+		self.sock.settimeout(timeout)
+		try:
+			self.sock.sendall(data)
+		except socket.timeout:
+			raise TimeoutError("Socket write timed out")
+
+	def recv_into(self, view, timeout):
+		self.sock.settimeout(timeout)
+		try:
+			n = self.sock.recv_into(view)
+		except socket.timeout:
+			return 0
+		if not n:
+			raise ConnectionError("Connection closed by the rotor controller")
+		return n
+
+	def close(self):
+		self.sock.close()
@@ -0,0 +1,145 @@
+'''
+File: 	rot2proG_metrics.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Low overhead latency histograms for the commands sent to the rot2proG antenna rotor
+	controller. Every link records the duration of the write, flush and read phases and
+	the total of each STATUS, STOP and SET command into fixed log-spaced buckets, per
+	command and per device. The histograms can be queried from Python or dumped as JSON.
+'''
+
+import bisect
+import itertools
+import json
+import math
+import threading
+import weakref
+
+# Upper bounds of the buckets in seconds: 4 buckets per doubling from 10 us to about 20 s
+BUCKET_BOUNDS = tuple(1e-5 * 2 ** (i / 4) for i in range(85))
+
+class LatencyHistogram:
+
+	def __init__(self):
+		self.counts = [0] * (len(BUCKET_BOUNDS) + 1)  # The last bucket holds everything above
+		self.count = 0
+		self.sum = 0.0
+		self.min = None
+		self.max = None
+
+	def record(self, seconds):
+		self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+		self.count += 1
+		self.sum += seconds
+		if self.min is None or seconds < self.min:
+			self.min = seconds
+		if self.max is None or seconds > self.max:
+			self.max = seconds
+
+	def mean(self):
+		return self.sum / self.count if self.count else None
+
+	'''
+	Returns an estimate of the q-th percentile (0-100) in seconds: the upper bound of the
+	bucket holding it, clamped to the largest value recorded.
+	'''
+	def percentile(self, q):
+		if not self.count:
+			return None
+		rank = q / 100 * self.count
+		seen = 0
+		for i, n in enumerate(self.counts):
+			seen += n
+			if n and seen >= rank:
+				if i < len(BUCKET_BOUNDS):
+					return min(BUCKET_BOUNDS[i], self.max)
+				return self.max
+		return self.max
+
+	'''
+	Returns (upper bound, cumulative count) pairs for every bucket, ending with (inf, count),
+	as used by Prometheus histograms. The set of buckets is the same whatever was recorded,
+	so that a bucket never disappears from one scrape to the next.
+	'''
+	def cumulative(self):
+		return list(zip(BUCKET_BOUNDS + (math.inf,), itertools.accumulate(self.counts)))
+
+	def to_dict(self):
+		return {
+			"count": self.count,
+			"sum": self.sum,
+			"min": self.min,
+			"max": self.max,
+			"mean": self.mean(),
+			"p50": self.percentile(50),
+			"p95": self.percentile(95),
+			"p99": self.percentile(99),
+		}
+
+'''
+Histograms of one device, keyed by (command, phase). The phases are "write", "flush",
+"read" and "total".
+'''
+class LatencyRecorder:
+
+	def __init__(self, device):
+		self.device = device
+		self.histograms = {}
+		self.lock = threading.Lock()
+
+	def record(self, command, phase, seconds):
+		key = (command, phase)
+		histogram = self.histograms.get(key)
+		if histogram is None:
+			with self.lock:
+				histogram = self.histograms.setdefault(key, LatencyHistogram())
+		histogram.record(seconds)
+
+	def histogram(self, command, phase="total"):
+		return self.histograms.get((command, phase))
+
+	'''
+	Returns the ((command, phase), histogram) pairs sorted by key. The dict is copied under
+	the lock, as record() may add a histogram from another thread while it is read.
+	'''
+	def items(self):
+		with self.lock:
+			items = list(self.histograms.items())
+		return sorted(items)
+
+	def to_dict(self):
+		result = {}
+		for (command, phase), histogram in self.items():
+			result.setdefault(command, {})[phase] = histogram.to_dict()
+		return result
+
+	def reset(self):
+		with self.lock:
+			self.histograms = {}
+
+# Recorders of all live devices, by device name
+registry = weakref.WeakValueDictionary()
+
+'''
+Returns the recorder of the given device, creating and registering it if needed.
+'''
+def recorder(device):
+	rec = registry.get(device)
+	if rec is None:
+		rec = LatencyRecorder(device)
+		registry[device] = rec
+	return rec
+
+'''
+Returns the histograms of every live device as a dict, {device: {command: {phase: ...}}}.
+'''
+def snapshot():
+	return {device: rec.to_dict() for device, rec in list(registry.items())}
+
+'''
+Writes snapshot() as JSON to a file object, or returns it as a string if none is given.
+'''
+def dump(f=None):
+	text = json.dumps(snapshot(), indent=2)
+	if f is None:
+		return text
+	f.write(text + "\n")
@@ -0,0 +1,464 @@
+'''
+File: 	rot2proG_orbit.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Offline orbit propagation for satellite tracking. Reads two-line element sets from
+	local files and propagates them with SGP4 (WGS-72 constants, as in Vallado's revised
+	reference implementation), vectorized with NumPy over all the satellites and time
+	steps at once, into azimuth/elevation/range tracks for a ground station. Passes can be
+	listed for a whole day and a pass turned into a track for rot2proG_tracking.Tracker.
+	Only near-Earth orbits (period below 225 minutes) are supported; the deep-space (SDP4)
+	terms are not implemented and such satellites yield NaN.
+
+	python rot2proG_orbit.py stations.txt --lat 40.0 --lon -3.7 --alt 650 --hours 24
+'''
+
+import argparse
+import calendar
+import collections
+import time
+import numpy as np
+
+# WGS-72 constants used by SGP4
+MU = 398600.8  # km^3/s^2
+RE = 6378.135  # km
+XKE = 60.0 / np.sqrt(RE ** 3 / MU)  # Earth radii^1.5 per minute
+J2 = 0.001082616
+J3 = -0.00000253881
+J4 = -0.00000165597
+J3OJ2 = J3 / J2
+X2O3 = 2.0 / 3.0
+TWOPI = 2.0 * np.pi
+
+# WGS-84 ellipsoid of the station coordinates
+WGS84_A = 6378.137  # km
+WGS84_F = 1.0 / 298.257223563
+
+'''
+Ground station: geodetic latitude and longitude in degrees (east positive) and altitude in
+meters above the ellipsoid.
+'''
+Station = collections.namedtuple('Station', ['lat', 'lon', 'alt'])
+
+'''
+A pass of a satellite over the station. satellite is the index of the satellite, name its
+name, aos and los the times (time.time() values) it rises above and sets below the minimum
+elevation, tca the time of its maximum elevation max_el in degrees.
+'''
+Pass = collections.namedtuple('Pass', ['satellite', 'name', 'aos', 'tca', 'los', 'max_el'])
+
+'''
+Returns the (name, line1, line2) element sets of a TLE file, with or without name lines.
+'''
+def read_tle(path):
+	with open(path) as f:
+		lines = [line.rstrip() for line in f if line.strip()]
+	sets = []
+	name = None
+	i = 0
+	while i < len(lines):
+		line = lines[i]
+		if line.startswith("1 ") and i + 1 < len(lines) and lines[i + 1].startswith("2 "):
+			sets.append((name or line[2:7].strip(), line, lines[i + 1]))
+			name = None
+			i += 2
+		else:
+			name = line[2:].strip() if line.startswith("0 ") else line.strip()
+			i += 1
+	return sets
+
+'''
+Parses the exponent notation of the TLE drag terms, e.g. " 28098-4" for 0.28098e-4.
+'''
+def parse_exp(field):
+	field = field.strip()
+	if not field:
+		return 0.0
+	sign = -1.0 if field[0] == "-" else 1.0
+	field = field.lstrip("+-")
+	mantissa, exponent = field[:-2], field[-2:]
+	return sign * float("0." + mantissa) * 10.0 ** int(exponent)
+
+'''
+Returns the epoch of a TLE line 1 as a time.time() value.
+'''
+def tle_epoch(line1):
+	year = int(line1[18:20])
+	year += 2000 if year < 57 else 1900
+	day = float(line1[20:32])
+	return calendar.timegm((year, 1, 1, 0, 0, 0)) + (day - 1.0) * 86400.0
+
+'''
+Greenwich mean sidereal time in radians (IAU 1982) of time.time() values.
+'''
+def gmst(times):
+	tut1 = (np.asarray(times, dtype=float) / 86400.0 + 2440587.5 - 2451545.0) / 36525.0
+	seconds = -6.2e-6 * tut1 ** 3 + 0.093104 * tut1 ** 2 + (876600.0 * 3600.0 + 8640184.812866) * tut1 + 67310.54841
+	return np.mod(np.radians(seconds / 240.0), TWOPI)
+
+'''
+Returns the ECEF position in km of a station.
+'''
+def station_ecef(station):
+	lat = np.radians(station.lat)
+	lon = np.radians(station.lon)
+	alt = station.alt / 1000.0
+	e2 = WGS84_F * (2.0 - WGS84_F)
+	n = WGS84_A / np.sqrt(1.0 - e2 * np.sin(lat) ** 2)
+	return np.array([(n + alt) * np.cos(lat) * np.cos(lon), (n + alt) * np.cos(lat) * np.sin(lon), (n * (1.0 - e2) + alt) * np.sin(lat)])
+
+'''
+Returns the azimuth and elevation in degrees (azimuth 0-360 from north through east) and
+the range in km of ECEF positions in km of shape (..., 3) as seen from a station.
+'''
+def topocentric(ecef, station):
+	site = station_ecef(station)
+	dx, dy, dz = ecef[..., 0] - site[0], ecef[..., 1] - site[1], ecef[..., 2] - site[2]
+	lat, lon = np.radians(station.lat), np.radians(station.lon)
+	east = -np.sin(lon) * dx + np.cos(lon) * dy
+	north = -np.sin(lat) * np.cos(lon) * dx - np.sin(lat) * np.sin(lon) * dy + np.cos(lat) * dz
+	up = np.cos(lat) * np.cos(lon) * dx + np.cos(lat) * np.sin(lon) * dy + np.sin(lat) * dz
+	horizontal = np.hypot(east, north)
+	az = np.mod(np.degrees(np.arctan2(east, north)), 360.0)
+	el = np.degrees(np.arctan2(up, horizontal))
+	return az, el, np.sqrt(horizontal ** 2 + up ** 2)
+
+'''
+Returns the ECEF positions of equatorial positions of shape (..., 3) given in a frame
+rotating with the sidereal time theta in radians (e.g. TEME with the GMST).
+'''
+def earth_fixed(position, theta):
+	cos_t, sin_t = np.cos(theta), np.sin(theta)
+	x = cos_t * position[..., 0] + sin_t * position[..., 1]
+	y = -sin_t * position[..., 0] + cos_t * position[..., 1]
+	return np.stack([x, y, np.broadcast_to(position[..., 2], x.shape)], axis=-1)
+
+'''
+Returns the azimuth, elevation and range (see topocentric()) of TEME positions in km of
+shape (..., 3) at the time.time() values times (broadcast against the leading dimensions).
+Polar motion and the difference between UT1 and UTC are neglected.
+'''
+def look_angles(teme, times, station):
+	return topocentric(earth_fixed(teme, gmst(times)), station)
+
+class Satellites:
+
+	chunk = 4096  # Time steps propagated at once, to bound the size of the temporaries
+
+	'''
+	sets is a list of (name, line1, line2) element sets, e.g. from read_tle(). All the
+	SGP4 initialization is done once here, as arrays over the satellites.
+	'''
+	def __init__(self, sets):
+		self.names = [name for name, _, _ in sets]
+		self.epoch = np.array([tle_epoch(line1) for _, line1, _ in sets], dtype=float)
+		self.bstar = np.array([parse_exp(line1[53:61]) for _, line1, _ in sets], dtype=float)
+		self.inclo = np.radians([float(line2[8:16]) for _, _, line2 in sets])
+		self.nodeo = np.radians([float(line2[17:25]) for _, _, line2 in sets])
+		self.ecco = np.array([float("0." + line2[26:33].strip()) for _, _, line2 in sets], dtype=float)
+		self.argpo = np.radians([float(line2[34:42]) for _, _, line2 in sets])
+		self.mo = np.radians([float(line2[43:51]) for _, _, line2 in sets])
+		no_kozai = np.array([float(line2[52:63]) for _, _, line2 in sets], dtype=float) * TWOPI / 1440.0
+		self.initialize(no_kozai)
+
+	@classmethod
+	def from_file(cls, path):
+		return cls(read_tle(path))
+
+	def __len__(self):
+		return len(self.names)
+
+	'''
+	Returns the Satellites of the given indices (which may repeat) without parsing or
+	initializing them again.
+	'''
+	def subset(self, indices):
+		indices = np.asarray(indices, dtype=int)
+		subset = Satellites.__new__(Satellites)
+		for key, value in self.__dict__.items():
+			setattr(subset, key, value[indices] if isinstance(value, np.ndarray) else value)
+		subset.names = [self.names[i] for i in indices]
+		return subset
+
+	def initialize(self, no_kozai):
+		ecco, inclo, argpo, bstar = self.ecco, self.inclo, self.argpo, self.bstar
+		# Recover the original mean motion and semi-major axis from the Kozai mean motion
+		eccsq = ecco * ecco
+		omeosq = 1.0 - eccsq
+		rteosq = np.sqrt(omeosq)
+		cosio = np.cos(inclo)
+		cosio2 = cosio * cosio
+		ak = (XKE / no_kozai) ** X2O3
+		d1 = 0.75 * J2 * (3.0 * cosio2 - 1.0) / (rteosq * omeosq)
+		delta = d1 / (ak * ak)
+		adel = ak * (1.0 - delta * delta - delta * (1.0 / 3.0 + 134.0 * delta * delta / 81.0))
+		delta = d1 / (adel * adel)
+		no = no_kozai / (1.0 + delta)
+		ao = (XKE / no) ** X2O3
+		sinio = np.sin(inclo)
+		po = ao * omeosq
+		con42 = 1.0 - 5.0 * cosio2
+		con41 = -con42 - cosio2 - cosio2
+		posq = po * po
+		rp = ao * (1.0 - ecco)
+		self.no = no
+		self.con41 = con41
+		self.x1mth2 = 1.0 - cosio2
+		self.x7thm1 = 7.0 * cosio2 - 1.0
+		self.deep = TWOPI / no >= 225.0
+		if np.any(self.deep):
+			names = [name for name, deep in zip(self.names, self.deep) if deep]
+			print(f"Error: Deep-space orbits are not supported, no positions for {', '.join(names)}.")
+		self.isimp = rp < 220.0 / RE + 1.0
+
+		# Atmospheric density parameters, lowered for low perigees
+		perige = (rp - 1.0) * RE
+		sfour = np.where(perige < 156.0, np.where(perige < 98.0, 20.0, perige - 78.0), 78.0)
+		qzms24 = ((120.0 - sfour) / RE) ** 4
+		sfour = sfour / RE + 1.0
+		pinvsq = 1.0 / posq
+		tsi = 1.0 / (ao - sfour)
+		eta = ao * ecco * tsi
+		etasq = eta * eta
+		eeta = ecco * eta
+		psisq = np.abs(1.0 - etasq)
+		coef = qzms24 * tsi ** 4
+		coef1 = coef / psisq ** 3.5
+		cc2 = coef1 * no * (ao * (1.0 + 1.5 * etasq + eeta * (4.0 + etasq)) + 0.375 * J2 * tsi / psisq * con41 * (8.0 + 3.0 * etasq * (8.0 + etasq)))
+		cc1 = bstar * cc2
+		eccentric = ecco > 1.0e-4
+		cc3 = np.where(eccentric, -2.0 * coef * tsi * J3OJ2 * no * sinio / np.where(eccentric, ecco, 1.0), 0.0)
+		cc4 = 2.0 * no * coef1 * ao * omeosq * (eta * (2.0 + 0.5 * etasq) + ecco * (0.5 + 2.0 * etasq) - J2 * tsi / (ao * psisq) * (-3.0 * con41 * (1.0 - 2.0 * eeta + etasq * (1.5 - 0.5 * eeta)) + 0.75 * self.x1mth2 * (2.0 * etasq - eeta * (1.0 + etasq)) * np.cos(2.0 * argpo)))
+		cc5 = 2.0 * coef1 * ao * omeosq * (1.0 + 2.75 * (etasq + eeta) + eeta * etasq)
+
+		# Secular rates of the mean anomaly, argument of perigee and node
+		cosio4 = cosio2 * cosio2
+		temp1 = 1.5 * J2 * pinvsq * no
+		temp2 = 0.5 * temp1 * J2 * pinvsq
+		temp3 = -0.46875 * J4 * pinvsq * pinvsq * no
+		self.mdot = no + 0.5 * temp1 * rteosq * con41 + 0.0625 * temp2 * rteosq * (13.0 - 78.0 * cosio2 + 137.0 * cosio4)
+		self.argpdot = -0.5 * temp1 * con42 + 0.0625 * temp2 * (7.0 - 114.0 * cosio2 + 395.0 * cosio4) + temp3 * (3.0 - 36.0 * cosio2 + 49.0 * cosio4)
+		xhdot1 = -temp1 * cosio
+		self.nodedot = xhdot1 + (0.5 * temp2 * (4.0 - 19.0 * cosio2) + 2.0 * temp3 * (3.0 - 7.0 * cosio2)) * cosio
+		self.omgcof = bstar * cc3 * np.cos(argpo)
+		self.xmcof = np.where(eccentric, -X2O3 * coef * bstar / np.where(eccentric, eeta, 1.0), 0.0)
+		self.nodecf = 3.5 * omeosq * xhdot1 * cc1
+		self.t2cof = 1.5 * cc1
+		denominator = np.where(np.abs(cosio + 1.0) > 1.5e-12, 1.0 + cosio, 1.5e-12)
+		self.xlcof = -0.25 * J3OJ2 * sinio * (3.0 + 5.0 * cosio) / denominator
+		self.aycof = -0.5 * J3OJ2 * sinio
+		self.delmo = (1.0 + eta * np.cos(self.mo)) ** 3
+		self.sinmao = np.sin(self.mo)
+		self.eta = eta
+		self.cc1 = cc1
+		self.cc4 = cc4
+		self.cc5 = cc5
+
+		# Higher order drag terms, not used for perigees below 220 km
+		cc1sq = cc1 * cc1
+		d2 = 4.0 * ao * tsi * cc1sq
+		temp = d2 * tsi * cc1 / 3.0
+		d3 = (17.0 * ao + sfour) * temp
+		d4 = 0.5 * temp * ao * tsi * (221.0 * ao + 31.0 * sfour) * cc1
+		full = ~self.isimp
+		self.d2 = np.where(full, d2, 0.0)
+		self.d3 = np.where(full, d3, 0.0)
+		self.d4 = np.where(full, d4, 0.0)
+		self.t3cof = np.where(full, d2 + 2.0 * cc1sq, 0.0)
+		self.t4cof = np.where(full, 0.25 * (3.0 * d3 + cc1 * (12.0 * d2 + 10.0 * cc1sq)), 0.0)
+		self.t5cof = np.where(full, 0.2 * (3.0 * d4 + 12.0 * cc1 * d3 + 6.0 * d2 * d2 + 15.0 * cc1sq * (2.0 * d2 + cc1sq)), 0.0)
+
+	'''
+	Returns the TEME positions in km, of shape (satellites, times, 3), of all the satellites
+	at the time.time() values times, either common to all the satellites (one dimension)
+	or one row per satellite (two dimensions). Positions that cannot be computed
+	(deep-space orbits, decayed satellites) are NaN.
+	'''
+	def propagate(self, times):
+		times = np.atleast_1d(np.asarray(times, dtype=float))
+		if times.ndim == 1:
+			times = times[None, :]
+		result = np.empty((len(self), times.shape[1], 3))
+		for start in range(0, times.shape[1], self.chunk):
+			stop = start + self.chunk
+			result[:, start:stop] = self.propagate_chunk(times[:, start:stop])
+		return result
+
+	def propagate_chunk(self, times):
+		column = lambda a: a[:, None]
+		t = (times - column(self.epoch)) / 60.0  # Minutes since epoch
+		no, ecco, inclo = column(self.no), column(self.ecco), column(self.inclo)
+		bstar, eta = column(self.bstar), column(self.eta)
+
+		# Secular gravity and atmospheric drag
+		xmdf = column(self.mo) + column(self.mdot) * t
+		argpdf = column(self.argpo) + column(self.argpdot) * t
+		nodedf = column(self.nodeo) + column(self.nodedot) * t
+		t2 = t * t
+		t3 = t2 * t
+		t4 = t3 * t
+		nodem = nodedf + column(self.nodecf) * t2
+		full = column(~self.isimp)
+		delomg = column(self.omgcof) * t
+		delm = column(self.xmcof) * ((1.0 + eta * np.cos(xmdf)) ** 3 - column(self.delmo))
+		correction = np.where(full, delomg + delm, 0.0)
+		mm = xmdf + correction
+		argpm = argpdf - correction
+		tempa = 1.0 - column(self.cc1) * t - column(self.d2) * t2 - column(self.d3) * t3 - column(self.d4) * t4
+		tempe = bstar * column(self.cc4) * t + np.where(full, bstar * column(self.cc5) * (np.sin(mm) - column(self.sinmao)), 0.0)
+		templ = column(self.t2cof) * t2 + column(self.t3cof) * t3 + t4 * (column(self.t4cof) + t * column(self.t5cof))
+		am = (XKE / no) ** X2O3 * tempa * tempa
+		em = ecco - tempe
+		invalid = (em >= 1.0) | (em < -0.001) | (am < 0.95) | column(self.deep)
+		em = np.clip(em, 1.0e-6, 1.0 - 1.0e-6)
+		mm = mm + no * templ
+		xlm = mm + argpm + nodem
+		nodem = np.fmod(nodem, TWOPI)
+		argpm = np.fmod(argpm, TWOPI)
+		xlm = np.fmod(xlm, TWOPI)
+		mm = np.fmod(xlm - argpm - nodem, TWOPI)
+
+		# Long period periodics
+		axnl = em * np.cos(argpm)
+		temp = 1.0 / (am * (1.0 - em * em))
+		aynl = em * np.sin(argpm) + temp * column(self.aycof)
+		xl = mm + argpm + nodem + temp * column(self.xlcof) * axnl
+
+		# Kepler's equation, with the steps limited to 0.95 radians
+		u = np.fmod(xl - nodem, TWOPI)
+		eo1 = u.copy()
+		for _ in range(10):
+			sineo1 = np.sin(eo1)
+			coseo1 = np.cos(eo1)
+			step = (u - aynl * coseo1 + axnl * sineo1 - eo1) / (1.0 - coseo1 * axnl - sineo1 * aynl)
+			step = np.clip(step, -0.95, 0.95)
+			eo1 = eo1 + step
+			if np.all(np.abs(step) < 1.0e-12):
+				break
+		sineo1 = np.sin(eo1)
+		coseo1 = np.cos(eo1)
+
+		# Short period periodics
+		ecose = axnl * coseo1 + aynl * sineo1
+		esine = axnl * sineo1 - aynl * coseo1
+		el2 = axnl * axnl + aynl * aynl
+		pl = am * (1.0 - el2)
+		invalid |= pl < 0.0
+		pl = np.where(pl > 0.0, pl, 1.0)
+		rl = am * (1.0 - ecose)
+		betal = np.sqrt(1.0 - el2)
+		temp = esine / (1.0 + betal)
+		sinu = am / rl * (sineo1 - aynl - axnl * temp)
+		cosu = am / rl * (coseo1 - axnl + aynl * temp)
+		su = np.arctan2(sinu, cosu)
+		sin2u = (cosu + cosu) * sinu
+		cos2u = 1.0 - 2.0 * sinu * sinu
+		temp = 1.0 / pl
+		temp1 = 0.5 * J2 * temp
+		temp2 = temp1 * temp
+		cosip, sinip = np.cos(inclo), np.sin(inclo)
+		mrt = rl * (1.0 - 1.5 * temp2 * betal * column(self.con41)) + 0.5 * temp1 * column(self.x1mth2) * cos2u
+		su = su - 0.25 * temp2 * column(self.x7thm1) * sin2u
+		xnode = nodem + 1.5 * temp2 * cosip * sin2u
+		xinc = inclo + 1.5 * temp2 * cosip * sinip * cos2u
+		invalid |= mrt < 1.0
+
+		# Orientation vectors
+		sinsu, cossu = np.sin(su), np.cos(su)
+		snod, cnod = np.sin(xnode), np.cos(xnode)
+		sini, cosi = np.sin(xinc), np.cos(xinc)
+		xmx = -snod * cosi
+		xmy = cnod * cosi
+		position = np.stack([xmx * sinsu + cnod * cossu, xmy * sinsu + snod * cossu, sini * sinsu], axis=-1) * (mrt * RE)[..., None]
+		position[invalid] = np.nan
+		return position
+
+	'''
+	Returns the (az, el, range) arrays of shape (satellites, times) of all the satellites as
+	seen from a station at the time.time() values times (see propagate()).
+	'''
+	def look(self, station, times):
+		times = np.atleast_1d(np.asarray(times, dtype=float))
+		return look_angles(self.propagate(times), times if times.ndim == 2 else times[None, :], station)
+
+	'''
+	Lists the passes of all the satellites over a station between the time.time() values
+	start and stop, sampled every step seconds. The rise and set times are refined to
+	within tolerance seconds by a bisection run on all the crossings at once. Returns the
+	passes sorted by their AOS.
+	'''
+	def passes(self, station, start, stop, step=30.0, min_el=0.0, tolerance=1.0):
+		times = np.arange(start, stop + step, step)
+		el = np.nan_to_num(self.look(station, times)[1], nan=-90.0)
+		visible = el >= min_el
+		# Pad with invisible samples so that every pass has a rise and a set edge
+		edges = np.diff(np.pad(visible, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+		rise_sat, rise = np.nonzero(edges == 1)
+		set_sat, set_ = np.nonzero(edges == -1)
+		# Bracket each crossing between the samples below and above min_el
+		clip = lambda i: np.clip(i, 0, len(times) - 1)
+		below = np.concatenate([times[clip(rise - 1)], times[clip(set_)]])
+		above = np.concatenate([times[rise], times[set_ - 1]])
+		exact = np.concatenate([rise == 0, set_ == len(times)])
+		crossings = self.crossings(np.concatenate([rise_sat, set_sat]), station, below, above, min_el, tolerance)
+		crossings[exact] = above[exact]
+		aos, los = crossings[:len(rise)], crossings[len(rise):]
+		result = []
+		for index, first, last, rise_time, set_time in zip(rise_sat, rise, set_, aos, los):
+			peak = first + int(np.argmax(el[index, first:last]))
+			result.append(Pass(int(index), self.names[index], float(rise_time), float(times[peak]), float(set_time), float(el[index, peak])))
+		result.sort(key=lambda p: p.aos)
+		return result
+
+	'''
+	Returns the times at which the satellites of the given indices cross min_el, each
+	bracketed between the time.time() values below (under min_el) and above (over it), to
+	within tolerance seconds.
+	'''
+	def crossings(self, indices, station, below, above, min_el, tolerance=1.0):
+		below = np.array(below, dtype=float)
+		above = np.array(above, dtype=float)
+		if len(indices) == 0:
+			return above
+		subset = self.subset(indices)
+		while np.max(np.abs(above - below)) > tolerance:
+			middle = (below + above) / 2.0
+			up = subset.look(station, middle[:, None])[1][:, 0] >= min_el
+			above = np.where(up, middle, above)
+			below = np.where(up, below, middle)
+		return above
+
+	'''
+	Returns the (times, az, el) arrays of a satellite over a station from start to stop
+	every step seconds, e.g. the aos and los of a Pass, ready for Tracker.run(). Only that
+	satellite is propagated.
+	'''
+	def track(self, index, station, start, stop, step=1.0):
+		times = np.arange(start, stop + step / 2.0, step)
+		az, el, _ = self.subset([index]).look(station, times)
+		return times, az[0], el[0]
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="rot2proG pass predictions from TLE files")
+	parser.add_argument("tle", nargs="+", help="TLE files")
+	parser.add_argument("--lat", type=float, required=True, help="station latitude in degrees")
+	parser.add_argument("--lon", type=float, required=True, help="station longitude in degrees, east positive")
+	parser.add_argument("--alt", type=float, default=0.0, help="station altitude in meters")
+	parser.add_argument("--hours", type=float, default=24.0, help="prediction window from now")
+	parser.add_argument("--min-el", type=float, default=0.0, help="minimum elevation of a pass in degrees")
+	args = parser.parse_args(argv)
+
+	sets = []
+	for path in args.tle:
+		sets.extend(read_tle(path))
+	satellites = Satellites(sets)
+	station = Station(args.lat, args.lon, args.alt)
+	start = time.time()
+	passes = satellites.passes(station, start, start + args.hours * 3600.0, min_el=args.min_el)
+	print(f"{len(passes)} passes of {len(satellites)} satellites in {time.time() - start:.1f} s")
+	for p in passes:
+		aos = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(p.aos))
+		los = time.strftime("%H:%M:%S", time.gmtime(p.los))
+		print(f"{aos} - {los} UTC  max elevation {p.max_el:5.1f}  {p.name}")
+
+if __name__ == "__main__":
+	main()
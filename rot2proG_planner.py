@@ -0,0 +1,199 @@
+'''
+File: 	rot2proG_planner.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Trajectory planning for the 720 degree azimuth range (-180 to 540) of the MD-01. An
+	azimuth can be reached on up to two branches 360 degrees apart; the planner unwraps a
+	whole pass and picks the branch that keeps the pass within the limits from start to
+	end with the shortest slew from the current position, so a pass crossing north never
+	forces a full-circle unwind in the middle of the contact. High elevation passes, whose
+	azimuth rate near zenith exceeds what the rotor can follow, are tracked over the top:
+	the azimuth is held on the vertical plane of the pass and the elevation runs through
+	the 90 to 180 degree half of its range, at the cost of a pointing error bounded by how
+	far the pass misses zenith. Everything operates on NumPy arrays covering the whole pass.
+'''
+
+import numpy as np
+
+MIN_AZ = -180.0
+MAX_AZ = 540.0
+MIN_EL = -21.0
+MAX_EL = 180.0
+AZ_RATE = 6.0  # Slew rates of the axes in degrees per second
+EL_RATE = 6.0
+MAX_ERROR = 3.0  # Pointing error in degrees accepted to track a keyhole pass over the top
+
+'''
+Returns the azimuths of a track made continuous, i.e. without the 360 degree jumps of a
+track crossing north, starting on the branch of the first point.
+'''
+def unwrap_azimuth(az):
+	return np.unwrap(np.asarray(az, dtype=float), period=360.0)
+
+'''
+Returns the branches (multiples of 360 degrees) by which a continuous azimuth track can be
+shifted while staying within [min_az, max_az] over its whole length, as an array of
+offsets in degrees.
+'''
+def branches(az, min_az=MIN_AZ, max_az=MAX_AZ):
+	lo = np.ceil((min_az - np.min(az)) / 360.0)
+	hi = np.floor((max_az - np.max(az)) / 360.0)
+	return np.arange(lo, hi + 1) * 360.0
+
+'''
+Plans the azimuth of a pass. az is the track in any representation (e.g. 0-360 from a
+propagator) and current_az the azimuth of the rotor in controller coordinates. Returns
+(planned, slew) where planned is the continuous track on the branch that fits within the
+limits with the shortest slew from current_az and slew the azimuth distance in degrees
+of that slew. Among branches with the same slew the one farthest from the limits is
+preferred. Raises a ValueError if the pass spans more than the azimuth range.
+'''
+def plan_azimuth(az, current_az, min_az=MIN_AZ, max_az=MAX_AZ):
+	unwrapped = unwrap_azimuth(az)
+	if unwrapped.size == 0:
+		return unwrapped, 0.0
+	offsets = branches(unwrapped, min_az, max_az)
+	if offsets.size == 0:
+		raise ValueError(f"Pass spans {np.ptp(unwrapped):.1f} degrees of azimuth, more than the {max_az - min_az:.0f} degree range")
+	slews = np.abs(unwrapped[0] + offsets - current_az)
+	margins = np.minimum(np.min(unwrapped) + offsets - min_az, max_az - np.max(unwrapped) - offsets)
+	# Shortest slew first, then largest margin to the limits
+	best = np.lexsort((-margins, np.round(slews, 6)))[0]
+	return unwrapped + offsets[best], float(slews[best])
+
+'''
+Returns the representation of a single azimuth within [min_az, max_az] closest to the
+previous commanded azimuth, for tracks that arrive point by point and cannot be planned
+as a whole.
+'''
+def nearest_branch(az, previous, min_az=MIN_AZ, max_az=MAX_AZ):
+	candidates = float(az) + 360.0 * np.arange(-2, 3)
+	candidates = candidates[(candidates >= min_az) & (candidates <= max_az)]
+	if candidates.size == 0:
+		return float(az)
+	return float(candidates[np.argmin(np.abs(candidates - previous))])
+
+'''
+Time in seconds to slew between two positions, both axes moving at the same time.
+'''
+def slew_time(az0, el0, az1, el1, az_rate=AZ_RATE, el_rate=EL_RATE):
+	return max(abs(az1 - az0) / az_rate, abs(el1 - el0) / el_rate)
+
+'''
+Returns the flip representation of a track: the same pointing reached over the top, with
+the azimuth turned by 180 degrees and the elevation mirrored to 180 - el.
+'''
+def flip(az, el):
+	return np.asarray(az, dtype=float) + 180.0, 180.0 - np.asarray(el, dtype=float)
+
+'''
+Returns the absolute (azimuth, elevation) rates in degrees per second between consecutive
+points of a track. The azimuth steps are taken modulo 360 into [-180, 180), so that
+crossing north does not count as a full turn.
+'''
+def step_rates(t, az, el):
+	dt = np.diff(np.asarray(t, dtype=float), axis=0)
+	dt[dt <= 0] = np.nan
+	az_step = np.diff(np.asarray(az, dtype=float), axis=0)
+	az_step = (az_step + 180.0) % 360.0 - 180.0
+	return np.abs(az_step) / dt, np.abs(np.diff(np.asarray(el, dtype=float), axis=0)) / dt
+
+'''
+Returns the peak (azimuth, elevation) rates in degrees per second of a track.
+'''
+def peak_rates(t, az, el):
+	az_rate, el_rate = step_rates(t, az, el)
+	return float(np.nanmax(az_rate, initial=0.0)), float(np.nanmax(el_rate, initial=0.0))
+
+'''
+Returns the peak rate of a track as a fraction of what the rotor can do, the larger of the
+two axes. Above 1 the rotor falls behind.
+'''
+def peak_load(t, az, el, az_rate=AZ_RATE, el_rate=EL_RATE):
+	peak_az, peak_el = peak_rates(t, az, el)
+	return max(peak_az / az_rate, peak_el / el_rate)
+
+'''
+Returns whether a pass goes through the keyhole, i.e. its azimuth rate near zenith exceeds
+az_rate. Tracks time-tagged at exactly az_rate measure slightly above it from rounding,
+hence the relative tolerance.
+'''
+def keyhole(t, az, el, az_rate=AZ_RATE):
+	return peak_rates(t, az, el)[0] > az_rate * (1.0 + 1e-9)
+
+'''
+Returns the (east, north, up) unit vectors of directions given in degrees, stacked on the
+last axis.
+'''
+def unit_vectors(az, el):
+	a = np.radians(np.asarray(az, dtype=float))
+	e = np.radians(np.asarray(el, dtype=float))
+	return np.stack([np.cos(e) * np.sin(a), np.cos(e) * np.cos(a), np.sin(e)], axis=-1)
+
+'''
+Returns the angle in degrees between two directions given as azimuth and elevation.
+'''
+def pointing_error(az0, el0, az1, el1):
+	cosine = np.sum(unit_vectors(az0, el0) * unit_vectors(az1, el1), axis=-1)
+	return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+'''
+Plans a keyhole pass over the top. No representation of the exact pointing avoids the
+azimuth swing near zenith unless a point lands on zenith exactly, so the part of the pass
+within max_error degrees of the vertical plane through its culmination is projected onto
+that plane instead: the azimuth is held at the side the pass rises on and the elevation
+runs from 0 through 90 to 180 along the plane. The pointing error there is the distance
+to the plane, at most 90 degrees minus the peak elevation at culmination. Before that
+part the pass is tracked exactly, after it in the flip representation (az + 180,
+180 - el), both of which keep the azimuth near that of the plane; elevations beyond
+[min_el, max_el] (e.g. a point just below the horizon at LOS) are clipped. Returns
+(az, el, error) with error the largest pointing error in degrees, or None if the pass
+misses zenith by more than max_error.
+'''
+def plan_over_the_top(az, el, max_error=MAX_ERROR, min_el=MIN_EL, max_el=MAX_EL):
+	az = np.asarray(az, dtype=float)
+	el = np.asarray(el, dtype=float)
+	top = int(np.argmax(el))
+	u = unit_vectors(az, el)
+	# Vertical plane closest to the track: its horizontal normal is the direction along
+	# which the horizontal components of the track spread the least
+	horizontal = u[:, :2]
+	normal = np.append(np.linalg.eigh(horizontal.T @ horizontal)[1][:, 0], 0.0)
+	error = np.degrees(np.arcsin(np.clip(np.abs(u @ normal), 0.0, 1.0)))
+	if error[top] > max_error:
+		return None
+	# Horizontal direction of the plane on the side the pass rises on, so that it runs away from it
+	side = np.array([normal[1], -normal[0], 0.0])
+	if u[0] @ side < u[-1] @ side:
+		side = -side
+	plane_az = float(np.degrees(np.arctan2(side[0], side[1])))
+	plane_el = np.degrees(np.arctan2(u[:, 2], u @ side))
+	plane_el[plane_el < -90.0] += 360.0  # Just below the horizon on the setting side
+	# Contiguous part around the culmination within max_error of the plane
+	outside = error > max_error
+	first = top - int(np.argmax(outside[top::-1])) + 1 if outside[:top].any() else 0
+	last = top + int(np.argmax(outside[top:])) if outside[top:].any() else az.size
+	planned_az = az.copy()
+	planned_el = el.copy()
+	planned_az[first:last] = plane_az
+	planned_el[first:last] = plane_el[first:last]
+	planned_az[last:], planned_el[last:] = flip(az[last:], el[last:])
+	planned_el = np.clip(planned_el, min_el, max_el)
+	return planned_az, planned_el, float(np.max(pointing_error(az, el, planned_az, planned_el)))
+
+'''
+Plans a whole pass given as arrays of times, azimuths and elevations (e.g. 0-360 and 0-90
+from a propagator). With allow_flip keyhole passes are tracked over the top by
+plan_over_the_top, within max_error degrees of pointing error, when that lowers their peak
+load. Returns (az, el, flipped) with the azimuth unwrapped on the branch chosen by
+plan_azimuth. Raises a ValueError if the pass does not fit the azimuth range.
+'''
+def plan_pass(t, az, el, current_az, min_az=MIN_AZ, max_az=MAX_AZ, min_el=MIN_EL, max_el=MAX_EL, az_rate=AZ_RATE, el_rate=EL_RATE, allow_flip=True, max_error=MAX_ERROR):
+	az = np.asarray(az, dtype=float)
+	el = np.asarray(el, dtype=float)
+	flipped = False
+	if allow_flip and el.size and keyhole(t, az, el, az_rate):
+		over = plan_over_the_top(az, el, max_error, min_el, max_el)
+		if over is not None and peak_load(t, over[0], over[1], az_rate, el_rate) < peak_load(t, az, el, az_rate, el_rate):
+			az, el, _ = over
+			flipped = True
+	return plan_azimuth(az, current_az, min_az, max_az)[0], el, flipped
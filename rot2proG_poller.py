@@ -0,0 +1,458 @@
+'''
+File: 	rot2proG_poller.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Background status poller for the rot2proG antenna rotor controller. A Poller thread
+	owns the link to one controller, sends one STATUS command per tick and fans the reading
+	out to any number of subscribers: callbacks, thread-safe queues and asyncio queues.
+	Queues are bounded and drop their oldest record when a consumer falls behind, so a
+	slow consumer never delays the polling or the other consumers. move_to() and
+	move_and_settle() return futures that resolve when the readings show the rotor at its
+	target or settled.
+'''
+
+import asyncio
+import collections
+import concurrent.futures
+import threading
+import time
+from rot2proG_schedule import resolution
+from rot2proG_settle import SettlingDetector
+
+'''
+One reading of the controller. az and el are in degrees, pulse the pulses per degree,
+timestamp the time.time() and monotonic the time.monotonic() at which the reply was
+received, and seq the number of the poll (consecutive readings have consecutive numbers
+unless polls failed in between).
+'''
+Position = collections.namedtuple('Position', ['az', 'el', 'pulse', 'timestamp', 'monotonic', 'seq'])
+
+'''
+Calls fn(position) on the poller thread for every reading, and on_error(exception) for
+every failed poll if given. Callbacks must return quickly; use a queue to hand the
+readings to slower code.
+'''
+class CallbackSubscriber:
+
+	def __init__(self, fn, on_error=None):
+		self.fn = fn
+		self.on_error = on_error
+
+	def publish(self, position):
+		self.fn(position)
+
+	def error(self, exception):
+		if self.on_error is not None:
+			self.on_error(exception)
+
+'''
+Bounded thread-safe queue of readings. When it is full the oldest reading is dropped to
+make room for the new one, and counted in dropped.
+'''
+class QueueSubscriber:
+
+	def __init__(self, maxsize=16):
+		self.items = collections.deque(maxlen=maxsize)
+		self.ready = threading.Condition()
+		self.dropped = 0
+
+	def publish(self, position):
+		with self.ready:
+			if len(self.items) == self.items.maxlen:
+				self.dropped += 1
+			self.items.append(position)
+			self.ready.notify()
+
+	def error(self, exception):
+		pass
+
+	'''
+	Returns the oldest queued reading, waiting at most timeout seconds (None to wait
+	forever). Returns None if no reading arrived in time.
+	'''
+	def get(self, timeout=None):
+		with self.ready:
+			if not self.ready.wait_for(lambda: self.items, timeout):
+				return None
+			return self.items.popleft()
+
+	'''
+	Returns the newest queued reading and discards the older ones, or None if the queue
+	is empty.
+	'''
+	def get_latest(self):
+		with self.ready:
+			if not self.items:
+				return None
+			position = self.items.pop()
+			self.items.clear()
+			return position
+
+	def __len__(self):
+		return len(self.items)
+
+'''
+Bounded asyncio.Queue of readings bound to an event loop. Readings are handed over with
+loop.call_soon_threadsafe(); when the queue is full the oldest reading is dropped.
+'''
+class AsyncQueueSubscriber:
+
+	def __init__(self, loop, maxsize=16):
+		self.loop = loop
+		self.queue = asyncio.Queue(maxsize)
+		self.dropped = 0
+
+	def put(self, position):
+		if self.queue.full():
+			self.queue.get_nowait()
+			self.dropped += 1
+		self.queue.put_nowait(position)
+
+	def publish(self, position):
+		if not self.loop.is_closed():
+			self.loop.call_soon_threadsafe(self.put, position)
+
+	def error(self, exception):
+		pass
+
+	async def get(self):
+		return await self.queue.get()
+
+	def __aiter__(self):
+		return self
+
+	async def __anext__(self):
+		return await self.queue.get()
+
+'''
+Base of the subscribers that resolve a future from the readings of a poller. Readings up
+to seq (those polled before the command that started the wait) are ignored, and a
+TimeoutError is set if the future is not resolved within timeout seconds.
+'''
+class Waiter:
+
+	def __init__(self, poller, seq, timeout):
+		self.poller = poller
+		self.seq = seq
+		self.timeout = timeout
+		self.future = concurrent.futures.Future()
+		self.future.add_done_callback(self.finish)
+		self.timer = None
+
+	'''
+	Subscribes to the poller and starts the timeout.
+	'''
+	def start(self):
+		self.poller.add(self)
+		if self.timeout is not None and not self.future.done():
+			self.timer = threading.Timer(self.timeout, self.expire)
+			self.timer.daemon = True
+			self.timer.start()
+		return self.future
+
+	def publish(self, position):
+		if position.seq > self.seq:
+			self.check(position)
+
+	def check(self, position):
+		raise NotImplementedError
+
+	def error(self, exception):
+		pass
+
+	def resolve(self, result):
+		try:
+			self.future.set_result(result)
+		except concurrent.futures.InvalidStateError:
+			pass  # Already timed out or cancelled
+
+	def expire(self):
+		try:
+			self.future.set_exception(TimeoutError(f"{self.describe()} within {self.timeout} s (last reading: {self.poller.latest()})"))
+		except concurrent.futures.InvalidStateError:
+			pass
+
+	'''
+	Stops watching the readings once the future is done, whichever way.
+	'''
+	def finish(self, future):
+		self.poller.unsubscribe(self)
+		if self.timer is not None:
+			self.timer.cancel()
+
+'''
+Resolves with the first reading within tol degrees of a target on both axes, or within
+the resolution of the readings if that is coarser.
+'''
+class Arrival(Waiter):
+
+	def __init__(self, poller, az, el, tol, seq, timeout):
+		super().__init__(poller, seq, timeout)
+		self.target = (az, el)
+		self.tol = tol
+
+	def check(self, position):
+		tol = max(self.tol, resolution(position.pulse))
+		if abs(position.az - self.target[0]) <= tol and abs(position.el - self.target[1]) <= tol:
+			self.resolve(position)
+
+	def describe(self):
+		return f"Rotor did not reach azimuth {self.target[0]}, elevation {self.target[1]}"
+
+'''
+Resolves with the SettleResult of a rot2proG_settle.SettlingDetector.
+'''
+class Settling(Waiter):
+
+	def __init__(self, poller, detector, seq, timeout):
+		super().__init__(poller, seq, timeout)
+		self.detector = detector
+
+	def check(self, position):
+		result = self.detector.feed(position)
+		if result is not None:
+			self.resolve(result)
+
+	def describe(self):
+		return "Rotor did not settle"
+
+class Poller:
+
+	'''
+	rot is the controller to poll (e.g. a Rot2proG instance) and rate the number of
+	STATUS polls per second. schedule is an optional rot2proG_schedule.AdaptiveSchedule
+	that replaces the fixed rate. Once the poller is started it owns the link: other
+	commands must be sent through its set() and stop() so they do not interleave with the
+	polls.
+
+	The counters are:
+	polls: 		successful polls
+	errors: 	failed polls (the last exception is kept in last_error)
+	'''
+	def __init__(self, rot, rate=2.0, schedule=None):
+		self.rot = rot
+		self.interval = 1.0 / rate
+		self.schedule = schedule
+		self.lock = threading.Lock()  # Protects the subscriber list and the latest reading
+		self.io_lock = threading.Lock()  # Serializes the commands sent to the controller
+		self.subscribers = []
+		self.position = None
+		self.seq = 0
+		self.polls = 0
+		self.errors = 0
+		self.last_error = None
+		self.closing = threading.Event()
+		self.wakeup = threading.Event()  # Cuts the wait for the next poll short
+		self.thread = None
+
+	def start(self):
+		if self.thread is None:
+			self.closing.clear()
+			self.thread = threading.Thread(target=self.run, name="rot2proG-poller", daemon=True)
+			self.thread.start()
+		return self
+
+	def close(self):
+		self.closing.set()
+		self.wakeup.set()
+		if self.thread is not None:
+			self.thread.join()
+			self.thread = None
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *exc):
+		self.close()
+
+	'''
+	Polls every interval seconds on a fixed schedule, so the time spent in the STATUS
+	command does not add up to a drift. Ticks missed because a poll took longer than the
+	interval are skipped rather than sent back to back. With an adaptive schedule the
+	delay until the next poll is that returned by the schedule.
+	'''
+	def run(self):
+		next_poll = time.monotonic()
+		while not self.closing.is_set():
+			position = self.poll()
+			if self.schedule is None:
+				next_poll += self.interval
+			elif position is None:
+				next_poll = time.monotonic() + self.schedule.error()
+			else:
+				next_poll = time.monotonic() + self.schedule.update(position.az, position.el, position.pulse)
+			now = time.monotonic()
+			if next_poll < now:
+				next_poll = now
+			if self.wakeup.wait(next_poll - now):
+				self.wakeup.clear()
+				if self.schedule is not None:
+					# Woken up by a new target: poll now, within the budget of the bus
+					self.closing.wait(self.schedule.delay(0))
+
+	'''
+	Sends one STATUS command and publishes the reading. Returns the Position, or None if
+	the poll failed.
+	'''
+	def poll(self):
+		try:
+			with self.io_lock:
+				az, el, pulse = self.rot.status()
+				seq = self.next_seq()
+		except Exception as e:
+			self.errors += 1
+			self.last_error = e
+			for subscriber in self.snapshot():
+				try:
+					subscriber.error(e)
+				except Exception as error:
+					print(f"Error: rot2proG poller subscriber failed: {error!r}")
+			return None
+		self.polls += 1
+		return self.publish(az, el, pulse, seq)
+
+	'''
+	Returns the number of a new reading. Called in the io_lock section of the command that
+	read it, so that the readings taken before a SET are numbered before it.
+	'''
+	def next_seq(self):
+		with self.lock:
+			self.seq += 1
+			return self.seq
+
+	def publish(self, az, el, pulse, seq):
+		position = Position(az, el, pulse, time.time(), time.monotonic(), seq)
+		with self.lock:
+			if self.position is None or seq > self.position.seq:
+				self.position = position
+		for subscriber in self.snapshot():
+			try:
+				subscriber.publish(position)
+			except Exception as e:
+				print(f"Error: rot2proG poller subscriber failed: {e!r}")
+		return position
+
+	def snapshot(self):
+		with self.lock:
+			return list(self.subscribers)
+
+	'''
+	Returns the latest Position, or None before the first successful poll.
+	'''
+	def latest(self):
+		with self.lock:
+			return self.position
+
+	def add(self, subscriber):
+		with self.lock:
+			self.subscribers.append(subscriber)
+		return subscriber
+
+	def unsubscribe(self, subscriber):
+		with self.lock:
+			if subscriber in self.subscribers:
+				self.subscribers.remove(subscriber)
+
+	'''
+	Calls fn(position) on the poller thread for every reading (and on_error(exception) for
+	every failed poll). Returns the subscriber, to pass to unsubscribe().
+	'''
+	def subscribe(self, fn, on_error=None):
+		return self.add(CallbackSubscriber(fn, on_error))
+
+	'''
+	Returns a new QueueSubscriber holding up to maxsize readings.
+	'''
+	def queue(self, maxsize=16):
+		return self.add(QueueSubscriber(maxsize))
+
+	'''
+	Returns a new AsyncQueueSubscriber holding up to maxsize readings, bound to the given
+	event loop (the running loop by default).
+	'''
+	def async_queue(self, maxsize=16, loop=None):
+		if loop is None:
+			loop = asyncio.get_running_loop()
+		return self.add(AsyncQueueSubscriber(loop, maxsize))
+
+	'''
+	Sends a SET command to the controller between two polls. With an adaptive schedule
+	the rotor is then polled fast until it reaches the target.
+	'''
+	def set(self, azi, eli, *args, **kwargs):
+		return self.send_set(azi, eli, *args, **kwargs)[0]
+
+	'''
+	Sends a SET command like set() and returns (result, seq), seq being the number of the
+	last reading taken before the command, read in the same io_lock section.
+	'''
+	def send_set(self, azi, eli, *args, **kwargs):
+		with self.io_lock:
+			result = self.rot.set(azi, eli, *args, **kwargs)
+			with self.lock:
+				seq = self.seq
+		if self.schedule is not None:
+			self.schedule.set_target(azi, eli)
+			self.wakeup.set()
+		return result, seq
+
+	'''
+	Sends a SET command to (az, el) and returns a concurrent.futures.Future that resolves
+	with the first Position within tol degrees of the target (at least the resolution of
+	the readings), or fails with a TimeoutError after timeout seconds (None to wait
+	forever). Raises a ValueError if the target is outside the limits of the controller.
+	From asyncio code, await asyncio.wrap_future(poller.move_to(...)).
+	'''
+	def move_to(self, az, el, tol=0.0, timeout=None):
+		az, el = self.check_limits(az, el)
+		seq = self.send_set(az, el)[1]
+		return Arrival(self, az, el, tol, seq, timeout).start()
+
+	'''
+	Sends a SET command to (az, el) and returns a concurrent.futures.Future that resolves
+	with a rot2proG_settle.SettleResult once the readings show the rotor settled, or fails
+	with a TimeoutError after timeout seconds. The keyword arguments (stable_polls, tol,
+	max_velocity, stall_polls) are those of the SettlingDetector. Meant for step-and-stare
+	measurements, in place of a fixed dwell time after each SET.
+	'''
+	def move_and_settle(self, az, el, timeout=None, **kwargs):
+		az, el = self.check_limits(az, el)
+		start = time.monotonic()
+		seq = self.send_set(az, el)[1]
+		return Settling(self, SettlingDetector(start, (az, el), **kwargs), seq, timeout).start()
+
+	'''
+	Returns a concurrent.futures.Future that resolves with a rot2proG_settle.SettleResult
+	once the readings polled from now on show the rotor settled, wherever it stops.
+	'''
+	def wait_settled(self, timeout=None, **kwargs):
+		start = time.monotonic()
+		with self.lock:
+			seq = self.seq
+		return Settling(self, SettlingDetector(start, **kwargs), seq, timeout).start()
+
+	'''
+	Returns (az, el) as floats, raising a ValueError if they are outside the limits of the
+	controller.
+	'''
+	def check_limits(self, az, el):
+		az = float(az)
+		el = float(el)
+		if not (getattr(self.rot, "min_az", az) <= az <= getattr(self.rot, "max_az", az)):
+			raise ValueError(f"Azimuth value {az} out of limits. Must be between {self.rot.min_az} and {self.rot.max_az}.")
+		if not (getattr(self.rot, "min_el", el) <= el <= getattr(self.rot, "max_el", el)):
+			raise ValueError(f"Elevation value {el} out of limits. Must be between {self.rot.min_el} and {self.rot.max_el}.")
+		return az, el
+
+	'''
+	Sends a STOP command to the controller between two polls. The position where the
+	rotor stopped is published to the subscribers like a poll.
+	'''
+	def stop(self, *args, **kwargs):
+		with self.io_lock:
+			value = self.rot.stop(*args, **kwargs)
+			seq = self.next_seq()
+		if self.schedule is not None:
+			self.schedule.clear_target()
+		az, el, pulse = value
+		self.publish(az, el, pulse, seq)
+		return value
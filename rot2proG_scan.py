@@ -0,0 +1,144 @@
+'''
+File: 	rot2proG_scan.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Scan plans for antenna radiation pattern measurements. Raster, serpentine, spiral,
+	principal-plane and great-circle cut patterns are generated as NumPy arrays, clipped
+	to the limits of the positioner, and time-tagged from the slew rates of the axes and
+	a dwell time per point, which gives the estimated duration of the scan. A plan turns
+	into a track that rot2proG_tracking.Tracker streams as a whole (with planned=True),
+	with no Python loop over the points on the caller's side.
+'''
+
+import collections
+import time
+import numpy as np
+from rot2proG_planner import MIN_AZ, MAX_AZ, MIN_EL, MAX_EL, AZ_RATE, EL_RATE
+
+'''
+A scan plan: az and el in degrees of the points in scan order, times the estimated time
+in seconds from the start of the scan at which each point is reached, duration the
+estimated total duration (the last point included with its dwell) and clipped the number
+of points of the pattern dropped by the limits.
+'''
+ScanPlan = collections.namedtuple('ScanPlan', ['times', 'az', 'el', 'duration', 'clipped'])
+
+'''
+Returns the values from start to stop (both included when reached) every step degrees.
+'''
+def axis(start, stop, step):
+	step = abs(step) if stop >= start else -abs(step)
+	count = int(np.floor((stop - start) / step + 1e-9)) + 1
+	return start + step * np.arange(count)
+
+'''
+Time-tags a pattern and clips it to the limits. The time between two points is that of
+the slower axis at az_rate and el_rate degrees per second, plus dwell seconds at every
+point. With start, an (az, el) position, the slew to the first point is included.
+'''
+def make_plan(az, el, dwell=0.0, az_rate=AZ_RATE, el_rate=EL_RATE, start=None, min_az=MIN_AZ, max_az=MAX_AZ, min_el=MIN_EL, max_el=MAX_EL):
+	az = np.asarray(az, dtype=float).ravel()
+	el = np.asarray(el, dtype=float).ravel()
+	inside = (az >= min_az) & (az <= max_az) & (el >= min_el) & (el <= max_el)
+	clipped = int(np.count_nonzero(~inside))
+	az, el = az[inside], el[inside]
+	if az.size == 0:
+		return ScanPlan(az, az.copy(), el, 0.0, clipped)
+	from_az = np.concatenate([[az[0] if start is None else start[0]], az[:-1]])
+	from_el = np.concatenate([[el[0] if start is None else start[1]], el[:-1]])
+	moves = np.maximum(np.abs(az - from_az) / az_rate, np.abs(el - from_el) / el_rate)
+	# Each point is reached after its move and the dwell at the previous point
+	times = np.cumsum(moves + np.concatenate([[0.0], np.full(az.size - 1, dwell)]))
+	return ScanPlan(times, az, el, float(times[-1] + dwell), clipped)
+
+'''
+Raster scan: rows of constant elevation from el_start to el_stop every el_step degrees,
+each scanned from az_start to az_stop every az_step degrees, always in the same direction
+(the rotor flies back between rows).
+'''
+def raster(az_start, az_stop, az_step, el_start, el_stop, el_step, **kwargs):
+	az, el = np.meshgrid(axis(az_start, az_stop, az_step), axis(el_start, el_stop, el_step))
+	return make_plan(az, el, **kwargs)
+
+'''
+Serpentine scan: a raster whose rows alternate direction, so there is no fly back.
+'''
+def serpentine(az_start, az_stop, az_step, el_start, el_stop, el_step, **kwargs):
+	az, el = np.meshgrid(axis(az_start, az_stop, az_step), axis(el_start, el_stop, el_step))
+	az[1::2] = az[1::2, ::-1]
+	return make_plan(az, el, **kwargs)
+
+'''
+Returns the azimuth and elevation of points given as angular offsets x (horizontal) and y
+(vertical) in degrees from (az, el), the azimuth offsets widened by 1 / cos(el) so that
+the spacing of the points on the sky is preserved.
+'''
+def offsets(az, el, x, y):
+	return az + np.asarray(x) / max(np.cos(np.radians(el)), 1e-6), el + np.asarray(y)
+
+'''
+Archimedean spiral around (az, el) out to radius degrees, with step degrees between
+turns and between points along the spiral.
+'''
+def spiral(az, el, radius, step, **kwargs):
+	# The arc length of r = b theta is about b theta^2 / 2, sampled evenly every step
+	b = step / (2.0 * np.pi)
+	theta_max = radius / b
+	theta = np.sqrt(2.0 * axis(0.0, b * theta_max ** 2 / 2.0, step) / b)
+	r = b * theta
+	return make_plan(*offsets(az, el, r * np.cos(theta), r * np.sin(theta)), **kwargs)
+
+'''
+Principal-plane cuts through (az, el): a horizontal cut over +-span degrees of azimuth
+offset at constant elevation, followed by a vertical cut over +-span degrees of elevation
+at constant azimuth, every step degrees.
+'''
+def principal_planes(az, el, span, step, **kwargs):
+	cut = axis(-span, span, step)
+	horizontal = offsets(az, el, cut, np.zeros_like(cut))
+	vertical = offsets(az, el, np.zeros_like(cut), cut)
+	return make_plan(np.concatenate([horizontal[0], vertical[0]]), np.concatenate([horizontal[1], vertical[1]]), **kwargs)
+
+'''
+Great-circle cut through (az, el) over +-span degrees every step degrees. orientation is
+the angle of the cut in degrees from the horizontal, towards increasing elevation (0 is a
+horizontal great circle, 90 the vertical plane of az). Cuts through zenith use the
+elevation range beyond 90 degrees rather than turning the azimuth around.
+'''
+def great_circle(az, el, span, step, orientation=0.0, **kwargs):
+	a, e, o = np.radians(az), np.radians(el), np.radians(orientation)
+	# Unit vectors (east, north, up) of the center and of the cut direction at the center
+	center = np.array([np.cos(e) * np.sin(a), np.cos(e) * np.cos(a), np.sin(e)])
+	horizontal = np.array([np.cos(a), -np.sin(a), 0.0])
+	vertical = np.array([-np.sin(e) * np.sin(a), -np.sin(e) * np.cos(a), np.cos(e)])
+	direction = np.cos(o) * horizontal + np.sin(o) * vertical
+	angle = np.radians(axis(-span, span, step))[:, None]
+	points = np.cos(angle) * center + np.sin(angle) * direction
+	cut_az = np.degrees(np.arctan2(points[:, 0], points[:, 1]))
+	cut_el = np.degrees(np.arcsin(np.clip(points[:, 2], -1.0, 1.0)))
+	# The azimuth of a point at zenith is arbitrary; take that of the point before it
+	defined = np.hypot(points[:, 0], points[:, 1]) > 1e-9
+	if not defined[0]:
+		cut_az[0] = cut_az[np.argmax(defined)] if defined.any() else az
+		defined[0] = True
+	cut_az = cut_az[np.maximum.accumulate(np.where(defined, np.arange(cut_az.size), 0))]
+	# Past zenith the azimuth jumps by about 180 degrees; continue over the top instead,
+	# with the elevation beyond 90 degrees, toggling at every such jump
+	step_az = np.abs((np.diff(cut_az) + 180.0) % 360.0 - 180.0)
+	over = np.concatenate([[0], np.cumsum(step_az > 90.0)]) % 2 == 1
+	cut_az = np.where(over, cut_az + 180.0, cut_az)
+	cut_el = np.where(over, 180.0 - cut_el, cut_el)
+	# Keep the azimuth continuous around that of the center
+	cut_az = az + (cut_az - az + 180.0) % 360.0 - 180.0
+	return make_plan(cut_az, cut_el, **kwargs)
+
+'''
+Returns the (times, az, el) arrays of a plan starting at the time.time() value start (now
+by default). Plans are already in controller coordinates and their time tags assume the
+moves as generated (e.g. the fly back of a raster), so they must be streamed with
+Tracker.run(track, planned=True); unwrapping would shorten the fly backs and may find the
+plan wider than the azimuth range.
+'''
+def to_track(plan, start=None):
+	if start is None:
+		start = time.time()
+	return plan.times + start, plan.az, plan.el
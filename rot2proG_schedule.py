@@ -0,0 +1,166 @@
+'''
+File: 	rot2proG_schedule.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Adaptive STATUS poll scheduling for the rot2proG antenna rotor controller. The poll
+	rate goes up while the rotor is moving or a SET target has not been reached yet, and
+	backs off exponentially while consecutive readings are identical. A BusBudget caps the
+	total poll rate of all the consumers sharing one bus (GUI, command mode, pollers...).
+'''
+
+import bisect
+import threading
+import time
+
+'''
+Returns the smallest change in degrees a reading can show at the given pulses per degree.
+The replies carry a tenth of a degree at best.
+'''
+def resolution(pulse):
+	return max(1.0 / pulse, 0.1) if pulse else 0.1
+
+'''
+Poll budget of one bus, shared by all the schedules polling over it. Polls are spaced at
+least 1 / rate seconds apart in total, whichever consumer sends them.
+'''
+class BusBudget:
+
+	def __init__(self, rate=10.0):
+		self.interval = 1.0 / rate
+		self.lock = threading.Lock()
+		self.slots = []  # Sorted time.monotonic() of the reserved slots
+
+	'''
+	Reserves the first free slot at or after the time.monotonic() when, at least interval
+	seconds away from every other reserved slot, and returns the time of that slot. release
+	is a slot reserved earlier by the same consumer and not used, given back first (e.g.
+	the parked poll replaced by a fast one after a SET).
+	'''
+	def reserve(self, when, release=None):
+		with self.lock:
+			if release is not None and release in self.slots:
+				self.slots.remove(release)
+			# Slots more than one interval old no longer constrain anything
+			horizon = time.monotonic() - self.interval
+			self.slots = [t for t in self.slots if t > horizon]
+			slot = when
+			for t in self.slots:
+				if t + self.interval <= slot:
+					continue
+				if t >= slot + self.interval:
+					break
+				slot = t + self.interval
+			bisect.insort(self.slots, slot)
+			return slot
+
+class AdaptiveSchedule:
+
+	'''
+	interval is the poll interval in seconds of a parked rotor, fast_interval that while it
+	is moving or a target is pending, and max_interval the longest interval the back off
+	may reach. backoff is the factor the interval grows by for every identical reading.
+	tolerance is the distance in degrees within which readings are identical and a target
+	is reached (by default one pulse). A pending target is given up after stall_polls
+	identical readings, e.g. when the rotor was stopped from the front panel. The fast
+	rate is kept for linger_polls identical readings after the rotor stops, so that its
+	settling can be observed. budget is an optional BusBudget shared with the other
+	consumers of the bus.
+	'''
+	def __init__(self, interval=1.0, fast_interval=0.2, max_interval=8.0, backoff=2.0, tolerance=None, stall_polls=5, linger_polls=3, budget=None):
+		self.interval = interval
+		self.fast_interval = fast_interval
+		self.max_interval = max_interval
+		self.backoff = backoff
+		self.tolerance = tolerance
+		self.stall_polls = stall_polls
+		self.linger_polls = linger_polls
+		self.budget = budget
+		self.lock = threading.Lock()
+		self.current = interval  # Interval before the budget is applied
+		self.last = None  # Last (az, el) reading
+		self.target = None  # Pending (az, el) target
+		self.still = 0  # Number of consecutive identical readings
+		self.slot = None  # time.monotonic() of the slot reserved in the budget for the next poll
+
+	'''
+	Marks a SET target as pending, so the rotor is polled fast until it gets there.
+	'''
+	def set_target(self, az, el):
+		with self.lock:
+			self.target = (float(az), float(el))
+			self.still = 0
+			self.current = self.fast_interval
+
+	def clear_target(self):
+		with self.lock:
+			self.target = None
+
+	'''
+	Takes a new reading into account and returns the delay in seconds until the next poll.
+	'''
+	def update(self, az, el, pulse=None):
+		res = self.tolerance if self.tolerance is not None else resolution(pulse)
+		with self.lock:
+			changed = self.last is None or abs(az - self.last[0]) >= res / 2 or abs(el - self.last[1]) >= res / 2
+			self.last = (az, el)
+			self.still = 0 if changed else self.still + 1
+			if self.target is not None:
+				if abs(az - self.target[0]) <= res and abs(el - self.target[1]) <= res:
+					self.target = None
+				elif self.still >= self.stall_polls:
+					self.target = None
+			if changed or self.target is not None or self.still <= self.linger_polls:
+				self.current = self.fast_interval
+			elif self.current < self.interval:
+				self.current = self.interval
+			else:
+				self.current = min(self.current * self.backoff, self.max_interval)
+			current = self.current
+		return self.delay(current)
+
+	'''
+	Backs off after a failed poll and returns the delay in seconds until the next poll.
+	'''
+	def error(self):
+		with self.lock:
+			self.current = min(max(self.current, self.interval) * self.backoff, self.max_interval)
+			current = self.current
+		return self.delay(current)
+
+	'''
+	Returns the delay in seconds until a poll interval seconds from now, within the budget.
+	A slot reserved earlier that has not come yet is released, as the poll it was for is
+	replaced by this one.
+	'''
+	def delay(self, interval):
+		if self.budget is None:
+			return interval
+		now = time.monotonic()
+		with self.lock:
+			pending = self.slot if self.slot is not None and self.slot > now else None
+			self.slot = self.budget.reserve(now + interval, pending)
+			return self.slot - now
+
+'''
+Polls rot with an adaptive schedule and prints every new position until the rotor has not
+moved for idle_polls consecutive polls, or Ctrl+C is pressed. Used by the "watch" command
+of the command mode.
+'''
+def watch(rot, schedule=None, idle_polls=3):
+	if schedule is None:
+		schedule = AdaptiveSchedule(interval=0.5)
+	idle = 0
+	last = None
+	try:
+		while idle < idle_polls:
+			az, el, pulse = rot.status()
+			delay = schedule.update(az, el, pulse)
+			if (az, el) == last:
+				idle += 1
+			else:
+				idle = 0
+				print(f"Azimuth: {az:8.1f}  Elevation: {el:6.1f}")
+			last = (az, el)
+			time.sleep(delay)
+	except KeyboardInterrupt:
+		pass
+	print(" ")
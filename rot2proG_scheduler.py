@@ -0,0 +1,237 @@
+'''
+File: 	rot2proG_scheduler.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Pass scheduling across a fleet of MD-01 positioners. Given predicted contacts (e.g.
+	from rot2proG_orbit) with priorities and the available rotors, assigns each rotor a
+	sequence of contacts such that no two contacts of a rotor overlap, the rotor has time
+	to slew from the end of one contact to the start of the next, and the total priority
+	weighted contact time is maximal. The rotors of a station are scheduled together as a
+	min-cost flow over a time-ordered graph of the contacts, which is exact for any number
+	of rotors and stays close to linear in the number of contacts.
+'''
+
+import bisect
+import collections
+import heapq
+import numpy as np
+from rot2proG_planner import AZ_RATE, EL_RATE
+
+'''
+A contact to schedule: name of the satellite, station it is visible from (any hashable,
+None when all the rotors share one site), aos and los times (time.time() values), the
+azimuth/elevation at both ends in degrees and its priority. Its weight is the priority
+times its duration.
+'''
+Contact = collections.namedtuple('Contact', ['name', 'station', 'aos', 'los', 'start_az', 'start_el', 'end_az', 'end_el', 'priority'])
+
+'''
+A positioner of the fleet: name, station (matched against that of the contacts) and slew
+rates in degrees per second.
+'''
+Rotor = collections.namedtuple('Rotor', ['name', 'station', 'az_rate', 'el_rate'], defaults=(None, AZ_RATE, EL_RATE))
+
+'''
+A contact assigned to a rotor.
+'''
+Assignment = collections.namedtuple('Assignment', ['rotor', 'contact'])
+
+'''
+Returns the Contacts of rot2proG_orbit passes over a station, with the look angles at both
+ends computed at once for all the passes. priorities maps satellite names to priorities
+(default_priority for the others).
+'''
+def contacts(satellites, station, passes, station_name=None, priorities=None, default_priority=1.0):
+	if not passes:
+		return []
+	priorities = priorities or {}
+	indices = [p.satellite for p in passes]
+	times = np.array([[p.aos, p.los] for p in passes], dtype=float)
+	az, el, _ = satellites.subset(indices).look(station, times)
+	return [Contact(p.name, station_name, p.aos, p.los, float(az[i, 0]), float(el[i, 0]), float(az[i, 1]), float(el[i, 1]), priorities.get(p.name, default_priority)) for i, p in enumerate(passes)]
+
+def weight(contact):
+	return contact.priority * (contact.los - contact.aos)
+
+'''
+Time in seconds to slew from the end of contact a to the start of contact b, the azimuth
+taking the short way round.
+'''
+def slew_between(a, b, az_rate=AZ_RATE, el_rate=EL_RATE):
+	az = abs((b.start_az - a.end_az + 180.0) % 360.0 - 180.0)
+	return max(az / az_rate, abs(b.start_el - a.end_el) / el_rate)
+
+'''
+Min-cost flow by successive shortest paths, with Dijkstra on costs reduced by node
+potentials. Arcs are kept in flat lists; arc i ^ 1 is the reverse of arc i.
+'''
+class FlowGraph:
+
+	def __init__(self, nodes):
+		self.adjacent = [[] for _ in range(nodes)]
+		self.to = []
+		self.capacity = []
+		self.cost = []
+
+	def add(self, u, v, capacity, cost):
+		self.adjacent[u].append(len(self.to))
+		self.to.append(v)
+		self.capacity.append(capacity)
+		self.cost.append(cost)
+		self.adjacent[v].append(len(self.to))
+		self.to.append(u)
+		self.capacity.append(0)
+		self.cost.append(-cost)
+
+	'''
+	Sends up to limit units from source to sink as long as it lowers the total cost.
+	order is a topological order of the nodes, used to compute the initial potentials
+	since the costs may be negative. Returns the flow sent.
+	'''
+	def min_cost_flow(self, source, sink, limit, order):
+		inf = float("inf")
+		potential = [inf] * len(self.adjacent)
+		potential[source] = 0.0
+		for u in order:
+			if potential[u] == inf:
+				continue
+			for arc in self.adjacent[u]:
+				if self.capacity[arc] > 0 and potential[u] + self.cost[arc] < potential[self.to[arc]]:
+					potential[self.to[arc]] = potential[u] + self.cost[arc]
+		potential = [0.0 if p == inf else p for p in potential]
+		flow = 0
+		while flow < limit:
+			distance = [inf] * len(self.adjacent)
+			previous = [-1] * len(self.adjacent)
+			distance[source] = 0.0
+			heap = [(0.0, source)]
+			while heap:
+				d, u = heapq.heappop(heap)
+				if d > distance[u]:
+					continue
+				for arc in self.adjacent[u]:
+					if self.capacity[arc] <= 0:
+						continue
+					v = self.to[arc]
+					nd = d + self.cost[arc] + potential[u] - potential[v]
+					if nd < distance[v] - 1e-9:
+						distance[v] = nd
+						previous[v] = arc
+						heapq.heappush(heap, (nd, v))
+			if distance[sink] == inf:
+				break
+			# Nodes not reached keep reduced costs non-negative with the distance of the sink
+			for v in range(len(potential)):
+				potential[v] += min(distance[v], distance[sink])
+			# Real cost of the path; stop once another unit would not add contact time
+			if potential[sink] - potential[source] >= -1e-9:
+				break
+			amount = limit - flow
+			v = sink
+			while v != source:
+				arc = previous[v]
+				amount = min(amount, self.capacity[arc])
+				v = self.to[arc ^ 1]
+			v = sink
+			while v != source:
+				arc = previous[v]
+				self.capacity[arc] -= amount
+				self.capacity[arc ^ 1] += amount
+				v = self.to[arc ^ 1]
+			flow += amount
+		return flow
+
+'''
+Schedules contacts on count identical rotors. Returns a list of count lists of contacts,
+each in time order. margin is an extra time in seconds required between two contacts of a
+rotor on top of the slew time.
+'''
+def schedule_group(group, count, az_rate=AZ_RATE, el_rate=EL_RATE, margin=0.0):
+	group = sorted((c for c in group if c.los > c.aos), key=lambda c: c.aos)
+	n = len(group)
+	if n == 0 or count <= 0:
+		return [[] for _ in range(max(count, 0))]
+	# Any contact ending max_gap before the start of another leaves time for any slew
+	max_gap = max(180.0 / az_rate, 180.0 / el_rate) + margin
+	ready = [c.aos - max_gap for c in group]
+	times = sorted(set(ready) | set(c.los for c in group))
+	slot = {t: i for i, t in enumerate(times)}
+
+	# Nodes: source, sink, one per timeline instant, and an in/out pair per contact
+	source, sink = 0, 1
+	timeline = 2
+	entry = timeline + len(times)
+	leave = entry + n
+	graph = FlowGraph(leave + n)
+	graph.add(source, timeline, count, 0.0)
+	graph.add(timeline + len(times) - 1, sink, count, 0.0)
+	for i in range(len(times) - 1):
+		graph.add(timeline + i, timeline + i + 1, count, 0.0)
+	for j, c in enumerate(group):
+		graph.add(timeline + slot[ready[j]], entry + j, 1, 0.0)
+		graph.add(entry + j, leave + j, 1, -weight(c))
+		graph.add(leave + j, timeline + slot[c.los], 1, 0.0)
+
+	# Direct arcs for the pairs too close together for the timeline to connect them
+	by_los = sorted(range(n), key=lambda i: group[i].los)
+	los = [group[i].los for i in by_los]
+	for j, c in enumerate(group):
+		lo = bisect.bisect_right(los, ready[j])
+		hi = bisect.bisect_right(los, c.aos)
+		for i in by_los[lo:hi]:
+			if i != j and group[i].los + slew_between(group[i], c, az_rate, el_rate) + margin <= c.aos:
+				graph.add(leave + i, entry + j, 1, 0.0)
+
+	# Topological order: by time, contact ends before timeline instants before contact starts
+	keys = [(-float("inf"), 0), (float("inf"), 0)] + [(t, 1) for t in times] + [(c.aos, 2) for c in group] + [(c.los, 0) for c in group]
+	order = sorted(range(len(keys)), key=lambda u: keys[u])
+	graph.min_cost_flow(source, sink, count, order)
+
+	# Each unit of flow is the sequence of contacts of one rotor
+	used = collections.defaultdict(int)
+	for u in range(len(graph.adjacent)):
+		for arc in graph.adjacent[u]:
+			if arc % 2 == 0:
+				used[arc] = graph.capacity[arc ^ 1]
+	sequences = []
+	for _ in range(count):
+		sequence = []
+		u = source
+		while u != sink:
+			arc = next((a for a in graph.adjacent[u] if a % 2 == 0 and used[a] > 0), None)
+			if arc is None:
+				break
+			used[arc] -= 1
+			u = graph.to[arc]
+			if leave <= u:
+				sequence.append(group[u - leave])
+		sequences.append(sequence)
+	return sequences
+
+'''
+Assigns contacts to rotors, maximizing the priority weighted contact time. Rotors of the
+same station and slew rates are scheduled together; a contact is only given to a rotor of
+its station. Returns the Assignments sorted by aos.
+'''
+def schedule(contacts, rotors, margin=0.0):
+	groups = collections.defaultdict(list)
+	for rotor in rotors:
+		groups[(rotor.station, rotor.az_rate, rotor.el_rate)].append(rotor)
+	by_station = collections.defaultdict(list)
+	for contact in contacts:
+		by_station[contact.station].append(contact)
+	result = []
+	for (station, az_rate, el_rate), members in groups.items():
+		sequences = schedule_group(by_station[station], len(members), az_rate, el_rate, margin)
+		for rotor, sequence in zip(members, sequences):
+			result.extend(Assignment(rotor, contact) for contact in sequence)
+		# Rotors of the same station with other rates only get the contacts left over
+		scheduled = set(id(a.contact) for a in result)
+		by_station[station] = [c for c in by_station[station] if id(c) not in scheduled]
+	result.sort(key=lambda a: a.contact.aos)
+	return result
+
+'''
+Returns the total priority weighted contact time of a list of Assignments.
+'''
+def total_weight(assignments):
+	return sum(weight(a.contact) for a in assignments)
@@ -9,9 +9,12 @@ Brief: 	This class is a control interface for the SPID Elektronik rot2proG anten
 '''
 
 import serial
-import time
 import os
 import curses
+from rot2proG_codec import STATUS_FRAME, STOP_FRAME, encode_set
+from rot2proG_io import SerialLink, Rot2proGTimeout
+from rot2proG_schedule import AdaptiveSchedule, watch
+from rot2proG_poller import Poller
 '''
 This class defines the control interface for the SPID Elektronik rot2proG antenna rotor controller.
 
@@ -39,12 +42,16 @@ class Rot2proG:
 	This sets up the serial connection and pulse value.
 	When set to true, the debugging parameter allows for information such as
 	azimuth, elevation and pulse to be printed out when functions are called.
-	Debugging defaults to False.
+	Debugging defaults to False. timeout is the time budget in seconds of a single
+	command attempt and retries the number of times a command is retried after a
+	timeout before a Rot2proGTimeout is raised. baudrate is that of the serial port
+	(460800 by default), set before the first STATUS command.
 	'''
-	def __init__(self, dev_path, debugging=False):
+	def __init__(self, dev_path, debugging=False, timeout=1.0, retries=2, baudrate=460800):
 		#self.ser = serial.Serial(port='/dev/ttyUSB0',baudrate=600, bytesize=8, parity='N', stopbits=1, timeout=None)
 		self.dev_path = dev_path
-		self.ser = serial.Serial(port=self.dev_path, baudrate=460800, bytesize=8, parity='N', stopbits=1, timeout=None)
+		self.ser = serial.Serial(port=self.dev_path, baudrate=baudrate, bytesize=8, parity='N', stopbits=1, timeout=timeout, write_timeout=timeout)
+		self.link = SerialLink(self.ser, timeout, retries)
 		print(str(self.ser.name))
 		self.status()
 		self.debug = debugging
@@ -64,15 +71,16 @@ class Rot2proG:
 		old_path = self.dev_path
 		try:
 			self.ser.close()
-			self.ser = serial.Serial(port=str(path), baudrate=460800, bytesize=8, parity='N', stopbits=1, timeout=None)
+			self.ser = serial.Serial(port=str(path), baudrate=self.ser.baudrate, bytesize=8, parity='N', stopbits=1, timeout=self.link.timeout, write_timeout=self.link.timeout)
 			self.dev_path = str(path)
 
 		except AttributeError:
-			self.ser = serial.Serial(port=str(old_path), baudrate=460800, bytesize=8, parity='N', stopbits=1, timeout=None)
+			self.ser = serial.Serial(port=str(old_path), baudrate=self.ser.baudrate, bytesize=8, parity='N', stopbits=1, timeout=self.link.timeout, write_timeout=self.link.timeout)
 			self.dev_path = self.ser.name
 			print("Invalid Device path: " + path)
 			print("Please Use a Valid Device Path: " + self.dev_path)
 			pass
+		self.link = SerialLink(self.ser, self.link.timeout, self.link.retries)
 		print("New Device Path: " + self.dev_path)
 		print("Serial: " + str(self.ser.name) + "\n")
 
@@ -81,23 +89,13 @@ class Rot2proG:
 	and elevation of the rotor. The azimuth, elevation and pulse are then computed,
 	the pulse is set and the azimuth, elevation and pulse are returned as a list (first
 	element being azimuth, the second being elevation, and the third being pulse).
+	The optional timeout and retries override the defaults of the connection.
 	'''
-	def status(self):
-		cmd = [0x57, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x1f, 0x20]
-		packet = bytes(cmd)
-		
-		self.ser.write(packet)
-		self.ser.flush()
-
-		rec_packet = self.ser.read(12)
-		az = (rec_packet[1] * 100) + (rec_packet[2] * 10) + rec_packet[3] + (rec_packet[4] / 10) - 360.0
-		el = (rec_packet[6] * 100) + (rec_packet[7] * 10) + rec_packet[8] + (rec_packet[9] / 10) - 360.0
-		ph = rec_packet[5]
-		pv = rec_packet[10]
+	def status(self, timeout=None, retries=None):
+		az, el, ph, pv = self.link.transact(STATUS_FRAME, timeout, retries)
 
 		ret = [az, el, ph]
 
-		assert(ph == pv)
 		self.pulse = ph
 
 		if(self.debug):
@@ -105,7 +103,8 @@ class Rot2proG:
 			print("Azimuth:   " + str(az))
 			print("Elevation: " + str(el))
 			print("PH: " + str(ph))
-			print("PV: " + str(pv) + "\n")
+			print("PV: " + str(pv))
+			print(f"Latency: {self.link.latency * 1000:.1f} ms\n")
 
 		return ret
 
@@ -115,24 +114,13 @@ class Rot2proG:
 	azimuth, elevation and pulse are then computed, the pulse is set and the azimuth,
 	elevation and pulse are returned as a list (first element being azimuth, second
 	being elevation and the third being pulse).
+	The optional timeout and retries override the defaults of the connection.
 	'''
-	def stop(self):
-		cmd = [0x57, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x0f, 0x20]
-		packet = bytes(cmd)
-
-		self.ser.write(packet)
-		self.ser.flush()
-
-		rec_packet = self.ser.read(12)
-
-		az = (rec_packet[1] * 100) + (rec_packet[2] * 10) + rec_packet[3] + (rec_packet[4] / 10) - 360.0
-		el = (rec_packet[6] * 100) + (rec_packet[7] * 10) + rec_packet[8] + (rec_packet[9] / 10) - 360.0
-		ph = rec_packet[5]
-		pv = rec_packet[10]
+	def stop(self, timeout=None, retries=None):
+		az, el, ph, pv = self.link.transact(STOP_FRAME, timeout, retries)
 
 		ret = [az, el, ph]
 
-		assert(ph == pv)
 		self.pulse = ph
 
 		if(self.debug):
@@ -140,7 +128,8 @@ class Rot2proG:
 			print("Azimuth:   " + str(az))
 			print("Elevation: " + str(el))
 			print("PH: " + str(ph))
-			print("PV: " + str(pv) + "\n")
+			print("PV: " + str(pv))
+			print(f"Latency: {self.link.latency * 1000:.1f} ms\n")
 
 		return ret
 
@@ -148,59 +137,48 @@ class Rot2proG:
 	Send a SET command to the controller, which causes the rotor to adjust its position
 	to the azimuth and elevation specified by the azi and eli parameters respectively.
 	The azi and eli parameters are floating point values that specify the desired position.
-	There is no response to the SET command, thus nothing to return.
+	There is no response to the SET command, thus nothing to return. The command returns
+	as soon as it has been written; the connection spaces consecutive commands as needed.
+	The optional timeout and retries override the defaults of the connection.
 	'''
-	def set(self, azi, eli):
+	def set(self, azi, eli, timeout=None, retries=None):
 		print("Calling set")
 		assert(float(azi) <= self.max_az)
 		assert(float(azi) >= self.min_az)
 		assert(float(eli) <= self.max_el)
 		assert(float(eli) >= self.min_el)
 
-		az = "0" + str(int(self.pulse * (float(azi) + 360)))
-		el = "0" + str(int(self.pulse * (float(eli) + 360)))
-
-		cmd = [0x57, int(az[-4]), int(az[-3]), int(az[-2]), int(az[-1]), self.pulse, int(el[-4]), int(el[-3]), int(el[-2]), int(el[-1]), self.pulse, 0x2f, 0x20]
-		packet = bytes(cmd)
+		packet = encode_set(azi, eli, self.pulse)
 
-		self.ser.write(packet)
-		self.ser.flush()
+		self.link.send(packet, timeout, retries)
 
 		if(self.debug):
 			print("SET COMMAND SENT")
 			print("Sent: " + packet.decode('latin-1'))
-			print("Set Azimuth:   " + str(azi) + " (" + str(az) + ")")
-			print("Set Elevation: " + str(eli) + " (" + str(el) + ")")
+			print("Set Azimuth:   " + str(azi) + " (" + packet[1:5].decode('ascii') + ")")
+			print("Set Elevation: " + str(eli) + " (" + packet[6:10].decode('ascii') + ")")
 			print("Pulse: " + chr(self.pulse) + "\n")
 
-		time.sleep(1)
 
 	'''
 	Calls the STATUS, STOP and SET functions multiple times
-	in order to test the rot2proG class functionality.
+	in order to test the rot2proG class functionality. Arrival at each
+	position is detected from the readings of a background poller.
 	'''
 	def test(self):
 		self.status()
 		self.stop()
-		self.set(90, 90)
-		a=True
-		while(a):
-			time.sleep(2)
-			val = self.status()
-			print(val)
-			if(90 == val[0] and 90 == val[1]):
-				a = False
-			print("Az="+str(val[0]))
-			print("El="+str(val[1]))
-		self.set(0, 0)
-		a=True
-		while(a):
-			time.sleep(2)
-			val = self.status()
-			if(0 == val[0] and 0 == val[1]):
-				a = False
-			print("Az="+str(val[0]))
-			print("El="+str(val[1]))
+		with Poller(self, schedule=AdaptiveSchedule()) as poller:
+			poller.subscribe(lambda position: print("Az=" + str(position.az) + "\nEl=" + str(position.el)))
+			# 120 s covers a full azimuth slew; past that the rotor is not getting there
+			try:
+				val = poller.move_to(90, 90, timeout=120).result()
+				print(val)
+				poller.move_to(0, 0, timeout=120).result()
+			except TimeoutError as e:
+				# e.g. stopped from the front panel, stalled or against a limit
+				print("Error: " + str(e))
+				poller.stop()
 		self.stop()
 
 	def test_spiros(self):
@@ -241,6 +219,10 @@ class Rot2proG:
 						   ("           provide an azimuth and elevation and the rotor will change its    ", curses.A_NORMAL),
 						   ("           heading towards the designated location (no return value)         ", curses.A_NORMAL),
 						   ("                                                                             ", curses.A_NORMAL),
+						   ("      WATCH, watch                                                           ", curses.A_BOLD),
+						   ("           poll the rotor at an adaptive rate, faster while it moves, and    ", curses.A_NORMAL),
+						   ("           print its position until it stops moving (Ctrl+C to return)       ", curses.A_NORMAL),
+						   ("                                                                             ", curses.A_NORMAL),
 						   ("      DEV, DEVICE, dev, device                                               ", curses.A_BOLD),
 						   ("           displays information about the connected device (path, name,      ", curses.A_NORMAL),
 						   ("           protocol)                                                         ", curses.A_NORMAL),
@@ -303,12 +285,12 @@ class Rot2proG:
 				stdscr.addnstr(max[0]-1, 0, " Manual page rot2proG [command mode] press q to quit ", max[1], curses.A_REVERSE)
 
 			elif c == curses.KEY_DOWN:
-				if ((45 - max[0]) <= pos):
+				if ((49 - max[0]) <= pos):
 					self.man_draw(stdscr, pos)
 					stdscr.addnstr(max[0]-1, 0, "                                                                             ", max[1], curses.A_NORMAL)
 					stdscr.addnstr(max[0]-1, 0, " Manual page rot2proG [command mode] (END) press q to quit ", max[1], curses.A_REVERSE)
 
-				elif ((45 - pos) > max[0]):
+				elif ((49 - pos) > max[0]):
 					pos += 1
 					self.man_draw(stdscr, pos)
 					stdscr.addnstr(max[0]-1, 0, "                                                                             ", max[1], curses.A_NORMAL)
@@ -365,6 +347,9 @@ class Rot2proG:
 				elif cmd == "test":
 					self.test()
 
+				elif cmd.lower() == "watch":
+					watch(self)
+
 				elif cmd.lower() == "dev" or cmd.lower() == "device":
 					print("Rotor Controller: SPID Elektronik rot2proG")
 					print("Device Path: " + str(self.dev_path))
@@ -394,6 +379,9 @@ class Rot2proG:
 				print("Error: unknown command")
 				print("Try 'help' for more information")
 
+			except Rot2proGTimeout as e:
+				print("Error: " + str(e) + "\n")
+
 if __name__ == "__main__":
 	rot = Rot2proG('COM17', debugging=True)
 	# rot.cmd_mode()
@@ -9,7 +9,10 @@ Brief: 	This class is a control interface for the SPID Elektronik rot2proG anten
 '''
 
 import serial
-import time
+from rot2proG_codec import STATUS_FRAME, STOP_FRAME, encode_set
+from rot2proG_io import SerialLink
+from rot2proG_schedule import AdaptiveSchedule
+from rot2proG_poller import Poller
 
 class Rot2proG:
 
@@ -25,12 +28,16 @@ class Rot2proG:
 	This sets up the serial connection and pulse value.
 	When set to true, the debugging parameter allows for information such as
 	azimuth, elevation and pulse to be printed out when functions are called.
-	Debugging defaults to False.
+	Debugging defaults to False. timeout is the time budget in seconds of a single
+	command attempt and retries the number of times a command is retried after a
+	timeout before a Rot2proGTimeout is raised. baudrate is that of the serial port
+	(460800 by default), set before the first STATUS command.
 	'''
-	def __init__(self, dev_path, debugging=False):
+	def __init__(self, dev_path, debugging=False, timeout=1.0, retries=2, baudrate=460800):
 		#self.ser = serial.Serial(port='/dev/ttyUSB0',baudrate=600, bytesize=8, parity='N', stopbits=1, timeout=None)
 		self.dev_path = dev_path
-		self.ser = serial.Serial(port=self.dev_path, baudrate=460800, bytesize=8, parity='N', stopbits=1, timeout=None)
+		self.ser = serial.Serial(port=self.dev_path, baudrate=baudrate, bytesize=8, parity='N', stopbits=1, timeout=timeout, write_timeout=timeout)
+		self.link = SerialLink(self.ser, timeout, retries)
 		print(str(self.ser.name))
 		self.status()
 		self.debug = debugging
@@ -50,15 +57,16 @@ class Rot2proG:
 		old_path = self.dev_path
 		try:
 			self.ser.close()
-			self.ser = serial.Serial(port=str(path), baudrate=460800, bytesize=8, parity='N', stopbits=1, timeout=None)
+			self.ser = serial.Serial(port=str(path), baudrate=self.ser.baudrate, bytesize=8, parity='N', stopbits=1, timeout=self.link.timeout, write_timeout=self.link.timeout)
 			self.dev_path = str(path)
 
 		except AttributeError:
-			self.ser = serial.Serial(port=str(old_path), baudrate=460800, bytesize=8, parity='N', stopbits=1, timeout=None)
+			self.ser = serial.Serial(port=str(old_path), baudrate=self.ser.baudrate, bytesize=8, parity='N', stopbits=1, timeout=self.link.timeout, write_timeout=self.link.timeout)
 			self.dev_path = self.ser.name
 			print("Invalid Device path: " + path)
 			print("Please Use a Valid Device Path: " + self.dev_path)
 			pass
+		self.link = SerialLink(self.ser, self.link.timeout, self.link.retries)
 		print("New Device Path: " + self.dev_path)
 		print("Serial: " + str(self.ser.name) + "\n")
 
@@ -67,23 +75,13 @@ class Rot2proG:
 	and elevation of the rotor. The azimuth, elevation and pulse are then computed,
 	the pulse is set and the azimuth, elevation and pulse are returned as a list (first
 	element being azimuth, the second being elevation, and the third being pulse).
+	The optional timeout and retries override the defaults of the connection.
 	'''
-	def status(self):
-		cmd = [0x57, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x1f, 0x20]
-		packet = bytes(cmd)
-		
-		self.ser.write(packet)
-		self.ser.flush()
-
-		rec_packet = self.ser.read(12)
-		az = (rec_packet[1] * 100) + (rec_packet[2] * 10) + rec_packet[3] + (rec_packet[4] / 10) - 360.0
-		el = (rec_packet[6] * 100) + (rec_packet[7] * 10) + rec_packet[8] + (rec_packet[9] / 10) - 360.0
-		ph = rec_packet[5]
-		pv = rec_packet[10]
+	def status(self, timeout=None, retries=None):
+		az, el, ph, pv = self.link.transact(STATUS_FRAME, timeout, retries)
 
 		ret = [az, el, ph]
 
-		assert(ph == pv)
 		self.pulse = ph
 
 		if(self.debug):
@@ -91,7 +89,8 @@ class Rot2proG:
 			print("Azimuth:   " + str(az))
 			print("Elevation: " + str(el))
 			print("PH: " + str(ph))
-			print("PV: " + str(pv) + "\n")
+			print("PV: " + str(pv))
+			print(f"Latency: {self.link.latency * 1000:.1f} ms\n")
 
 		return ret
 
@@ -101,24 +100,13 @@ class Rot2proG:
 	azimuth, elevation and pulse are then computed, the pulse is set and the azimuth,
 	elevation and pulse are returned as a list (first element being azimuth, second
 	being elevation and the third being pulse).
+	The optional timeout and retries override the defaults of the connection.
 	'''
-	def stop(self):
-		cmd = [0x57, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x0f, 0x20]
-		packet = bytes(cmd)
-
-		self.ser.write(packet)
-		self.ser.flush()
-
-		rec_packet = self.ser.read(12)
-
-		az = (rec_packet[1] * 100) + (rec_packet[2] * 10) + rec_packet[3] + (rec_packet[4] / 10) - 360.0
-		el = (rec_packet[6] * 100) + (rec_packet[7] * 10) + rec_packet[8] + (rec_packet[9] / 10) - 360.0
-		ph = rec_packet[5]
-		pv = rec_packet[10]
+	def stop(self, timeout=None, retries=None):
+		az, el, ph, pv = self.link.transact(STOP_FRAME, timeout, retries)
 
 		ret = [az, el, ph]
 
-		assert(ph == pv)
 		self.pulse = ph
 
 		if(self.debug):
@@ -126,7 +114,8 @@ class Rot2proG:
 			print("Azimuth:   " + str(az))
 			print("Elevation: " + str(el))
 			print("PH: " + str(ph))
-			print("PV: " + str(pv) + "\n")
+			print("PV: " + str(pv))
+			print(f"Latency: {self.link.latency * 1000:.1f} ms\n")
 
 		return ret
 
@@ -134,9 +123,11 @@ class Rot2proG:
 	Send a SET command to the controller, which causes the rotor to adjust its position
 	to the azimuth and elevation specified by the azi and eli parameters respectively.
 	The azi and eli parameters are floating point values that specify the desired position.
-	There is no response to the SET command, thus nothing to return.
+	There is no response to the SET command, thus nothing to return. The command returns
+	as soon as it has been written; the connection spaces consecutive commands as needed.
+	The optional timeout and retries override the defaults of the connection.
 	'''
-	def set(self, azi, eli):
+	def set(self, azi, eli, timeout=None, retries=None):
 		# Ensure azimuth and elevation are within valid ranges
 		if not (self.min_az <= float(azi) <= self.max_az):
 			print(f"Error: Azimuth value {azi} out of limits. Must be between {self.min_az} and {self.max_az}.")
@@ -145,66 +136,40 @@ class Rot2proG:
 			print(f"Error: Elevation value {eli} out of limits. Must be between {self.min_el} and {self.max_el}.")
 			return
 
-		# Calculate H and V based on pulses and +360 degree offset
-		H = int(self.pulse * (360 + float(azi)))
-		V = int(self.pulse * (360 + float(eli)))
-
-		# Encode H and V as ASCII (0x30-0x39, i.e., '0'-'9')
-		# convert to ascii characters
-		H_str = "0000" + str(H)
-		V_str = "0000" + str(V)
-
-		# Create command packet
-		cmd = [
-			0x57,  # Start byte
-			int(H_str[-4]) + 0x30, int(H_str[-3]) + 0x30, int(H_str[-2]) + 0x30, int(H_str[-1]) + 0x30,  # H1-H4
-			self.pulse,  # PH
-			int(V_str[-4]) + 0x30, int(V_str[-3]) + 0x30, int(V_str[-2]) + 0x30, int(V_str[-1]) + 0x30,  # V1-V4
-			self.pulse,  # PV
-			0x2f,  # K
-			0x20   # END
-		]
-		packet = bytes(cmd)
+		# Create command packet (H and V are the pulse counts with a +360 degree offset,
+		# encoded as ASCII digits)
+		packet = encode_set(azi, eli, self.pulse)
 
 		# Send command packet to the controller
-		self.ser.write(packet)
-		self.ser.flush()
+		self.link.send(packet, timeout, retries)
 
 		if self.debug:
 			print("SET COMMAND SENT")
 			print(f"Sent: {packet}")
-			print(f"Set Azimuth: {azi} ({H_str})")
-			print(f"Set Elevation: {eli} ({V_str})")
+			print(f"Set Azimuth: {azi} ({packet[1:5].decode('ascii')})")
+			print(f"Set Elevation: {eli} ({packet[6:10].decode('ascii')})")
 			print(f"Pulse: {self.pulse}\n")
 
-		time.sleep(1)
 
 	'''
 	Calls the STATUS, STOP and SET functions multiple times
-	in order to test the rot2proG class functionality.
+	in order to test the rot2proG class functionality. Arrival at each
+	position is detected from the readings of a background poller.
 	'''
 	def test(self):
 		self.status()
 		self.stop()
-		self.set(90, 90)
-		a=True
-		while(a):
-			time.sleep(2)
-			val = self.status()
-			print(val)
-			if(90 == val[0] and 90 == val[1]):
-				a = False
-			print("Az="+str(val[0]))
-			print("El="+str(val[1]))
-		self.set(0, 0)
-		a=True
-		while(a):
-			time.sleep(2)
-			val = self.status()
-			if(0 == val[0] and 0 == val[1]):
-				a = False
-			print("Az="+str(val[0]))
-			print("El="+str(val[1]))
+		with Poller(self, schedule=AdaptiveSchedule()) as poller:
+			poller.subscribe(lambda position: print("Az=" + str(position.az) + "\nEl=" + str(position.el)))
+			# 120 s covers a full azimuth slew; past that the rotor is not getting there
+			try:
+				val = poller.move_to(90, 90, timeout=120).result()
+				print(val)
+				poller.move_to(0, 0, timeout=120).result()
+			except TimeoutError as e:
+				# e.g. stopped from the front panel, stalled or against a limit
+				print("Error: " + str(e))
+				poller.stop()
 		self.stop()
 
 	def test_spiros(self):
@@ -0,0 +1,89 @@
+'''
+File: 	rot2proG_settle.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Settling detector for step-and-stare measurements. Instead of waiting a fixed dwell
+	time after every SET command, the detector watches the STATUS readings and declares
+	the rotor settled once the last few readings stay within the pulse quantization and
+	their residual velocity is below a threshold, and reports how long settling took.
+'''
+
+import collections
+from rot2proG_schedule import resolution
+
+'''
+Result of a settling detection. position is the reading that completed the detection,
+settle_time the time in seconds from the start to the first reading of the stable window
+(when the rotor stopped), detect_time the time from the start to the detection, velocity
+the largest residual velocity of the two axes in degrees per second and reached whether
+the rotor settled within tolerance of the target (True when there is no target).
+'''
+SettleResult = collections.namedtuple('SettleResult', ['position', 'settle_time', 'detect_time', 'velocity', 'reached'])
+
+class SettlingDetector:
+
+	'''
+	start is the time.monotonic() from which settle times are measured, usually that of the
+	SET command. target is the optional (az, el) the rotor was sent to. The rotor is
+	settled after stable_polls consecutive readings spanning no more than tol degrees on
+	each axis (by default the resolution of the readings) with a least squares velocity
+	below max_velocity degrees per second. A rotor that is stable away from its target (it
+	may not have started moving yet) is only declared settled, with reached False, after
+	stall_polls stable readings.
+	'''
+	def __init__(self, start, target=None, stable_polls=3, tol=None, max_velocity=0.1, stall_polls=10):
+		self.start = start
+		self.target = target
+		self.stable_polls = max(2, stable_polls)
+		self.tol = tol
+		self.max_velocity = max_velocity
+		self.stall_polls = stall_polls
+		self.stalled = 0  # Consecutive stable readings away from the target
+		self.window = collections.deque(maxlen=self.stable_polls)
+
+	'''
+	Returns the largest least squares slope in degrees per second of the azimuth and
+	elevation readings in the window.
+	'''
+	def velocity(self):
+		t0 = self.window[0].monotonic
+		times = [p.monotonic - t0 for p in self.window]
+		mean_t = sum(times) / len(times)
+		den = sum((t - mean_t) ** 2 for t in times)
+		if den == 0:
+			return 0.0
+		result = 0.0
+		for axis in ("az", "el"):
+			values = [getattr(p, axis) for p in self.window]
+			mean_v = sum(values) / len(values)
+			slope = sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values)) / den
+			result = max(result, abs(slope))
+		return result
+
+	'''
+	Takes a rot2proG_poller.Position into account. Returns a SettleResult once the rotor is
+	settled, None before.
+	'''
+	def feed(self, position):
+		if position.monotonic < self.start:
+			return None
+		self.window.append(position)
+		if len(self.window) < self.stable_polls:
+			return None
+		tol = self.tol if self.tol is not None else resolution(position.pulse)
+		for axis in ("az", "el"):
+			values = [getattr(p, axis) for p in self.window]
+			if max(values) - min(values) > tol + 1e-9:
+				self.stalled = 0
+				return None
+		velocity = self.velocity()
+		if velocity > self.max_velocity:
+			self.stalled = 0
+			return None
+		reached = True
+		if self.target is not None:
+			reached = abs(position.az - self.target[0]) <= tol and abs(position.el - self.target[1]) <= tol
+			if not reached:
+				self.stalled += 1
+				if self.stalled < self.stall_polls:
+					return None
+		return SettleResult(position, self.window[0].monotonic - self.start, position.monotonic - self.start, velocity, reached)
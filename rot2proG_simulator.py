@@ -0,0 +1,298 @@
+'''
+File: 	rot2proG_simulator.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Local emulator of the SPID MD-01 rotor controller for benchmarks and tests without a
+	rotor on the bench. It speaks the ROT2 STATUS, STOP and SET frames handled by the
+	Rot2proG classes, listens on local TCP ports (like port 23 of the LAN interface) and on
+	Linux pseudo-terminals (for the serial classes), and models the slew rate,
+	acceleration, pulse resolution and limits of each axis. Any number of emulated
+	controllers can run on one event loop in one process.
+'''
+
+import argparse
+import asyncio
+import math
+import os
+import threading
+import time
+from rot2proG_codec import HEADER, END, CMD_STATUS, CMD_STOP, CMD_SET, COMMAND_LEN, encode_reply
+
+'''
+One rotor axis moving towards its target with a trapezoidal velocity profile.
+'''
+class Axis:
+
+	def __init__(self, position, rate, accel, minimum, maximum):
+		self.position = float(position)
+		self.target = float(position)
+		self.velocity = 0.0
+		self.rate = float(rate)  # Maximum slew rate in degrees per second
+		self.accel = float(accel)  # Acceleration in degrees per second squared
+		self.minimum = float(minimum)
+		self.maximum = float(maximum)
+
+	def moving(self):
+		return self.velocity != 0.0 or self.position != self.target
+
+	def set_target(self, target):
+		self.target = min(max(float(target), self.minimum), self.maximum)
+
+	'''
+	Advances the axis by dt seconds.
+	'''
+	def step(self, dt):
+		distance = self.target - self.position
+		if distance == 0.0 and self.velocity == 0.0:
+			return
+		# Fastest speed from which the axis can still brake before the target
+		wanted = math.copysign(min(self.rate, math.sqrt(2 * self.accel * abs(distance))), distance)
+		dv = self.accel * dt
+		if self.velocity < wanted:
+			self.velocity = min(self.velocity + dv, wanted)
+		else:
+			self.velocity = max(self.velocity - dv, wanted)
+		self.position += self.velocity * dt
+		# The braking profile makes the axis slow near the target, so it stops there as
+		# soon as a step reaches or crosses it
+		remaining = self.target - self.position
+		if remaining == 0.0 or (remaining > 0) != (distance > 0):
+			self.position = self.target
+			self.velocity = 0.0
+
+'''
+Emulated MD-01 controller with an azimuth and an elevation axis.
+'''
+class SimulatedRotor:
+
+	max_az = float(540)  # Maximum azimuth. Defaults to 540.
+	min_az = float(-180)  # Minimum azimuth. Defaults to -180.
+	max_el = float(180)  # Maximum elevation. Defaults to 180.
+	min_el = float(-21)  # Minimum elevation. Defaults to -21.
+	time_step = 0.01  # Integration step of the motion model in seconds.
+
+	'''
+	az and el are the starting position, az_rate/el_rate the slew rates in degrees per
+	second, accel the acceleration in degrees per second squared and pulse the pulses per
+	degree reported in the replies (1, 2, 4 or 10 on the MD-01). reply_delay is the time
+	in seconds the controller takes to answer a STATUS or STOP command.
+	'''
+	def __init__(self, az=0.0, el=0.0, az_rate=6.0, el_rate=6.0, accel=20.0, pulse=10, reply_delay=0.0, clock=time.monotonic):
+		self.az = Axis(az, az_rate, accel, self.min_az, self.max_az)
+		self.el = Axis(el, el_rate, accel, self.min_el, self.max_el)
+		self.pulse = int(pulse)
+		self.reply_delay = reply_delay
+		self.clock = clock
+		self.last_update = clock()
+		self.commands = 0
+
+	'''
+	Brings the axes up to the current time of the clock.
+	'''
+	def update(self):
+		now = self.clock()
+		dt = now - self.last_update
+		self.last_update = now
+		if not (self.az.moving() or self.el.moving()):
+			return
+		while dt > 0 and (self.az.moving() or self.el.moving()):
+			step = min(dt, self.time_step)
+			self.az.step(step)
+			self.el.step(step)
+			dt -= step
+
+	'''
+	Returns the position as reported by the controller, i.e. quantized to the pulse
+	resolution.
+	'''
+	def reported(self):
+		self.update()
+		return (round(self.az.position * self.pulse) / self.pulse, round(self.el.position * self.pulse) / self.pulse)
+
+	def moving(self):
+		self.update()
+		return self.az.moving() or self.el.moving()
+
+	'''
+	Handles one 13 byte command frame and returns the reply, or None for SET.
+	'''
+	def handle(self, frame):
+		self.commands += 1
+		self.update()
+		command = frame[11]
+		if command == CMD_SET:
+			ph = frame[5]
+			pv = frame[10]
+			try:
+				H = int(bytes(frame[1:5]))
+				V = int(bytes(frame[6:10]))
+			except ValueError:
+				return None
+			if ph:
+				self.az.set_target(H / ph - 360)
+			if pv:
+				self.el.set_target(V / pv - 360)
+			return None
+		if command == CMD_STOP:
+			# Brake from the current speed, then hold the position where it stopped
+			for axis in (self.az, self.el):
+				axis.target = axis.position + math.copysign(axis.velocity ** 2 / (2 * axis.accel), axis.velocity)
+				axis.target = min(max(axis.target, axis.minimum), axis.maximum)
+		if command in (CMD_STATUS, CMD_STOP):
+			az, el = self.reported()
+			return encode_reply(az, el, self.pulse)
+		return None
+
+'''
+Splits a byte stream into command frames, resynchronizing on the header and terminator,
+and sends the replies of a SimulatedRotor back through write(). reply_delay is honoured
+with loop.call_later().
+'''
+class CommandStream:
+
+	def __init__(self, rotor, write, loop):
+		self.rotor = rotor
+		self.write = write
+		self.loop = loop
+		self.buf = bytearray()
+
+	def feed(self, data):
+		self.buf += data
+		while True:
+			start = self.buf.find(HEADER)
+			if start < 0:
+				self.buf.clear()
+				return
+			if start:
+				del self.buf[:start]
+			if len(self.buf) < COMMAND_LEN:
+				return
+			if self.buf[COMMAND_LEN - 1] != END:
+				del self.buf[0]
+				continue
+			frame = bytes(self.buf[:COMMAND_LEN])
+			del self.buf[:COMMAND_LEN]
+			reply = self.rotor.handle(frame)
+			if reply is not None:
+				if self.rotor.reply_delay:
+					self.loop.call_later(self.rotor.reply_delay, self.write, reply)
+				else:
+					self.write(reply)
+
+class SimulatorProtocol(asyncio.Protocol):
+
+	def __init__(self, rotor):
+		self.rotor = rotor
+
+	def connection_made(self, transport):
+		self.transport = transport
+		self.stream = CommandStream(self.rotor, self.write, asyncio.get_running_loop())
+
+	def write(self, data):
+		if not self.transport.is_closing():
+			self.transport.write(data)
+
+	def data_received(self, data):
+		self.stream.feed(data)
+
+'''
+Runs any number of emulated controllers on one asyncio event loop in a background thread.
+'''
+class Simulator:
+
+	def __init__(self):
+		self.loop = asyncio.new_event_loop()
+		self.thread = threading.Thread(target=self.loop.run_forever, name="rot2proG-simulator", daemon=True)
+		self.thread.start()
+		self.servers = []
+		self.ptys = []
+		self.rotors = []
+
+	def call(self, coro):
+		return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+	'''
+	Serves a rotor on a local TCP port (0 picks a free port). Returns the port.
+	'''
+	def add_tcp(self, rotor, host="127.0.0.1", port=0):
+		async def start():
+			return await self.loop.create_server(lambda: SimulatorProtocol(rotor), host, port)
+
+		server = self.call(start())
+		self.servers.append(server)
+		self.rotors.append(rotor)
+		return server.sockets[0].getsockname()[1]
+
+	'''
+	Serves a rotor on a new Linux pseudo-terminal. Returns the path of the terminal to open
+	with the serial Rot2proG classes (e.g. /dev/pts/3).
+	'''
+	def add_pty(self, rotor):
+		import tty
+		master, slave = os.openpty()
+		tty.setraw(slave)
+		os.set_blocking(master, False)
+		path = os.ttyname(slave)
+
+		def write(data):
+			os.write(master, data)
+
+		def read_ready():
+			try:
+				data = os.read(master, 4096)
+			except (BlockingIOError, OSError):
+				return
+			stream.feed(data)
+
+		stream = CommandStream(rotor, write, self.loop)
+		self.loop.call_soon_threadsafe(self.loop.add_reader, master, read_ready)
+		# The slave end is kept open so the terminal survives clients closing it
+		self.ptys.append((master, slave))
+		self.rotors.append(rotor)
+		return path
+
+	def close(self):
+		async def stop():
+			for server in self.servers:
+				server.close()
+				await server.wait_closed()
+			for master, slave in self.ptys:
+				self.loop.remove_reader(master)
+
+		self.call(stop())
+		for master, slave in self.ptys:
+			os.close(master)
+			os.close(slave)
+		self.loop.call_soon_threadsafe(self.loop.stop)
+		self.thread.join()
+		self.loop.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Emulated SPID MD-01 rotor controllers")
+	parser.add_argument("--tcp", type=int, default=1, help="number of controllers on TCP ports")
+	parser.add_argument("--port", type=int, default=0, help="first TCP port (0 for free ports)")
+	parser.add_argument("--pty", type=int, default=0, help="number of controllers on pseudo-terminals")
+	parser.add_argument("--rate", type=float, default=6.0, help="slew rate in degrees per second")
+	parser.add_argument("--accel", type=float, default=20.0, help="acceleration in degrees per second squared")
+	parser.add_argument("--pulse", type=int, default=10, help="pulses per degree")
+	parser.add_argument("--delay", type=float, default=0.0, help="reply delay in seconds")
+	args = parser.parse_args()
+
+	sim = Simulator()
+	for i in range(args.tcp):
+		rotor = SimulatedRotor(az_rate=args.rate, el_rate=args.rate, accel=args.accel, pulse=args.pulse, reply_delay=args.delay)
+		port = sim.add_tcp(rotor, port=args.port + i if args.port else 0)
+		print(f"Controller {len(sim.rotors)}: 127.0.0.1:{port}")
+	for i in range(args.pty):
+		rotor = SimulatedRotor(az_rate=args.rate, el_rate=args.rate, accel=args.accel, pulse=args.pulse, reply_delay=args.delay)
+		print(f"Controller {len(sim.rotors)}: {sim.add_pty(rotor)}")
+	try:
+		while True:
+			time.sleep(1)
+	except KeyboardInterrupt:
+		sim.close()
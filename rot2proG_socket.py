@@ -9,9 +9,12 @@ Brief: 	This class is a control interface for the SPID Elektronik rot2proG anten
 '''
 
 import socket
-import time
 import os
 import curses
+from rot2proG_codec import STATUS_FRAME, STOP_FRAME, encode_set
+from rot2proG_io import SocketLink, Rot2proGTimeout
+from rot2proG_schedule import AdaptiveSchedule, watch
+from rot2proG_poller import Poller
 '''
 This class defines the control interface for the SPID Elektronik rot2proG antenna rotor controller.
 
@@ -40,13 +43,16 @@ class Rot2proG:
 	This sets up the socket connection and pulse value.
 	When set to true, the debugging parameter allows for information such as
 	azimuth, elevation and pulse to be printed out when functions are called.
-	Debugging defaults to False.
+	Debugging defaults to False. timeout is the time budget in seconds of a single
+	command attempt and retries the number of times a command is retried after a
+	timeout before a Rot2proGTimeout is raised.
 	'''
-	def __init__(self, host, port, debugging=False):
+	def __init__(self, host, port, debugging=False, timeout=1.0, retries=2):
 		self.host = host
 		self.port = port
 		self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 		self.sock.connect((self.host, self.port))
+		self.link = SocketLink(self.sock, timeout, retries)
 		print(f"Connected to {self.host}:{self.port}")
 		self.status()
 		self.debug = debugging
@@ -80,6 +86,7 @@ class Rot2proG:
 			print(f"Invalid Connection: {host}:{port}")
 			print(f"Please Use a Valid Connection: {self.host}:{self.port}")
 			pass
+		self.link = SocketLink(self.sock, self.link.timeout, self.link.retries)
 		print(f"New Connection: {self.host}:{self.port}")
 		print(f"Socket: {self.sock.getsockname()}\n")
 
@@ -88,22 +95,14 @@ class Rot2proG:
 	and elevation of the rotor. The azimuth, elevation and pulse are then computed,
 	the pulse is set and the azimuth, elevation and pulse are returned as a list (first
 	element being azimuth, the second being elevation, and the third being pulse).
+	The reply is reassembled by the framed reader, which skips stray bytes on the link.
+	The optional timeout and retries override the defaults of the connection.
 	'''
-	def status(self):
-		cmd = ['\x57','\x00','\x00','\x00','\x00','\x00', '\x00', '\x00', '\x00', '\x00', '\x00', '\x1f', '\x20']
-		packet = "".join(cmd)
-		
-		self.sock.sendall(packet.encode('latin1'))
-
-		rec_packet = self.sock.recv(12)
-		az = (ord(rec_packet[1]) * 100) + (ord(rec_packet[2]) * 10) + ord(rec_packet[3]) + (ord(rec_packet[4]) / 10) - 360.0
-		el = (ord(rec_packet[6]) * 100) + (ord(rec_packet[7]) * 10) + ord(rec_packet[8]) + (ord(rec_packet[9]) / 10) - 360.0
-		ph = ord(rec_packet[5])
-		pv = ord(rec_packet[10])
+	def status(self, timeout=None, retries=None):
+		az, el, ph, pv = self.link.transact(STATUS_FRAME, timeout, retries)
 
 		ret = [az, el, ph]
 
-		assert(ph == pv)
 		self.pulse = ph
 
 		if(self.debug):
@@ -111,7 +110,9 @@ class Rot2proG:
 			print("Azimuth:   " + str(az))
 			print("Elevation: " + str(el))
 			print("PH: " + str(ph))
-			print("PV: " + str(pv) + "\n")
+			print("PV: " + str(pv))
+			print(f"Latency: {self.link.latency * 1000:.1f} ms")
+			print(f"Dropped bytes: {self.link.reader.dropped}, Realigned: {self.link.reader.realigned}\n")
 
 		return ret
 
@@ -121,23 +122,13 @@ class Rot2proG:
 	azimuth, elevation and pulse are then computed, the pulse is set and the azimuth,
 	elevation and pulse are returned as a list (first element being azimuth, second
 	being elevation and the third being pulse).
+	The optional timeout and retries override the defaults of the connection.
 	'''
-	def stop(self):
-		cmd = ['\x57','\x00','\x00','\x00','\x00','\x00', '\x00', '\x00', '\x00', '\x00', '\x00', '\x0f', '\x20']
-		packet = "".join(cmd)
-
-		self.sock.sendall(packet.encode('latin1'))
-
-		rec_packet = self.sock.recv(12)
-
-		az = (ord(rec_packet[1]) * 100) + (ord(rec_packet[2]) * 10) + ord(rec_packet[3]) + (ord(rec_packet[4]) / 10) - 360.0
-		el = (ord(rec_packet[6]) * 100) + (ord(rec_packet[7]) * 10) + ord(rec_packet[8]) + (ord(rec_packet[9]) / 10) - 360.0
-		ph = ord(rec_packet[5])
-		pv = ord(rec_packet[10])
+	def stop(self, timeout=None, retries=None):
+		az, el, ph, pv = self.link.transact(STOP_FRAME, timeout, retries)
 
 		ret = [az, el, ph]
 
-		assert(ph == pv)
 		self.pulse = ph
 
 		if(self.debug):
@@ -145,7 +136,8 @@ class Rot2proG:
 			print("Azimuth:   " + str(az))
 			print("Elevation: " + str(el))
 			print("PH: " + str(ph))
-			print("PV: " + str(pv) + "\n")
+			print("PV: " + str(pv))
+			print(f"Latency: {self.link.latency * 1000:.1f} ms\n")
 
 		return ret
 
@@ -153,58 +145,48 @@ class Rot2proG:
 	Send a SET command to the controller, which causes the rotor to adjust its position
 	to the azimuth and elevation specified by the azi and eli parameters respectively.
 	The azi and eli parameters are floating point values that specify the desired position.
-	There is no response to the SET command, thus nothing to return.
+	There is no response to the SET command, thus nothing to return. The command returns
+	as soon as it has been written; the connection spaces consecutive commands as needed.
+	The optional timeout and retries override the defaults of the connection.
 	'''
-	def set(self, azi, eli):
+	def set(self, azi, eli, timeout=None, retries=None):
 
 		assert(float(azi) <= self.max_az)
 		assert(float(azi) >= self.min_az)
 		assert(float(eli) <= self.max_el)
 		assert(float(eli) >= self.min_el)
 
-		az = "0" + str(int(self.pulse * (float(azi) + 360)))
-		el = "0" + str(int(self.pulse * (float(eli) + 360)))
-
-		cmd = ['\x57', az[-4], az[-3], az[-2], az[-1], chr(self.pulse), el[-4], el[-3], el[-2], el[-1], chr(self.pulse), '\x2f', '\x20']
-		packet = "".join(cmd)
+		packet = encode_set(azi, eli, self.pulse)
 
-		self.sock.sendall(packet.encode('latin1'))
+		self.link.send(packet, timeout, retries)
 
 		if(self.debug):
 			print("SET COMMAND SENT")
-			print("Sent: " + packet)
-			print("Set Azimuth:   " + str(azi) + " (" + str(az) + ")")
-			print("Set Elevation: " + str(eli) + " (" + str(el) + ")")
+			print("Sent: " + packet.decode('latin-1'))
+			print("Set Azimuth:   " + str(azi) + " (" + packet[1:5].decode('ascii') + ")")
+			print("Set Elevation: " + str(eli) + " (" + packet[6:10].decode('ascii') + ")")
 			print("Pulse: " + chr(self.pulse) + "\n")
 
-		time.sleep(1)
 
 	'''
 	Calls the STATUS, STOP and SET functions multiple times
-	in order to test the rot2proG class functionality.
+	in order to test the rot2proG class functionality. Arrival at each
+	position is detected from the readings of a background poller.
 	'''
 	def test(self):
 		self.status()
 		self.stop()
-		self.set(90, 90)
-		a=True
-		while(a):
-			time.sleep(2)
-			val = self.status()
-			print(val)
-			if(90 == val[0] and 90 == val[1]):
-				a = False
-			print("Az="+str(val[0]))
-			print("El="+str(val[1]))
-		self.set(0, 0)
-		a=True
-		while(a):
-			time.sleep(2)
-			val = self.status()
-			if(0 == val[0] and 0 == val[1]):
-				a = False
-			print("Az="+str(val[0]))
-			print("El="+str(val[1]))
+		with Poller(self, schedule=AdaptiveSchedule()) as poller:
+			poller.subscribe(lambda position: print("Az=" + str(position.az) + "\nEl=" + str(position.el)))
+			# 120 s covers a full azimuth slew; past that the rotor is not getting there
+			try:
+				val = poller.move_to(90, 90, timeout=120).result()
+				print(val)
+				poller.move_to(0, 0, timeout=120).result()
+			except TimeoutError as e:
+				# e.g. stopped from the front panel, stalled or against a limit
+				print("Error: " + str(e))
+				poller.stop()
 		self.stop()
 
 	'''
@@ -238,6 +220,10 @@ class Rot2proG:
 						   ("           provide an azimuth and elevation and the rotor will change its    ", curses.A_NORMAL),
 						   ("           heading towards the designated location (no return value)         ", curses.A_NORMAL),
 						   ("                                                                             ", curses.A_NORMAL),
+						   ("      WATCH, watch                                                           ", curses.A_BOLD),
+						   ("           poll the rotor at an adaptive rate, faster while it moves, and    ", curses.A_NORMAL),
+						   ("           print its position until it stops moving (Ctrl+C to return)       ", curses.A_NORMAL),
+						   ("                                                                             ", curses.A_NORMAL),
 						   ("      DEV, DEVICE, dev, device                                               ", curses.A_BOLD),
 						   ("           displays information about the connected device (path, name,      ", curses.A_NORMAL),
 						   ("           protocol)                                                         ", curses.A_NORMAL),
@@ -300,12 +286,12 @@ class Rot2proG:
 				stdscr.addnstr(max[0]-1, 0, " Manual page rot2proG [command mode] press q to quit ", max[1], curses.A_REVERSE)
 
 			elif c == curses.KEY_DOWN:
-				if ((45 - max[0]) <= pos):
+				if ((49 - max[0]) <= pos):
 					self.man_draw(stdscr, pos)
 					stdscr.addnstr(max[0]-1, 0, "                                                                             ", max[1], curses.A_NORMAL)
 					stdscr.addnstr(max[0]-1, 0, " Manual page rot2proG [command mode] (END) press q to quit ", max[1], curses.A_REVERSE)
 
-				elif ((45 - pos) > max[0]):
+				elif ((49 - pos) > max[0]):
 					pos += 1
 					self.man_draw(stdscr, pos)
 					stdscr.addnstr(max[0]-1, 0, "                                                                             ", max[1], curses.A_NORMAL)
@@ -362,10 +348,15 @@ class Rot2proG:
 				elif cmd == "test":
 					self.test()
 
+				elif cmd.lower() == "watch":
+					watch(self)
+
 				elif cmd.lower() == "dev" or cmd.lower() == "device":
 					print("Rotor Controller: SPID Elektronik rot2proG")
 					print(f"Connection: {self.host}:{self.port}")
-					print("Protocol: SPID\n")
+					print("Protocol: SPID")
+					print(f"Frames: {self.link.reader.frames}, Dropped bytes: {self.link.reader.dropped}, Realigned: {self.link.reader.realigned}")
+					print(f"Timeouts: {self.link.timeouts}\n")
 
 				elif cmd.lower() == "new device":
 					host=str(input("Host: ")).strip()
@@ -392,6 +383,9 @@ class Rot2proG:
 				print("Error: unknown command")
 				print("Try 'help' for more information")
 
+			except Rot2proGTimeout as e:
+				print("Error: " + str(e) + "\n")
+
 if __name__ == "__main__":
 	rot = Rot2proG('192.168.0.10', 23, debugging=True)
 	rot.cmd_mode()
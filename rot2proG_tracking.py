@@ -0,0 +1,206 @@
+'''
+File: 	rot2proG_tracking.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Trajectory streaming engine for satellite tracking. A Tracker takes a time-tagged
+	azimuth/elevation track (arrays or a generator, e.g. from an orbit propagator) and
+	streams SET commands on a drift-free schedule derived from the time tags, sending
+	every point lookahead seconds early. When the link falls behind, points that are
+	already superseded by the next one are dropped instead of being sent late. Azimuths
+	are unwrapped onto the branch of the -180 to 540 degree range that avoids an unwind
+	mid-pass, and overhead passes are tracked over the top through zenith when the azimuth
+	could not keep up otherwise. Commanded and reported positions are logged so the pointing error of a pass
+	can be analysed.
+'''
+
+import collections
+import threading
+import time
+import numpy as np
+from rot2proG_poller import Poller
+from rot2proG_schedule import AdaptiveSchedule
+from rot2proG_planner import MAX_ERROR, plan_pass, nearest_branch
+
+'''
+Log of a tracked pass, as NumPy arrays. Times are time.time() values. command_time holds
+the time tags of the points that were sent, sent_time when they were sent and
+command_az/command_el the commanded position. report_time, report_az and report_el are
+the positions read back from the controller during the pass and error_az/error_el the
+reported minus the tracked position at the time of each reading (NaN outside the track).
+dropped and rejected count the points dropped as stale and rejected by the limits.
+'''
+TrackLog = collections.namedtuple('TrackLog', ['command_time', 'sent_time', 'command_az', 'command_el', 'report_time', 'report_az', 'report_el', 'error_az', 'error_el', 'dropped', 'rejected'])
+
+'''
+Returns (times, az, el) arrays of a track given as a (N, 3) array or a tuple of three
+arrays, or None for any other iterable of (time, az, el) tuples.
+'''
+def track_arrays(track):
+	if isinstance(track, np.ndarray) and track.ndim == 2:
+		track = np.asarray(track, dtype=float)
+		return track[:, 0], track[:, 1], track[:, 2]
+	if isinstance(track, tuple) and len(track) == 3 and np.ndim(track[0]) == 1:
+		return tuple(np.asarray(a, dtype=float) for a in track)
+	return None
+
+'''
+Yields the points of a track arriving point by point with each azimuth on the branch
+closest to the previous one.
+'''
+def unwrap_points(points, current_az, min_az, max_az):
+	previous = current_az
+	for t, az, el in points:
+		previous = nearest_branch(az, previous, min_az, max_az)
+		yield t, previous, el
+
+class Tracker:
+
+	'''
+	rot is the controller (e.g. a rot2proG_serial_v5 Rot2proG instance). poller is an
+	optional running rot2proG_poller.Poller of that controller; without one the tracker
+	starts its own for the duration of each pass. lookahead is how many seconds before
+	its time tag a point is sent, to make up for the latency of the link and the rotor.
+	The limits default to those of the controller (-180 to 540 degrees of azimuth on the
+	MD-01 with rot2proG_serial_v5). With unwrap the azimuths of the track are moved onto
+	the branch of that range planned by rot2proG_planner, and with flip keyhole passes
+	given as arrays may be tracked over the top through the 90 to 180 degree elevation
+	range, within max_error degrees of pointing error. az_rate and el_rate are the slew
+	rates of the rotor in degrees per second.
+	'''
+	def __init__(self, rot, poller=None, lookahead=0.5, unwrap=True, flip=True, az_rate=6.0, el_rate=6.0, min_az=None, max_az=None, min_el=None, max_el=None, max_error=MAX_ERROR):
+		self.rot = rot
+		self.poller = poller
+		self.lookahead = lookahead
+		self.unwrap = unwrap
+		self.flip = flip
+		self.az_rate = az_rate
+		self.el_rate = el_rate
+		self.max_error = max_error
+		self.min_az = float(rot.min_az if min_az is None else min_az)
+		self.max_az = float(rot.max_az if max_az is None else max_az)
+		self.min_el = float(rot.min_el if min_el is None else min_el)
+		self.max_el = float(rot.max_el if max_el is None else max_el)
+		self.stopping = threading.Event()
+		self.thread = None
+		self.reset()
+
+	def reset(self):
+		self.track = []  # Every (time, az, el) point of the pass, sent or not
+		self.commanded = []  # (time tag, time sent, az, el) of the points sent
+		self.reported = []  # (time, az, el) readings of the controller
+		self.dropped = 0
+		self.rejected = 0
+		self.flipped = False
+
+	def within_limits(self, az, el):
+		return self.min_az <= az <= self.max_az and self.min_el <= el <= self.max_el
+
+	'''
+	Streams a track and blocks until its last point has been sent or stop() is called.
+	A planned track (e.g. a scan plan from rot2proG_scan) is already in controller
+	coordinates and is streamed as is, without unwrapping or flipping. Returns the
+	TrackLog of the pass.
+	'''
+	def run(self, track, planned=False):
+		self.reset()
+		self.stopping.clear()
+		poller = self.poller
+		own_poller = poller is None
+		if own_poller:
+			poller = Poller(self.rot, schedule=AdaptiveSchedule(interval=0.5, fast_interval=0.2)).start()
+		subscriber = poller.subscribe(lambda position: self.reported.append((position.timestamp, position.az, position.el)))
+		try:
+			self.stream(self.points(track, poller, planned), poller)
+		finally:
+			poller.unsubscribe(subscriber)
+			if own_poller:
+				poller.close()
+		return self.log()
+
+	'''
+	Returns an iterator of the (time, az, el) points to stream. A track given as arrays is
+	planned as a whole from the current position of the rotor, flip included; a generator
+	is unwrapped point by point. Planned tracks are left untouched.
+	'''
+	def points(self, track, poller, planned=False):
+		arrays = track_arrays(track)
+		if planned or not self.unwrap:
+			if arrays is not None:
+				return zip(*(a.tolist() for a in arrays))
+			return iter(track)
+		position = poller.latest() or poller.poll()
+		if arrays is None:
+			current_az = position.az if position is not None else 0.0
+			return unwrap_points(iter(track), current_az, self.min_az, self.max_az)
+		times, az, el = arrays
+		current_az = position.az if position is not None and len(az) else (az[0] if len(az) else 0.0)
+		az, el, self.flipped = plan_pass(times, az, el, current_az, self.min_az, self.max_az, self.min_el, self.max_el, self.az_rate, self.el_rate, self.flip, self.max_error)
+		return zip(times.tolist(), az.tolist(), el.tolist())
+
+	'''
+	Sends every point lookahead seconds before its time tag. The schedule is computed from
+	the time tags, so the time spent sending does not accumulate. A point is dropped when
+	the next one is already due, i.e. when the link fell behind or the pass started late.
+	'''
+	def stream(self, points, poller):
+		# Offset between the wall clock of the time tags and the monotonic clock
+		offset = time.time() - time.monotonic()
+		pending = next(points, None)
+		while pending is not None and not self.stopping.is_set():
+			self.track.append(pending)
+			upcoming = next(points, None)
+			now = time.monotonic()
+			if upcoming is not None and upcoming[0] - offset - self.lookahead <= now:
+				self.dropped += 1
+				pending = upcoming
+				continue
+			due = pending[0] - offset - self.lookahead
+			if due > now and self.stopping.wait(due - now):
+				break
+			tag, az, el = pending
+			if self.within_limits(az, el):
+				poller.set(az, el)
+				self.commanded.append((tag, time.time(), az, el))
+			else:
+				self.rejected += 1
+				print(f"Error: Track point azimuth {az}, elevation {el} out of limits. Must be between {self.min_az} and {self.max_az}, {self.min_el} and {self.max_el}.")
+			pending = upcoming
+
+	'''
+	Streams a track from a background thread.
+	'''
+	def start(self, track, planned=False):
+		self.thread = threading.Thread(target=self.run, args=(track, planned), name="rot2proG-tracker", daemon=True)
+		self.thread.start()
+		return self
+
+	def stop(self):
+		self.stopping.set()
+		if self.thread is not None:
+			self.thread.join()
+			self.thread = None
+
+	def join(self, timeout=None):
+		if self.thread is not None:
+			self.thread.join(timeout)
+
+	'''
+	Returns the TrackLog of the current or last pass.
+	'''
+	def log(self):
+		track = np.array(self.track, dtype=float).reshape(-1, 3)
+		commanded = np.array(self.commanded, dtype=float).reshape(-1, 4)
+		reported = np.array(self.reported, dtype=float).reshape(-1, 3)
+		error_az = np.full(len(reported), np.nan)
+		error_el = np.full(len(reported), np.nan)
+		if len(track) and len(reported):
+			inside = (reported[:, 0] >= track[0, 0]) & (reported[:, 0] <= track[-1, 0])
+			error_az[inside] = reported[inside, 1] - np.interp(reported[inside, 0], track[:, 0], track[:, 1])
+			error_el[inside] = reported[inside, 2] - np.interp(reported[inside, 0], track[:, 0], track[:, 2])
+		return TrackLog(commanded[:, 0], commanded[:, 1], commanded[:, 2], commanded[:, 3], reported[:, 0], reported[:, 1], reported[:, 2], error_az, error_el, self.dropped, self.rejected)
+
+'''
+Writes the readings of a TrackLog with their pointing error to a CSV file.
+'''
+def save_log(log, path):
+	data = np.column_stack([log.report_time, log.report_az, log.report_el, log.error_az, log.error_el])
+	np.savetxt(path, data, delimiter=",", header="time,az,el,error_az,error_el", comments="", fmt="%.6f")
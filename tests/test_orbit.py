@@ -0,0 +1,43 @@
+'''
+File: 	test_orbit.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Cross-checks the vectorized SGP4 propagator against the sgp4 package, when installed.
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rot2proG_orbit import Satellites
+
+SETS = [
+	("ISS (ZARYA)",
+		"1 25544U 98067A   24001.50000000  .00016717  00000-0  10270-3 0  9005",
+		"2 25544  51.6416 247.4627 0006703 130.5360 325.0288 15.72125391563537"),
+	("NOAA 19",
+		"1 33591U 09005A   24001.12345678  .00000123  00000-0  91234-4 0  9990",
+		"2 33591  99.1234  45.6789 0013456 123.4567 236.7890 14.12345678765432"),
+	("LOWPERIGEE",
+		"1 99999U 00000A   24001.00000000  .00100000  00000-0  50000-3 0  9990",
+		"2 99999  28.5000 100.0000 0500000  90.0000 270.0000 16.05000000    10"),
+]
+
+'''
+TEME positions every 10 minutes over three days from the epoch agree with the reference
+implementation to within a millimeter, and are NaN where it reports an error (the decay
+of the low perigee orbit).
+'''
+def test_matches_sgp4():
+	api = pytest.importorskip("sgp4.api")
+	satellites = Satellites(SETS)
+	offsets = np.arange(0.0, 3 * 86400.0, 600.0)
+	for index, (name, line1, line2) in enumerate(SETS):
+		position = satellites.subset([index]).propagate(satellites.epoch[index] + offsets)[0]
+		reference = api.Satrec.twoline2rv(line1, line2, api.WGS72)
+		error, expected, _ = reference.sgp4_array(np.full(offsets.size, reference.jdsatepoch), reference.jdsatepochF + offsets / 86400.0)
+		valid = error == 0
+		assert np.array_equal(np.isnan(position[:, 0]), ~valid), name
+		assert np.max(np.linalg.norm(position[valid] - expected[valid], axis=1)) < 1e-6, name
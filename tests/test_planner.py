@@ -0,0 +1,47 @@
+'''
+File: 	test_planner.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Over the top planning of keyhole passes.
+'''
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rot2proG_planner import keyhole, peak_load, plan_pass, pointing_error
+
+'''
+Track of a satellite at altitude km flying a straight line at speed km/s on heading
+degrees, culminating at max_el degrees, from 10 degrees of elevation to 10 degrees,
+sampled every step seconds.
+'''
+def leo_pass(max_el, altitude=500.0, speed=7.6, heading=30.0, step=1.0):
+	miss = altitude / np.tan(np.radians(max_el))
+	half = altitude / np.tan(np.radians(10.0)) / speed
+	t = np.arange(-half, half, step)
+	along = speed * t
+	h = np.radians(heading)
+	east = along * np.sin(h) + miss * np.cos(h)
+	north = along * np.cos(h) - miss * np.sin(h)
+	az = np.degrees(np.arctan2(east, north)) % 360.0
+	el = np.degrees(np.arctan2(altitude, np.hypot(east, north)))
+	return t + 1.7e9, az, el
+
+@pytest.mark.parametrize("max_el", [88.0, 88.5, 89.0, 89.5, 89.9, 90.0])
+def test_keyhole_pass_over_the_top(max_el):
+	t, az, el = leo_pass(max_el)
+	assert keyhole(t, az, el)
+	planned_az, planned_el, flipped = plan_pass(t, az, el, 0.0)
+	assert flipped
+	assert peak_load(t, planned_az, planned_el) < 1.0
+	assert np.max(pointing_error(az, el, planned_az, planned_el)) <= 90.0 - max_el + 0.01
+	assert planned_el.max() > 90.0
+
+def test_pass_missing_zenith_too_far_is_tracked_exactly():
+	t, az, el = leo_pass(85.0)
+	planned_az, planned_el, flipped = plan_pass(t, az, el, 0.0)
+	assert not flipped
+	assert np.max(pointing_error(az, el, planned_az, planned_el)) < 1e-4
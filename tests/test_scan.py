@@ -0,0 +1,42 @@
+'''
+File: 	test_scan.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Streams scan plans through the Tracker against the controller simulator.
+'''
+
+import os
+import sys
+import types
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rot2proG_scan import raster, serpentine, to_track
+from rot2proG_simulator import Simulator, SimulatedRotor
+from rot2proG_socket import Rot2proG
+from rot2proG_tracking import Tracker
+
+LIMITS = types.SimpleNamespace(min_az=-180.0, max_az=540.0, min_el=-21.0, max_el=180.0)
+
+'''
+A raster wider than half a turn keeps its fly backs and its controller coordinates.
+'''
+def test_planned_raster_points_are_untouched():
+	plan = raster(-170, 170, 10, 0, 20, 10)
+	points = list(Tracker(LIMITS).points(to_track(plan), None, planned=True))
+	assert [p[1] for p in points] == plan.az.tolist()
+	assert [p[2] for p in points] == plan.el.tolist()
+
+@pytest.mark.parametrize("pattern", [raster, serpentine])
+def test_stream_scan(pattern):
+	with Simulator() as sim:
+		port = sim.add_tcp(SimulatedRotor(az=-100, el=0, az_rate=100, el_rate=100, accel=400))
+		rot = Rot2proG("127.0.0.1", port)
+		plan = pattern(-100, 100, 50, 0, 10, 10, dwell=0.2, az_rate=100, el_rate=100)
+		log = Tracker(rot, lookahead=0.1).run(to_track(plan), planned=True)
+		rot.sock.close()
+	assert log.dropped == 0
+	assert log.rejected == 0
+	assert np.array_equal(log.command_az, plan.az)
+	assert np.array_equal(log.command_el, plan.el)
@@ -0,0 +1,61 @@
+'''
+File: 	test_schedule.py
+Author: Jaiden Ferraccioli and Spyros Daskalakis
+Brief: 	Adaptive poll schedules sharing a bus budget, alone and through the poller.
+'''
+
+import os
+import sys
+import time
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rot2proG_poller import Poller
+from rot2proG_schedule import AdaptiveSchedule, BusBudget
+from rot2proG_simulator import Simulator, SimulatedRotor
+from rot2proG_socket import Rot2proG
+
+'''
+Feeds identical readings to a schedule until it reaches max_interval.
+'''
+def park(schedule, az=0.0, el=0.0):
+	while schedule.current < schedule.max_interval:
+		schedule.update(az, el, 10)
+
+def test_budget_spaces_slots():
+	budget = BusBudget(rate=10.0)
+	now = time.monotonic()
+	slots = [budget.reserve(now) for _ in range(5)]
+	assert all(b - a == pytest.approx(0.1) for a, b in zip(slots, slots[1:]))
+
+'''
+The slot of the parked poll is given back when a SET asks for a fast poll, and the slots
+of the other consumers are kept.
+'''
+def test_set_replaces_parked_slot():
+	budget = BusBudget(rate=10.0)
+	schedule = AdaptiveSchedule(budget=budget)
+	other = AdaptiveSchedule(budget=budget)
+	park(schedule)
+	other_delay = other.delay(8.0)
+	schedule.set_target(10.0, 0.0)
+	assert schedule.delay(schedule.fast_interval) < schedule.fast_interval + 0.15
+	assert len(budget.slots) == 2
+	assert other.slot - time.monotonic() == pytest.approx(other_delay, abs=0.05)
+
+def test_set_on_parked_rotor_polls_fast():
+	with Simulator() as sim:
+		rot = Rot2proG("127.0.0.1", sim.add_tcp(SimulatedRotor()))
+		schedule = AdaptiveSchedule(budget=BusBudget(rate=10.0))
+		park(schedule)
+		poller = Poller(rot, schedule=schedule)
+		readings = poller.queue()
+		with poller:
+			assert readings.get(timeout=2.0) is not None  # First poll, after which the rotor stays parked
+			time.sleep(0.3)
+			start = time.monotonic()
+			poller.set(5.0, 5.0)
+			assert readings.get(timeout=2.0) is not None
+			assert time.monotonic() - start < 1.0
+		rot.sock.close()